@@ -1,11 +1,22 @@
-import requests
+import asyncio
+import hashlib
+import httpx
+import os
 import re
 import json
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+# Proxy configuration
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma3")  # or your chosen model
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "4"))  # generations sent to Ollama at once
+POOL_MAX_CONNECTIONS = int(os.getenv("POOL_MAX_CONNECTIONS", "32"))
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "300"))
+
 app = FastAPI()
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +29,35 @@ app.add_middleware(
 class AnalysisRequest(BaseModel):
     data: list
 
+class ProxyState:
+    """Pooled client, concurrency limit and in-flight table shared by all requests"""
+
+    def __init__(self):
+        self.client = None
+        self.semaphore = None
+        self.in_flight = {}
+
+        # Metrics
+        self.requests = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.active = 0
+        self.waiting = 0
+
+state = ProxyState()
+
+@app.on_event("startup")
+async def startup():
+    state.client = httpx.AsyncClient(
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=10.0),
+        limits=httpx.Limits(max_connections=POOL_MAX_CONNECTIONS, max_keepalive_connections=POOL_MAX_CONNECTIONS)
+    )
+    state.semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await state.client.aclose()
+
 def extract_json(text):
     match = re.search(r'\{.*\}', text, re.DOTALL)
     if match:
@@ -27,10 +67,8 @@ def extract_json(text):
             return None
     return None
 
-@app.post("/predict")
-async def predict(request: AnalysisRequest):
-    transcript = request.data[0] if len(request.data) > 0 else ""
-    prompt = f"""
+def build_prompt(transcript):
+    return f"""
 You are an expert meeting assistant. Analyze the following meeting transcript and provide a structured analysis.
 
 Meeting Transcript:
@@ -43,19 +81,62 @@ Your response must be a single, valid JSON object with these exact keys:
 
 Respond ONLY with a single valid JSON object, no extra text or explanation.
 """
+
+def build_payload(request: AnalysisRequest, stream: bool):
+    # data follows the Gradio convention: [transcript, format, temperature, max_tokens]
+    transcript = request.data[0] if len(request.data) > 0 else ""
+    options = {}
+    if len(request.data) > 2:
+        options["temperature"] = float(request.data[2])
+    if len(request.data) > 3:
+        options["num_predict"] = int(request.data[3])
+    return {
+        "model": OLLAMA_MODEL,
+        "prompt": build_prompt(transcript),
+        "stream": stream,
+        "options": options
+    }
+
+@asynccontextmanager
+async def upstream_slot():
+    # Bound the generations Ollama runs at once; callers beyond that wait here, not in Ollama
+    state.waiting += 1
+    try:
+        await state.semaphore.acquire()
+    finally:
+        state.waiting -= 1
+    state.active += 1
+    state.upstream_calls += 1
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "gemma3",  # or your chosen model
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=120
-        )
+        yield
+    finally:
+        state.active -= 1
+        state.semaphore.release()
+
+async def generate(payload):
+    async with upstream_slot():
+        response = await state.client.post(f"{OLLAMA_URL}/api/generate", json=payload)
         response.raise_for_status()
-        result = response.json()
-        text = result.get("response", "")
+        return response.json().get("response", "")
+
+async def generate_coalesced(payload):
+    # Identical prompts already in flight share one upstream generation
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+    task = state.in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(generate(payload))
+        state.in_flight[key] = task
+        task.add_done_callback(lambda _: state.in_flight.pop(key, None))
+    else:
+        state.coalesced += 1
+    # Shield so one caller disconnecting does not cancel the others' generation
+    return await asyncio.shield(task)
+
+@app.post("/predict")
+async def predict(request: AnalysisRequest):
+    state.requests += 1
+    try:
+        text = await generate_coalesced(build_payload(request, stream=False))
         parsed = extract_json(text)
         if not parsed:
             parsed = {
@@ -73,10 +154,44 @@ Respond ONLY with a single valid JSON object, no extra text or explanation.
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/predict/stream")
+async def predict_stream(request: AnalysisRequest):
+    """Pass Ollama's NDJSON token stream straight through to the caller"""
+    state.requests += 1
+    payload = build_payload(request, stream=True)
+
+    async def relay():
+        async with upstream_slot():
+            try:
+                async with state.client.stream("POST", f"{OLLAMA_URL}/api/generate", json=payload) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        yield json.dumps({"error": body.decode(errors="replace"), "done": True}) + "\n"
+                        return
+                    async for line in response.aiter_lines():
+                        if line:
+                            yield line + "\n"
+            except httpx.HTTPError as e:
+                yield json.dumps({"error": str(e), "done": True}) + "\n"
+
+    return StreamingResponse(relay(), media_type="application/x-ndjson")
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "max_concurrency": MAX_CONCURRENCY,
+        "active": state.active,
+        "waiting": state.waiting,
+        "in_flight_prompts": len(state.in_flight),
+        "requests": state.requests,
+        "upstream_calls": state.upstream_calls,
+        "coalesced": state.coalesced,
+    }
+
 @app.get("/")
 async def root():
     return {"message": "LLM Analysis API is running"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=7861) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=7861)
@@ -1,12 +1,33 @@
 import whisper
-import tempfile
+import asyncio
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
 from fastapi import FastAPI, File, UploadFile
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+# Batching configuration
+MODEL_NAME = os.getenv("WHISPER_MODEL", "base")
+BATCHING_ENABLED = os.getenv("BATCHING_ENABLED", "false").lower() == "true"
+MAX_BATCH_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "50"))
+# Windows overlap by BATCH_OVERLAP_SECONDS on each side and are cut at the quietest
+# point in the last BATCH_SEARCH_SECONDS before the 30-second limit
+OVERLAP_SECONDS = float(os.getenv("BATCH_OVERLAP_SECONDS", "1"))
+SEARCH_SECONDS = float(os.getenv("BATCH_SEARCH_SECONDS", "6"))
+# Same thresholds model.transcribe uses to detect silence and failed greedy decodes
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
 # Load the Whisper model
-model = whisper.load_model("base")
+model = whisper.load_model(MODEL_NAME)
 
 app = FastAPI(title="Whisper API", version="1.0.0")
 
@@ -19,17 +40,246 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def split_windows(audio: np.ndarray):
+    """
+    Cut audio at quiet points into overlapping windows of at most 30 seconds
+
+    Returns (samples, offset, owner start, owner end) per window; a segment
+    belongs to the window whose owner range holds its midpoint, so overlaps
+    are transcribed twice but kept once.
+    """
+    rate = whisper.audio.SAMPLE_RATE
+    duration = len(audio) / rate
+    core = whisper.audio.CHUNK_LENGTH - 2 * OVERLAP_SECONDS
+
+    # Frame RMS energy smoothed over ~0.5 s so short pauses inside words are ignored
+    hop = rate // 10
+    num_frames = len(audio) // hop
+    energy = np.sqrt(np.mean(audio[:num_frames * hop].reshape(num_frames, hop) ** 2, axis=1)) if num_frames else np.zeros(0)
+    energy = np.convolve(energy, np.ones(5) / 5, mode="same")
+
+    cuts = [0.0]
+    while duration - cuts[-1] > core:
+        lo = int((cuts[-1] + max(core - SEARCH_SECONDS, 1.0)) * 10)
+        hi = int((cuts[-1] + core) * 10)
+        cuts.append((lo + int(np.argmin(energy[lo:hi]))) / 10 if hi > lo else hi / 10)
+    cuts.append(duration)
+
+    windows = []
+    for i, (start, end) in enumerate(zip(cuts[:-1], cuts[1:])):
+        window_start = max(0.0, start - OVERLAP_SECONDS)
+        samples = audio[int(window_start * rate):int((end + OVERLAP_SECONDS) * rate)]
+        windows.append((samples, window_start, start, end if i < len(cuts) - 2 else float("inf")))
+    return windows
+
+class BatchItem:
+    """One audio window (at most 30 seconds) waiting for a batched decode"""
+
+    def __init__(self, audio, future, loop):
+        self.audio = audio
+        self.future = future
+        self.loop = loop
+        self.enqueued_at = time.perf_counter()
+
+class MicroBatcher:
+    """
+    Groups concurrent mel windows into batched encoder/decoder passes on one thread
+
+    Batched decoding is greedy with timestamps; a window that looks like a
+    failed decode (too repetitive or low confidence) is re-run through
+    model.transcribe with its temperature fallback on a separate thread, so
+    the batch loop keeps going. Whisper's decoder installs kv-cache hooks on
+    the model's modules, so that thread lazily loads its own model instance.
+    """
+
+    def __init__(self, model, max_batch_size: int, max_wait_ms: float):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.options = whisper.DecodingOptions(fp16=torch.cuda.is_available(), without_timestamps=False)
+        self.tokenizer = whisper.tokenizer.get_tokenizer(model.is_multilingual, num_languages=model.num_languages)
+        self.queue = queue.Queue()
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.total_queue_wait = 0.0
+        self.total_batch_time = 0.0
+        self.max_observed_batch = 0
+        self.fallbacks = 0
+
+        self.fallback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper-fallback")
+        self.fallback_model = None
+
+        self.thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, audio: np.ndarray) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queue.put(BatchItem(audio, future, loop))
+        return future
+
+    def _collect(self):
+        # Block for the first item, then wait up to max_wait for the batch to fill
+        batch = [self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                # Mel features are computed here so the event loop only slices audio
+                mels = torch.stack([
+                    whisper.log_mel_spectrogram(whisper.pad_or_trim(item.audio), n_mels=self.model.dims.n_mels)
+                    for item in batch
+                ]).to(self.model.device)
+                results = whisper.decode(self.model, mels, self.options)
+                outcomes, fallbacks = [], []
+                for item, result in zip(batch, results):
+                    segments = self._segments(item, result)
+                    if segments is None:
+                        fallbacks.append(item)
+                    else:
+                        outcomes.append((item, segments, None))
+            except Exception as e:
+                outcomes, fallbacks = [(item, None, e) for item in batch], []
+            finished = time.perf_counter()
+
+            self.batches += 1
+            self.items += len(batch)
+            self.total_batch_time += finished - started
+            self.total_queue_wait += sum(started - item.enqueued_at for item in batch)
+            self.max_observed_batch = max(self.max_observed_batch, len(batch))
+
+            for item, segments, error in outcomes:
+                item.loop.call_soon_threadsafe(self._resolve, item.future, segments, error)
+            for item in fallbacks:
+                self.fallbacks += 1
+                self.fallback_executor.submit(self._fallback, item)
+
+    def _fallback(self, item):
+        # Runs on the fallback thread and resolves the item's future itself
+        try:
+            if self.fallback_model is None:
+                self.fallback_model = whisper.load_model(MODEL_NAME)
+            fallback = self.fallback_model.transcribe(item.audio, condition_on_previous_text=False, fp16=self.options.fp16)
+            segments = [
+                {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+                for seg in fallback.get("segments", [])
+            ]
+            item.loop.call_soon_threadsafe(self._resolve, item.future, segments, None)
+        except Exception as e:
+            item.loop.call_soon_threadsafe(self._resolve, item.future, None, e)
+
+    def _segments(self, item, result):
+        # Silence: nothing to keep
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            return []
+
+        # Failed greedy decode: None sends the window to the fallback thread
+        if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+            return None
+
+        # Timestamp tokens delimit segments: <|start|> text <|end|>
+        segments = []
+        start, text_tokens = None, []
+        for token in result.tokens:
+            if token >= self.tokenizer.timestamp_begin:
+                time_s = (token - self.tokenizer.timestamp_begin) * 0.02
+                if text_tokens:
+                    segments.append({"start": start or 0.0, "end": time_s, "text": self.tokenizer.decode(text_tokens)})
+                    text_tokens = []
+                    start = None
+                else:
+                    start = time_s
+            elif token < self.tokenizer.eot:
+                text_tokens.append(token)
+        if text_tokens:
+            segments.append({
+                "start": start or 0.0,
+                "end": len(item.audio) / whisper.audio.SAMPLE_RATE,
+                "text": self.tokenizer.decode(text_tokens)
+            })
+        return segments
+
+    @staticmethod
+    def _resolve(future, segments, error):
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(segments)
+
+    def metrics(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "windows_processed": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_observed_batch_size": self.max_observed_batch,
+            "avg_queue_wait_ms": 1000.0 * self.total_queue_wait / self.items if self.items else 0.0,
+            "avg_batch_latency_ms": 1000.0 * self.total_batch_time / self.batches if self.batches else 0.0,
+            "fallbacks": self.fallbacks,
+        }
+
+batcher = MicroBatcher(model, MAX_BATCH_SIZE, MAX_WAIT_MS) if BATCHING_ENABLED else None
+
+async def decode_audio(audio_data: bytes) -> np.ndarray:
+    # Pipe the upload through ffmpeg to 16 kHz mono PCM without a temp file
+    process = await asyncio.create_subprocess_exec(
+        FFMPEG_BINARY, "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+        "-vn", "-ac", "1", "-ar", str(whisper.audio.SAMPLE_RATE),
+        "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate(audio_data)
+    if process.returncode != 0:
+        raise Exception(f"Failed to decode audio: {stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(stdout, np.int16).astype(np.float32) / 32768.0
+
+async def transcribe_batched(audio: np.ndarray):
+    # Each window joins whatever batch is forming; overlapping segments are kept once
+    windows = split_windows(audio)
+    results = await asyncio.gather(*[batcher.submit(samples) for samples, _, _, _ in windows])
+    segments = []
+    for (_, offset, lo, hi), window_segments in zip(windows, results):
+        for seg in window_segments:
+            start, end = seg["start"] + offset, seg["end"] + offset
+            if lo <= (start + end) / 2 < hi:
+                segments.append({"start": start, "end": end, "text": seg["text"]})
+    return "".join(seg["text"] for seg in segments).strip(), segments
+
 @app.post("/predict")
 async def predict(file: UploadFile = File(...)):
     try:
         audio_data = await file.read()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            tmp_file.write(audio_data)
-            tmp_file_path = tmp_file.name
-        result = model.transcribe(tmp_file_path)
-        os.unlink(tmp_file_path)
+        audio = await decode_audio(audio_data)
+        if batcher:
+            text, segments = await transcribe_batched(audio)
+        else:
+            # Unbatched mode still keeps the event loop free
+            result = await asyncio.get_running_loop().run_in_executor(None, model.transcribe, audio)
+            text = result["text"]
+            segments = [{"start": seg["start"], "end": seg["end"], "text": seg["text"]} for seg in result["segments"]]
         return JSONResponse({
-            "data": [result["text"]],
+            "data": [text],
+            "segments": segments,
             "is_generating": False,
             "duration": 0.0,
             "average_duration": 0.0
@@ -37,10 +287,16 @@ async def predict(file: UploadFile = File(...)):
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.get("/metrics")
+async def metrics():
+    if not batcher:
+        return {"batching_enabled": False}
+    return {"batching_enabled": True, **batcher.metrics()}
+
 @app.get("/")
 async def root():
     return {"message": "Whisper API is running"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=7860) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=7860)
@@ -1,7 +1,8 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
+import asyncio
 import uuid
 import logging
 from datetime import datetime
@@ -11,11 +12,18 @@ import json
 
 logger = logging.getLogger(__name__)
 
-from .models import MeetingRequest, MeetingResponse, ProcessingStatus
+from .models import MeetingRequest, MeetingResponse, ProcessingStatus, UploadInitRequest, UploadSession
 from .services.ai_service import AIService
 from .services.database_service import DatabaseService
-from .utils.audio_utils import validate_audio_file, save_upload_file
-from .utils.video_utils import extract_audio_from_video, is_video_file, cleanup_temp_audio
+from .services.upload_service import UploadService, UploadNotFoundError
+from .services.result_cache import ResultCache
+from .services.job_queue import JobQueue, QueueFullError
+from .services.progress_service import ProgressService
+from .services.semantic_index import SemanticIndex
+from .services.whisper_registry import ModelNotAllowedError
+from .services.structured_output import PARSE_FAILED
+from .utils.audio_utils import validate_audio_file, save_upload_file, FileTooLargeError
+from .utils.video_utils import extract_audio_pcm, is_video_file
 
 app = FastAPI(
     title="Synapse Meeting Assistant API",
@@ -35,6 +43,49 @@ app.add_middleware(
 # Initialize services
 ai_service = AIService()
 db_service = DatabaseService()
+upload_service = UploadService()
+result_cache = ResultCache()
+job_queue = JobQueue()
+progress_service = ProgressService()
+semantic_index = SemanticIndex()
+
+@app.on_event("startup")
+async def startup():
+    """Resume interrupted jobs and start the processing workers"""
+    for job_id in await job_queue.recover():
+        await db_service.update_meeting_status(job_id, ProcessingStatus.FAILED, "Processing was interrupted too many times")
+    await job_queue.start(run_meeting_job)
+    
+    # Keep LLM backend health current off the request path
+    ai_service.health_monitor.start()
+    
+    # Abandoned resumable uploads are removed after UPLOAD_SESSION_TTL_HOURS
+    upload_service.start()
+    ai_service.prewarm_llm()
+    
+    # Load the embedding model and approximate index in the background
+    semantic_index.start()
+    
+    # Meetings stored before the search index existed become searchable in the background
+    asyncio.create_task(db_service.backfill_search_index())
+    
+    # Optionally warm Whisper models in the background so startup stays fast
+    preload = [name.strip() for name in os.getenv("WHISPER_PRELOAD", "").split(",") if name.strip()]
+    if preload and ai_service.use_local_whisper:
+        asyncio.get_event_loop().run_in_executor(ai_service.executor, ai_service.model_registry.preload, preload)
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the processing workers and release service resources"""
+    await job_queue.close()
+    await upload_service.stop()
+    await ai_service.close()
+    db_service.close()
+    semantic_index.close()
+
+def queue_full_exception(e: QueueFullError, status_code: int = 429) -> HTTPException:
+    """Backpressure response telling clients to retry later"""
+    return HTTPException(status_code=status_code, detail=str(e), headers={"Retry-After": "30"})
 
 @app.get("/")
 async def root():
@@ -43,9 +94,9 @@ async def root():
 
 @app.post("/api/process-meeting", response_model=MeetingResponse)
 async def process_meeting(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    meeting_title: Optional[str] = None
+    meeting_title: Optional[str] = None,
+    whisper_model: Optional[str] = None
 ):
     """
     Process an uploaded meeting audio file and generate analysis
@@ -58,40 +109,134 @@ async def process_meeting(
                 detail="Invalid file format. Please upload an audio file (mp3, wav, m4a, etc.)"
             )
         
+        # Refuse work before receiving the file if the queue is already full
+        job_queue.ensure_capacity()
+        ai_service.model_registry.resolve(whisper_model)
+        
         # Generate unique ID for this processing job
         job_id = str(uuid.uuid4())
         
-        # Save the uploaded file temporarily
-        file_path = await save_upload_file(file, job_id)
+        # Stream the uploaded file to temporary storage
+        upload = await save_upload_file(file, job_id)
+        file_path = upload["file_path"]
         
-        # Create initial database record
-        meeting_data = {
-            "id": job_id,
-            "title": meeting_title or f"Meeting {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-            "filename": file.filename,
-            "status": ProcessingStatus.PROCESSING,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        await db_service.create_meeting(meeting_data)
-        
-        # Start background processing
-        background_tasks.add_task(
-            process_meeting_background,
+        return await start_meeting_job(
             job_id,
             file_path,
-            meeting_title
+            file.filename,
+            meeting_title,
+            upload["sha256"],
+            whisper_model
         )
         
-        return MeetingResponse(
-            job_id=job_id,
-            status=ProcessingStatus.PROCESSING,
-            message="Meeting processing started. Check status with the job_id."
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise queue_full_exception(e)
+    except ModelNotAllowedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing meeting: {str(e)}")
+
+@app.post("/api/uploads", response_model=UploadSession)
+async def init_upload(request: UploadInitRequest):
+    """
+    Start a resumable upload for a large meeting recording
+    """
+    try:
+        job_queue.ensure_capacity()
+        ai_service.model_registry.resolve(request.whisper_model)
+        
+        upload_id = str(uuid.uuid4())
+        await upload_service.create_upload(
+            upload_id,
+            request.filename,
+            request.total_size,
+            request.part_size,
+            request.meeting_title,
+            request.whisper_model
         )
+        return await upload_service.get_status(upload_id)
         
+    except QueueFullError as e:
+        raise queue_full_exception(e)
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (ModelNotAllowedError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing meeting: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error starting upload: {str(e)}")
+
+@app.put("/api/uploads/{upload_id}/parts/{part_number}")
+async def upload_part(upload_id: str, part_number: int, file: UploadFile = File(...)):
+    """
+    Upload one numbered part; parts can be sent in parallel and in any order
+    """
+    try:
+        return await upload_service.save_part(upload_id, part_number, file)
+        
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (FileTooLargeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error uploading part: {str(e)}")
+
+@app.get("/api/uploads/{upload_id}", response_model=UploadSession)
+async def get_upload_status(upload_id: str):
+    """
+    Get received parts and the contiguous offset so a client can resume
+    """
+    try:
+        return await upload_service.get_status(upload_id)
+        
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving upload status: {str(e)}")
+
+@app.post("/api/uploads/{upload_id}/complete", response_model=MeetingResponse)
+async def complete_upload(upload_id: str):
+    """
+    Assemble the uploaded parts and start meeting processing
+    
+    The parts are kept until the job is queued, so a full queue returns 503
+    and the same upload can be completed again later.
+    """
+    try:
+        job_queue.ensure_capacity()
+        
+        return await upload_service.complete_upload(
+            upload_id,
+            lambda upload: start_meeting_job(
+                upload_id,
+                upload["file_path"],
+                upload["filename"],
+                upload["meeting_title"],
+                upload["sha256"],
+                upload.get("whisper_model")
+            )
+        )
+        
+    except QueueFullError as e:
+        raise queue_full_exception(e, status_code=503)
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error completing upload: {str(e)}")
+
+@app.delete("/api/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    """
+    Discard a resumable upload and its stored parts
+    """
+    if not await upload_service.abort_upload(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return {"upload_id": upload_id, "aborted": True}
 
 @app.get("/api/meeting-status/{job_id}")
 async def get_meeting_status(job_id: str):
@@ -103,44 +248,422 @@ async def get_meeting_status(job_id: str):
         if not meeting:
             raise HTTPException(status_code=404, detail="Meeting not found")
         
+        # Running jobs also report their live stage and any analysis fields already generated
+        progress = progress_service.snapshot(job_id)
+        if progress:
+            meeting = {**meeting, "progress": progress}
+        
         return meeting
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving meeting status: {str(e)}")
 
+@app.get("/api/queue/stats")
+async def get_queue_stats():
+    """
+    Get processing queue depth and worker pool configuration
+    """
+    return job_queue.stats()
+
+@app.get("/api/models/stats")
+async def get_model_stats():
+    """
+    Get loaded Whisper models and their memory use
+    """
+    return ai_service.model_registry.stats()
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """
+    Get hit/miss counters of the content-addressed result cache
+    """
+    return result_cache.stats()
+
+@app.get("/api/backends/stats")
+async def get_backend_stats():
+    """
+    Get circuit breaker state, last health probe and failover timings of the LLM backends
+    """
+    return ai_service.health_monitor.stats()
+
+@app.get("/api/db/stats")
+async def get_db_stats():
+    """
+    Get per-operation database latency, separate from inference time
+    """
+    return db_service.stats()
+
+@app.get("/api/semantic-index/stats")
+async def get_semantic_index_stats():
+    """
+    Get semantic index size, embedding throughput and query latency
+    """
+    return semantic_index.stats()
+
+@app.get("/api/router/stats")
+async def get_router_stats():
+    """
+    Get per-backend latency percentiles, error rates, queue depth and hedging counters
+    """
+    return ai_service.router.stats()
+
+@app.get("/api/llm-scheduler/stats")
+async def get_llm_scheduler_stats():
+    """
+    Get slot usage, queue depth and queue-wait times of the LLM scheduler
+    """
+    return ai_service.llm_scheduler.stats()
+
+@app.get("/api/analysis/stats")
+async def get_analysis_stats():
+    """
+    Get how often LLM output failed to parse, how it was repaired and the tokens wasted,
+    plus prefill reuse of multi-pass extraction
+    """
+    return {**ai_service.parse_stats.stats(), "multi_pass": ai_service.ollama_service.multi_pass_stats()}
+
+@app.get("/api/llm-cache/stats")
+async def get_llm_cache_stats():
+    """
+    Get per-tier hit rates and sizes of the LLM response cache
+    """
+    return ai_service.llm_cache.stats()
+
+@app.get("/api/meeting-events/{job_id}")
+async def stream_meeting_events(job_id: str):
+    """
+    Stream stage transitions, percent-complete and transcript segments as server-sent events
+    """
+    # Subscribe before reading the record so a job finishing in between is not missed
+    queue = progress_service.subscribe(job_id)
+    
+    meeting = await db_service.get_meeting(job_id)
+    if not meeting:
+        progress_service.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    async def event_stream():
+        try:
+            # Already finished: send the final record and stop
+            if meeting.get("status") in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED):
+                event = "completed" if meeting.get("status") == ProcessingStatus.COMPLETED else "failed"
+                yield f"event: {event}\ndata: {json.dumps(meeting, default=str)}\n\n"
+                return
+            
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                yield f"event: {message['event']}\ndata: {json.dumps(message, default=str)}\n\n"
+                
+                if message["event"] in ProgressService.TERMINAL_EVENTS:
+                    return
+        finally:
+            progress_service.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/meetings")
-async def get_meetings(limit: int = 10, offset: int = 0):
+async def get_meetings(limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
     """
-    Get list of processed meetings
+    Get list of processed meetings (summary fields only)
+    
+    Pass the returned next_cursor as cursor to fetch the following page.
     """
     try:
-        meetings = await db_service.get_meetings(limit, offset)
-        return {"meetings": meetings, "total": len(meetings)}
+        return await db_service.get_meetings(limit, offset, cursor)
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving meetings: {str(e)}")
 
-async def process_meeting_background(job_id: str, file_path: str, meeting_title: Optional[str]):
+@app.delete("/api/meetings/{meeting_id}")
+async def delete_meeting(meeting_id: str):
+    """
+    Delete a meeting and remove it from full-text and semantic search
+    """
+    job = job_queue.get_job(meeting_id)
+    if job and job["status"] in (JobQueue.QUEUED, JobQueue.RUNNING):
+        raise HTTPException(status_code=409, detail="Meeting is still being processed")
+    
+    if not await purge_meeting(meeting_id):
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    return {"meeting_id": meeting_id, "deleted": True}
+
+@app.get("/api/search")
+async def search_meetings(q: str, limit: int = 10):
+    """
+    Full-text search over meeting titles, summaries, action items, decisions and transcripts
+    
+    Returns ranked hits with a snippet whose matches are wrapped in <mark></mark>.
+    """
+    try:
+        results = await db_service.search_meetings(q, max(1, min(limit, 100)))
+        return {"query": q, "results": results, "total": len(results)}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching meetings: {str(e)}")
+
+@app.get("/api/search/semantic")
+async def semantic_search(q: str, limit: int = 5):
+    """
+    Find meetings related in meaning to a question, with their best matching passages
+    """
+    try:
+        hits = await semantic_index.search(q, max(1, min(limit, 50)))
+        
+        # Attach titles; meetings deleted since they were indexed are dropped
+        meetings = await asyncio.gather(*(db_service.get_meeting(hit["meeting_id"]) for hit in hits))
+        results = [
+            {**hit, "title": meeting.get("title"), "created_at": meeting.get("created_at")}
+            for hit, meeting in zip(hits, meetings)
+            if meeting
+        ]
+        return {"query": q, "results": results, "total": len(results)}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching meetings: {str(e)}")
+
+@app.post("/api/search/reindex")
+async def reindex_search():
+    """
+    Rebuild the full-text search index from the meetings store
+    """
+    try:
+        indexed = await db_service.backfill_search_index(rebuild=True)
+        return {"indexed": indexed}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding search index: {str(e)}")
+
+async def index_transcript(job_id: str, transcript: str):
+    """
+    Embedding stage: add the transcript's passages to the semantic index
+    
+    A failure is logged and does not fail the meeting.
+    """
+    try:
+        passages = await semantic_index.index_meeting(job_id, transcript)
+        logger.info(f"Indexed {passages} passages of meeting {job_id} for semantic search")
+    except Exception as e:
+        logger.warning(f"Semantic indexing failed for meeting {job_id}: {str(e)}")
+
+async def purge_meeting(meeting_id: str) -> bool:
+    """
+    Delete a meeting from the store, the full-text index and the semantic index
+    """
+    deleted = await db_service.delete_meeting(meeting_id)
+    try:
+        await semantic_index.remove_meeting(meeting_id)
+    except Exception as e:
+        logger.warning(f"Semantic index removal failed for meeting {meeting_id}: {str(e)}")
+    return deleted
+
+async def start_meeting_job(
+    job_id: str,
+    file_path: str,
+    filename: str,
+    meeting_title: Optional[str],
+    content_hash: Optional[str] = None,
+    whisper_model: Optional[str] = None
+) -> MeetingResponse:
+    """
+    Create the initial meeting record and queue it for processing
+    """
+    meeting_data = {
+        "id": job_id,
+        "title": meeting_title or f"Meeting {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+        "filename": filename,
+        "status": ProcessingStatus.PENDING,
+        "created_at": datetime.now().isoformat(),
+        "updated_at": datetime.now().isoformat()
+    }
+    
+    await db_service.create_meeting(meeting_data)
+    
+    try:
+        await job_queue.enqueue(job_id, {
+            "file_path": file_path,
+            "meeting_title": meeting_title,
+            "content_hash": content_hash,
+            "whisper_model": whisper_model
+        })
+        progress_service.stage(job_id, "queued", 5)
+    except QueueFullError:
+        await purge_meeting(job_id)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    
+    return MeetingResponse(
+        job_id=job_id,
+        status=ProcessingStatus.PENDING,
+        message="Meeting queued for processing. Check status with the job_id."
+    )
+
+async def run_meeting_job(job: dict):
+    """
+    Job queue handler: process one queued meeting, resuming from its checkpoint
+    
+    Failures propagate to the queue, which retries with backoff until
+    JOB_MAX_ATTEMPTS and then marks the job failed.
+    """
+    payload = job["payload"]
+    await process_meeting_background(
+        job["id"],
+        payload["file_path"],
+        payload.get("meeting_title"),
+        payload.get("content_hash"),
+        job.get("checkpoint"),
+        payload.get("whisper_model"),
+        job_queue.is_last_attempt(job)
+    )
+
+async def get_cached_results(cache_key: str) -> Optional[dict]:
+    """
+    Fetch stored results of an identical, already-processed recording
+    """
+    cached_id = result_cache.get(cache_key)
+    if not cached_id:
+        return None
+    
+    cached = await db_service.get_meeting(cached_id)
+    if not cached or cached.get("status") != ProcessingStatus.COMPLETED or not cached.get("transcript"):
+        result_cache.invalidate(cache_key)
+        return None
+    
+    logger.info(f"Result cache hit: reusing results of meeting {cached_id}")
+    return {
+        "transcript": cached.get("transcript"),
+        "summary": cached.get("summary", ""),
+        "action_items": cached.get("action_items", []),
+        "key_decisions": cached.get("key_decisions", []),
+        "status": ProcessingStatus.COMPLETED,
+        "updated_at": datetime.now().isoformat()
+    }
+
+async def process_meeting_background(
+    job_id: str,
+    file_path: str,
+    meeting_title: Optional[str],
+    content_hash: Optional[str] = None,
+    checkpoint: Optional[dict] = None,
+    whisper_model: Optional[str] = None,
+    final_attempt: bool = True
+):
     """
     Background task to process the meeting audio or video file
+    
+    Stage outputs are checkpointed in the job queue, so a job resumed after a
+    restart or retry skips the stages it already finished. Errors are
+    re-raised for the queue; the meeting is marked failed and the upload
+    removed only on the final attempt.
     """
-    temp_audio_path = None
+    checkpoint = checkpoint or {}
+    cache_key = None
+    incremental = None
+    
     try:
         # Update status to processing
         await db_service.update_meeting_status(job_id, ProcessingStatus.PROCESSING)
         
-        # Step 1: Handle video files by extracting audio
-        processing_path = file_path
-        if is_video_file(file_path):
-            logger.info(f"Processing video file: {file_path}")
-            temp_audio_path = extract_audio_from_video(file_path)
-            processing_path = temp_audio_path
+        # Looked up under the preferred backends; stored under the ones that actually ran
+        if content_hash:
+            cache_key = result_cache.make_key(
+                content_hash,
+                ai_service.transcription_model_id(whisper_model),
+                ai_service.analysis_model_id()
+            )
+        
+        # Duplicate uploads reuse the stored transcript and analysis
+        if cache_key:
+            cached_results = await get_cached_results(cache_key)
+            if cached_results:
+                await db_service.update_meeting_results(job_id, cached_results)
+                await index_transcript(job_id, cached_results["transcript"])
+                progress_service.publish(job_id, "completed", percent=100, cached=True, **cached_results)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                return
+        
+        # Load the analysis model while transcription runs
+        ai_service.prewarm_llm()
         
+        # Step 1: Handle video files by demuxing audio straight to 16 kHz mono PCM
         # Step 2: Transcribe audio using Whisper
-        transcript = await ai_service.transcribe_audio(processing_path)
+        transcription_backends = set(checkpoint.get("transcription_backends", []))
+        analysis_backends = set(checkpoint.get("analysis_backends", []))
+        
+        transcript = checkpoint.get("transcript")
+        if transcript is None:
+            audio_input = file_path
+            if is_video_file(file_path):
+                logger.info(f"Processing video file: {file_path}")
+                progress_service.stage(job_id, "extract", 10)
+                audio_input = await extract_audio_pcm(file_path)
+            
+            # Segments replayed from an earlier attempt would duplicate this one's
+            progress_service.reset(job_id)
+            progress_service.stage(job_id, "transcribe", 15)
+            
+            # Finished transcript chunks are analyzed while Whisper keeps going
+            incremental = ai_service.start_incremental_analysis(backends_used=analysis_backends)
+            
+            def on_segment(segment: dict, duration: float):
+                # Transcription spans 15-75% of overall progress
+                fraction = min(segment["end"] / duration, 1.0) if duration else 0.0
+                progress_service.publish_threadsafe(
+                    job_id, "segment", percent=round(15 + 60 * fraction, 1), **segment
+                )
+                if incremental:
+                    incremental.add_segment_threadsafe(segment["text"])
+            
+            def on_discard():
+                # Queued behind the abandoned attempt's segment events still pending on the loop
+                asyncio.get_running_loop().call_soon(progress_service.reset, job_id)
+            
+            transcript = await ai_service.transcribe_audio(
+                audio_input, on_segment, whisper_model, transcription_backends, on_discard
+            )
+            await job_queue.save_checkpoint(job_id, "transcribed", {
+                "transcript": transcript,
+                "transcription_backends": sorted(transcription_backends)
+            })
+        else:
+            logger.info(f"Resuming job {job_id} from transcription checkpoint")
         
         # Step 3: Analyze transcript using LLM
-        analysis = await ai_service.analyze_transcript(transcript)
+        analysis = checkpoint.get("analysis")
+        if analysis is None:
+            progress_service.stage(job_id, "analyze", 75)
+            
+            # Long transcripts: only the last chunk and the merge remain, provided the
+            # pipelined chunks came from the transcription attempt that won
+            if incremental:
+                analysis = await incremental.finish(transcript)
+            if analysis is None:
+                # Discarded pipelined chunks do not count towards the analysis provenance
+                analysis_backends.clear()
+                analysis = await ai_service.analyze_transcript(
+                    transcript,
+                    on_partial=lambda fields: progress_service.publish(job_id, "partial", fields=fields),
+                    backends_used=analysis_backends
+                )
+            await job_queue.save_checkpoint(job_id, "analyzed", {
+                "analysis": analysis,
+                "analysis_backends": sorted(analysis_backends)
+            })
         
         # Step 4: Save results to database
         results = {
@@ -152,23 +675,46 @@ async def process_meeting_background(job_id: str, file_path: str, meeting_title:
             "updated_at": datetime.now().isoformat()
         }
         
-        await db_service.update_meeting_results(job_id, results)
+        # Placeholder analyses from unparseable LLM output are shown but never reused.
+        # Results are keyed by the backends that produced them, so a failover to the
+        # HF space or the remote Whisper API never answers later preferred-backend lookups.
+        saved = await db_service.update_meeting_results(job_id, results)
+        if saved and content_hash and transcription_backends and analysis_backends and not analysis.get(PARSE_FAILED):
+            result_cache.put(result_cache.make_key(
+                content_hash,
+                ai_service.transcription_model_id(whisper_model, next(iter(transcription_backends))),
+                ai_service.analysis_model_id(analysis_backends)
+            ), job_id)
+        
+        # Step 5: Embed transcript passages for semantic search
+        progress_service.stage(job_id, "index", 95)
+        await index_transcript(job_id, transcript)
+        
+        progress_service.publish(job_id, "completed", percent=100, **results)
         
         # Clean up temporary files
         if os.path.exists(file_path):
             os.remove(file_path)
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            cleanup_temp_audio(temp_audio_path)
             
     except Exception as e:
+        if incremental:
+            incremental.cancel()
+        
+        if not final_attempt:
+            # The queue retries the job; keep the upload for the next attempt
+            await db_service.update_meeting_status(job_id, ProcessingStatus.PENDING)
+            progress_service.reset(job_id)
+            progress_service.stage(job_id, "queued", 5)
+            raise
+        
         # Update status to failed
         await db_service.update_meeting_status(job_id, ProcessingStatus.FAILED, str(e))
+        progress_service.publish(job_id, "failed", error_message=str(e))
         
         # Clean up temporary files
         if os.path.exists(file_path):
             os.remove(file_path)
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            cleanup_temp_audio(temp_audio_path)
+        raise
 
 if __name__ == "__main__":
     import uvicorn
@@ -20,6 +20,26 @@ class MeetingResponse(BaseModel):
     status: ProcessingStatus = Field(..., description="Current status of the processing")
     message: str = Field(..., description="Human-readable message about the status")
 
+class UploadInitRequest(BaseModel):
+    """Request model for starting a resumable upload"""
+    filename: str = Field(..., description="Original filename of the recording")
+    total_size: int = Field(..., description="Total size of the recording in bytes")
+    part_size: Optional[int] = Field(None, description="Requested part size in bytes")
+    meeting_title: Optional[str] = Field(None, description="Optional title for the meeting")
+    whisper_model: Optional[str] = Field(None, description="Whisper model size (tiny, base, small, medium)")
+
+class UploadSession(BaseModel):
+    """Response model describing a resumable upload session"""
+    upload_id: str = Field(..., description="Upload identifier, reused as the processing job_id")
+    filename: str = Field(..., description="Original filename of the recording")
+    total_size: int = Field(..., description="Total size of the recording in bytes")
+    part_size: int = Field(..., description="Size of every part except the last, in bytes")
+    total_parts: int = Field(..., description="Number of parts the recording is split into")
+    received_parts: List[int] = Field(default_factory=list, description="Part numbers already stored")
+    missing_parts: List[int] = Field(default_factory=list, description="Part numbers still to upload")
+    bytes_received: int = Field(0, description="Total bytes stored across received parts")
+    offset: int = Field(0, description="Bytes received contiguously from the start of the file")
+
 class MeetingAnalysis(BaseModel):
     """Model for meeting analysis results"""
     summary: str = Field(..., description="3-sentence summary of the meeting")
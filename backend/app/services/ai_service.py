@@ -1,14 +1,28 @@
 import httpx
+import io
 import json
 import os
-from typing import Dict, Any, Optional
+from functools import partial
+from typing import Dict, Any, Optional, Union, Callable, Iterable, Set
 import logging
 import whisper
 import asyncio
+import numpy as np
 from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 
 # Import Ollama service
 from .ollama_service import OllamaService
+from .longform_transcriber import LongFormTranscriber
+from .whisper_registry import WhisperModelRegistry
+from .map_reduce_analyzer import MapReduceAnalyzer, IncrementalMapReduce, estimate_tokens
+from .llm_cache import LLMResponseCache
+from .backend_health import BackendHealthMonitor
+from .llm_scheduler import LLMScheduler, SchedulerTimeoutError
+from .structured_output import PARSE_FAILED, AnalysisParseError, ParseStats, parse_analysis
+from .backend_router import BackendRouter
+from ..utils.audio_utils import encode_wav
+from ..utils.video_utils import extract_audio_pcm
 
 logger = logging.getLogger(__name__)
 
@@ -33,106 +47,363 @@ class AIService:
         # Thread pool for running Whisper in background
         self.executor = ThreadPoolExecutor(max_workers=2)
         
-        # Load Whisper model if using local processing
-        self.whisper_model = None
-        if self.use_local_whisper:
-            logger.info("Loading local Whisper model...")
-            self.whisper_model = whisper.load_model("base")
-            logger.info("Whisper model loaded successfully")
+        # Whisper models are loaded on first use and shared across concurrent jobs
+        self.model_registry = WhisperModelRegistry()
+        
+        # Long recordings are split at silences and transcribed in parallel
+        self.use_longform = os.getenv("LONGFORM_ENABLED", "true").lower() == "true"
+        self.longform_transcriber = LongFormTranscriber(self.model_registry)
+        
+        # Identical prompts with identical decoding options are answered from cache
+        self.llm_cache = LLMResponseCache()
+        
+        # Bound concurrent generations per backend; short transcripts are admitted first
+        self.llm_scheduler = LLMScheduler()
+        self.llm_scheduler.configure("ollama", int(os.getenv("LLM_OLLAMA_SLOTS", "2")))
+        self.llm_scheduler.configure("hf", int(os.getenv("LLM_HF_SLOTS", "4")))
+        
+        # Parse-failure and repair metrics shared by both analysis backends
+        self.parse_stats = ParseStats()
         
         # Initialize Ollama service
-        self.ollama_service = OllamaService()
+        self.ollama_service = OllamaService(
+            llm_cache=self.llm_cache,
+            scheduler=self.llm_scheduler,
+            parse_stats=self.parse_stats
+        )
+        
+        # Backend health is probed in the background; requests only consult breaker state
+        self.health_monitor = BackendHealthMonitor()
+        self.health_monitor.register("ollama", self.ollama_service.test_connection)
+        self.health_monitor.register("hf", self._test_llm_api_connection)
+        
+        # Transcripts longer than one prompt are analyzed in concurrent chunks
+        self.map_reduce_analyzer = MapReduceAnalyzer()
+        
+        # Analyze finished chunks of long transcripts while Whisper is still running
+        self.pipeline_analysis = os.getenv("PIPELINE_ANALYSIS", "true").lower() == "true"
+        
+        # Each request goes to the backend with the lowest expected completion time.
+        # TRANSCRIPTION_BACKENDS=local,remote lets transcription use both.
+        default_transcription = "local" if self.use_local_whisper else "remote"
+        self.transcription_backends = [
+            name.strip() for name in os.getenv("TRANSCRIPTION_BACKENDS", default_transcription).split(",")
+            if name.strip() in ("local", "remote")
+        ] or [default_transcription]
+        self.hedge_transcription = os.getenv("ROUTER_HEDGE_TRANSCRIPTION", "false").lower() == "true"
+        
+        # Priors are seconds per work unit until real latencies are observed
+        self.router = BackendRouter(self.health_monitor)
+        self.router.register(
+            "analysis", "ollama", prior=10.0,
+            slots=self.llm_scheduler.stats()["ollama"]["slots"],
+            queue_depth=lambda: self.llm_scheduler.queue_depth("ollama")
+        )
+        self.router.register(
+            "analysis", "hf", prior=15.0,
+            slots=self.llm_scheduler.stats()["hf"]["slots"],
+            queue_depth=lambda: self.llm_scheduler.queue_depth("hf")
+        )
+        self.router.register("transcription", "local", prior=30.0, slots=2)  # Whisper thread pool size
+        self.router.register("transcription", "remote", prior=40.0, slots=4)
+    
+    def transcription_model_id(self, whisper_model: Optional[str] = None, backend: Optional[str] = None) -> str:
+        """
+        Identifier of the Whisper model used for transcription
+        
+        Args:
+            whisper_model: Whisper model size for local transcription
+            backend: Backend that transcribed ("local" or "remote"); defaults to the preferred one
+        """
+        if (backend or self.transcription_backends[0]) == "local":
+            return f"local:{self.model_registry.resolve(whisper_model)}"
+        return f"remote:{self.whisper_api_url}"
+    
+    def analysis_model_id(self, backends: Optional[Iterable[str]] = None) -> str:
+        """
+        Identifier of the LLM(s) used for analysis
+        
+        Args:
+            backends: Backends that produced the analysis; defaults to Ollama, the preferred one
+        """
+        ids = {
+            f"ollama:{self.ollama_service.model_name}" if backend == "ollama" else f"hf:{self.llm_api_url}"
+            for backend in (backends or ["ollama"])
+        }
+        return "+".join(sorted(ids))
     
-    async def transcribe_audio(self, file_path: str) -> str:
+    async def transcribe_audio(
+        self,
+        file_path: Union[str, np.ndarray],
+        on_segment: Optional[Callable[[Dict[str, Any], float], None]] = None,
+        whisper_model: Optional[str] = None,
+        backends_used: Optional[Set[str]] = None,
+        on_discard: Optional[Callable[[], None]] = None
+    ) -> str:
         """
         Transcribe audio file using Whisper model (local or remote)
         
         Args:
-            file_path: Path to the audio file
+            file_path: Path to the audio file, or 16 kHz mono float32 PCM samples
+            on_segment: Optional callback receiving each transcript segment
+                (start, end, text) and the audio duration in seconds, as
+                windows are decoded. Local transcription calls it from a
+                worker thread; the remote API returns text only and emits
+                no segments.
+            whisper_model: Whisper model size for local transcription
+                (defaults to WHISPER_MODEL)
+            backends_used: Optional set receiving the backend that produced
+                the transcript
+            on_discard: Optional callback invoked on the event loop when a
+                backend that emitted segments fails or loses a hedge; no
+                further segments from it are delivered after this call
             
         Returns:
             str: Transcribed text
         """
         try:
-            logger.info(f"Starting transcription for file: {file_path}")
+            backends = self.transcription_backends
+            
+            # With a choice of backends, decode once so the audio length is known for routing
+            # (the local backend decodes anyway; the remote one receives WAV)
+            if len(backends) > 1 and not isinstance(file_path, np.ndarray):
+                file_path = await extract_audio_pcm(file_path)
             
-            if self.use_local_whisper and self.whisper_model:
-                # Use local Whisper model
-                logger.info("Using local Whisper model for transcription")
+            if isinstance(file_path, np.ndarray):
+                logger.info(f"Starting transcription for in-memory audio: {len(file_path) / 16000:.1f}s")
+                # Work unit: one minute of audio
+                work = max(0.1, len(file_path) / 16000 / 60.0)
+            else:
+                logger.info(f"Starting transcription for file: {file_path}")
+                # Single backend: file size in MB is a close enough work proxy for its own stats
+                work = max(0.1, os.path.getsize(file_path) / (1024 * 1024))
+            
+            async def call(backend: str) -> str:
+                if backend != "local":
+                    return await self._transcribe_remote(file_path)
+                if not on_segment:
+                    return await self._transcribe_local(file_path, None, whisper_model)
                 
-                # Run Whisper in a thread pool to avoid blocking
-                loop = asyncio.get_event_loop()
-                transcript = await loop.run_in_executor(
-                    self.executor,
-                    self._transcribe_with_local_whisper,
-                    file_path
-                )
+                # The Whisper thread cannot be stopped, so an abandoned attempt is muted instead
+                lock = Lock()
+                live = True
                 
-                logger.info(f"Local transcription completed successfully. Length: {len(transcript)} characters")
-                return transcript
-            else:
-                # Use remote Hugging Face API
-                logger.info("Using remote Whisper API for transcription")
+                def forward(segment: Dict[str, Any], duration: float):
+                    with lock:
+                        if live:
+                            on_segment(segment, duration)
                 
-                # Prepare the file for upload
-                with open(file_path, "rb") as audio_file:
-                    files = {"file": ("audio.wav", audio_file, "audio/wav")}
-                    
-                    headers = {}
-                    if self.whisper_api_key:
-                        headers["Authorization"] = f"Bearer {self.whisper_api_key}"
-                    
-                    # Make request to Whisper API
-                    response = await self.client.post(
-                        f"{self.whisper_api_url}/predict",
-                        files=files,
-                        headers=headers
-                    )
-                    
-                    if response.status_code != 200:
-                        raise Exception(f"Whisper API error: {response.status_code} - {response.text}")
-                    
-                    result = response.json()
-                    
-                    # Extract transcript from response
-                    # The exact structure depends on your Hugging Face Space configuration
-                    transcript = result.get("data", [""])[0] if isinstance(result.get("data"), list) else result.get("text", "")
-                    
-                    if not transcript:
-                        raise Exception("No transcript received from Whisper API")
-                    
-                    logger.info(f"Remote transcription completed successfully. Length: {len(transcript)} characters")
-                    return transcript
+                try:
+                    return await self._transcribe_local(file_path, forward, whisper_model)
+                except BaseException:
+                    with lock:
+                        live = False
+                    if on_discard:
+                        on_discard()
+                    raise
+            
+            # Local Whisper threads cannot be cancelled, so transcription is not hedged by default
+            return await self.router.run(
+                "transcription", work, call,
+                candidates=backends,
+                hedge=self.hedge_transcription,
+                on_winner=backends_used.add if backends_used is not None else None
+            )
                 
         except Exception as e:
             logger.error(f"Error in transcription: {str(e)}")
             raise Exception(f"Transcription failed: {str(e)}")
     
-    def _transcribe_with_local_whisper(self, file_path: str) -> str:
+    async def _transcribe_local(
+        self,
+        file_path: Union[str, np.ndarray],
+        on_segment: Optional[Callable[[Dict[str, Any], float], None]] = None,
+        whisper_model: Optional[str] = None
+    ) -> str:
+        """Transcribe with a local Whisper model on the thread pool"""
+        logger.info("Using local Whisper model for transcription")
+        
+        # Run Whisper in a thread pool to avoid blocking
+        loop = asyncio.get_event_loop()
+        transcript = await loop.run_in_executor(
+            self.executor,
+            self._transcribe_with_local_whisper,
+            file_path,
+            on_segment,
+            whisper_model
+        )
+        
+        logger.info(f"Local transcription completed successfully. Length: {len(transcript)} characters")
+        return transcript
+    
+    async def _transcribe_remote(self, file_path: Union[str, np.ndarray]) -> str:
+        """Transcribe with the remote Whisper API"""
+        logger.info("Using remote Whisper API for transcription")
+        
+        # Prepare the file for upload; in-memory PCM is sent as WAV
+        if isinstance(file_path, np.ndarray):
+            audio_file = io.BytesIO(encode_wav(file_path))
+        else:
+            audio_file = open(file_path, "rb")
+        
+        with audio_file:
+            files = {"file": ("audio.wav", audio_file, "audio/wav")}
+            
+            headers = {}
+            if self.whisper_api_key:
+                headers["Authorization"] = f"Bearer {self.whisper_api_key}"
+            
+            # Make request to Whisper API
+            response = await self.client.post(
+                f"{self.whisper_api_url}/predict",
+                files=files,
+                headers=headers
+            )
+            
+            if response.status_code != 200:
+                raise Exception(f"Whisper API error: {response.status_code} - {response.text}")
+            
+            result = response.json()
+            
+            # Extract transcript from response
+            # The exact structure depends on your Hugging Face Space configuration
+            transcript = result.get("data", [""])[0] if isinstance(result.get("data"), list) else result.get("text", "")
+            
+            if not transcript:
+                raise Exception("No transcript received from Whisper API")
+            
+            logger.info(f"Remote transcription completed successfully. Length: {len(transcript)} characters")
+            return transcript
+    
+    def _transcribe_with_local_whisper(
+        self,
+        file_path: Union[str, np.ndarray],
+        on_segment: Optional[Callable[[Dict[str, Any], float], None]] = None,
+        whisper_model: Optional[str] = None
+    ) -> str:
         """
         Transcribe audio using local Whisper model (runs in thread pool)
         
         Args:
-            file_path: Path to the audio file
+            file_path: Path to the audio file, or 16 kHz mono float32 PCM samples
+            on_segment: Optional per-segment callback
+            whisper_model: Whisper model size from the registry
             
         Returns:
             str: Transcribed text
         """
         try:
+            audio = file_path
+            if self.use_longform or on_segment:
+                if not isinstance(audio, np.ndarray):
+                    audio = whisper.load_audio(file_path)
+            
+            duration = len(audio) / 16000 if isinstance(audio, np.ndarray) else 0.0
+            
+            model_name = self.model_registry.resolve(whisper_model)
+            if self.use_longform and self.longform_transcriber.should_use(audio, model_name):
+                segment_callback = (lambda seg: on_segment(seg, duration)) if on_segment else None
+                return self.longform_transcriber.transcribe(audio, model_name, segment_callback)
+            
             # Use Whisper to transcribe the audio
-            result = self.whisper_model.transcribe(file_path)
+            with self.model_registry.acquire(whisper_model) as model:
+                if on_segment:
+                    # Decode window by window so segments stream out while transcription runs
+                    return self.longform_transcriber.transcribe_streaming(
+                        audio, model, lambda seg: on_segment(seg, duration)
+                    )
+                result = model.transcribe(audio)
+            
             return result["text"]
         except Exception as e:
             logger.error(f"Error in local Whisper transcription: {str(e)}")
             raise Exception(f"Local Whisper transcription failed: {str(e)}")
     
-    async def analyze_transcript(self, transcript: str, meeting_title: Optional[str] = None) -> Dict[str, Any]:
+    async def analyze_transcript(
+        self,
+        transcript: str,
+        meeting_title: Optional[str] = None,
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
+        backends_used: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze transcript, splitting it into concurrent map-reduce chunks when
+        it does not fit in a single prompt
+        
+        Args:
+            transcript: The meeting transcript to analyze
+            meeting_title: Optional meeting title for context
+            on_partial: Optional callback receiving analysis fields as they are
+                generated (single-prompt Ollama streaming only)
+            backends_used: Optional set receiving every backend that answered
+                a prompt of this analysis
+            
+        Returns:
+            Dict containing summary, action_items, and key_decisions
+        """
+        chunk_tokens = self._analysis_chunk_tokens()
+        if not self.map_reduce_analyzer.needs_chunking(transcript, chunk_tokens):
+            return await self._analyze_single(transcript, meeting_title, on_partial, backends_used)
+        
+        try:
+            logger.info(f"Transcript exceeds {chunk_tokens} tokens, using map-reduce analysis")
+            return await self.map_reduce_analyzer.analyze(
+                transcript, partial(self._analyze_single, backends_used=backends_used), meeting_title, chunk_tokens
+            )
+        except Exception as e:
+            logger.error(f"Error in map-reduce transcript analysis: {str(e)}")
+            raise Exception(f"Analysis failed: {str(e)}")
+    
+    def start_incremental_analysis(
+        self,
+        meeting_title: Optional[str] = None,
+        backends_used: Optional[Set[str]] = None
+    ) -> Optional[IncrementalMapReduce]:
+        """
+        Start a map step that consumes transcript segments as they are produced
+        
+        Args:
+            meeting_title: Optional meeting title for context
+            backends_used: Optional set receiving every backend that answered a chunk
+            
+        Returns:
+            IncrementalMapReduce: Segment sink, or None if pipelining is disabled
+        """
+        if not self.pipeline_analysis:
+            return None
+        return self.map_reduce_analyzer.start_incremental(
+            partial(self._analyze_single, backends_used=backends_used), meeting_title, self._analysis_chunk_tokens()
+        )
+    
+    def _analysis_chunk_tokens(self) -> int:
+        """
+        Chunk budget for the analysis backend the router would pick now
+        
+        Chunks sized for Ollama's context would overflow the HF space, so the
+        budget follows the best available backend; if none is available the
+        smallest context is used so any backend can take the chunks.
+        """
+        for backend in self.router.rank("analysis", 1.0):
+            if self.health_monitor.is_routable(backend):
+                return self.map_reduce_analyzer.chunk_tokens_for(backend)
+        return min(self.map_reduce_analyzer.chunk_tokens_for(backend) for backend in self.router.backends("analysis"))
+    
+    async def _analyze_single(
+        self,
+        transcript: str,
+        meeting_title: Optional[str] = None,
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
+        backends_used: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
         """
-        Analyze transcript using Ollama LLM (local) or Hugging Face API (fallback)
+        Analyze one prompt-sized transcript using Ollama LLM (local) or Hugging Face API (fallback)
         
         Args:
             transcript: The meeting transcript to analyze
             meeting_title: Optional meeting title for context
+            on_partial: Optional callback receiving analysis fields as they are
+                generated (Ollama streaming only)
+            backends_used: Optional set receiving the backend that answered
             
         Returns:
             Dict containing summary, action_items, and key_decisions
@@ -140,18 +411,61 @@ class AIService:
         try:
             logger.info(f"Starting transcript analysis. Length: {len(transcript)} characters")
             
-            # Try Ollama first (local)
-            try:
-                # Test if Ollama is available
-                if await self.ollama_service.test_connection():
-                    logger.info("Using Ollama for transcript analysis")
-                    return await self.ollama_service.analyze_transcript(transcript, meeting_title)
-                else:
-                    logger.warning("Ollama not available, falling back to Hugging Face API")
-            except Exception as e:
-                logger.warning(f"Ollama analysis failed, falling back to Hugging Face API: {str(e)}")
+            async def call(backend: str) -> Dict[str, Any]:
+                if backend == "ollama":
+                    return await self._analyze_with_ollama(transcript, meeting_title, on_partial)
+                return await self._analyze_with_llm_api(transcript, meeting_title)
+            
+            # Only backends whose context holds the text; failover or hedging to a
+            # smaller one would silently truncate it
+            candidates = [
+                backend for backend in self.router.backends("analysis")
+                if self.map_reduce_analyzer.fits(transcript, backend)
+            ]
+            
+            # Work unit: 1k prompt tokens
+            work = max(0.1, estimate_tokens(transcript) / 1000.0)
+            return await self.router.run(
+                "analysis", work, call,
+                candidates=candidates or None,
+                on_winner=backends_used.add if backends_used is not None else None
+            )
             
-            # Fallback to Hugging Face API
+        except Exception as e:
+            logger.error(f"Error in transcript analysis: {str(e)}")
+            raise Exception(f"Analysis failed: {str(e)}")
+    
+    async def _analyze_with_ollama(
+        self,
+        transcript: str,
+        meeting_title: Optional[str] = None,
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Analyze with Ollama, feeding the outcome into its circuit breaker"""
+        try:
+            logger.info("Using Ollama for transcript analysis")
+            cache_hits = []
+            analysis = await self.ollama_service.analyze_transcript(
+                transcript, meeting_title, on_partial, on_cache_hit=lambda: cache_hits.append(True)
+            )
+            if cache_hits:
+                # Ollama was never called, so the result says nothing about its health
+                self.health_monitor.record_inconclusive("ollama")
+            else:
+                self.health_monitor.record_success("ollama")
+            return analysis
+        except (SchedulerTimeoutError, asyncio.CancelledError):
+            # Ollama is busy (or the call was abandoned), not broken: release the
+            # breaker trial without counting a failure
+            self.health_monitor.record_inconclusive("ollama")
+            raise
+        except Exception:
+            self.health_monitor.record_failure("ollama")
+            raise
+    
+    async def _analyze_with_llm_api(self, transcript: str, meeting_title: Optional[str] = None) -> Dict[str, Any]:
+        """Analyze with the Hugging Face LLM API, feeding the outcome into its circuit breaker"""
+        try:
             logger.info("Using Hugging Face API for transcript analysis")
             
             # Construct the prompt for the LLM
@@ -163,24 +477,50 @@ class AIService:
                     prompt,  # The prompt text
                     "json",  # Expected output format
                     0.7,     # Temperature for creativity
-                    512,     # Max tokens
+                    self.map_reduce_analyzer.max_output_tokens_for("hf"),  # Max tokens (reserved in the chunk budget)
                 ]
             }
             
+            cache_key = self.llm_cache.make_key("hf", self.llm_api_url, prompt, {
+                "format": payload["data"][1],
+                "temperature": payload["data"][2],
+                "max_tokens": payload["data"][3]
+            })
+            cached_text = await self.llm_cache.get(cache_key)
+            if cached_text is not None:
+                # The API was never called: hand back a half-open trial without an outcome
+                self.health_monitor.record_inconclusive("hf")
+                logger.info("Transcript analysis served from LLM response cache")
+                return self._parse_analysis_response(cached_text)
+            
             headers = {"Content-Type": "application/json"}
             if self.llm_api_key:
                 headers["Authorization"] = f"Bearer {self.llm_api_key}"
             
-            # Make request to LLM API
-            response = await self.client.post(
-                f"{self.llm_api_url}/predict",
-                json=payload,
-                headers=headers
-            )
+            # Make request to LLM API once a slot is free
+            try:
+                async with self.llm_scheduler.slot("hf", estimate_tokens(prompt)):
+                    response = await self.client.post(
+                        f"{self.llm_api_url}/predict",
+                        json=payload,
+                        headers=headers
+                    )
+            except (SchedulerTimeoutError, asyncio.CancelledError):
+                self.health_monitor.record_inconclusive("hf")
+                raise
+            except Exception:
+                self.health_monitor.record_failure("hf")
+                raise
             
             if response.status_code != 200:
+                if response.status_code >= 500:
+                    self.health_monitor.record_failure("hf")
+                else:
+                    self.health_monitor.record_success("hf")
                 raise Exception(f"LLM API error: {response.status_code} - {response.text}")
             
+            self.health_monitor.record_success("hf")
+            
             result = response.json()
             
             # Extract the analysis from response
@@ -190,15 +530,43 @@ class AIService:
             if not analysis_text:
                 raise Exception("No analysis received from LLM API")
             
-            # Parse the JSON response from the LLM
-            analysis = self._parse_analysis_response(analysis_text)
+            # Parse the JSON response from the LLM (with local repair); only usable analyses are cached
+            try:
+                analysis, repaired = parse_analysis(analysis_text)
+                self.parse_stats.record_text("local_repair" if repaired else "valid", analysis_text)
+                await self.llm_cache.put(cache_key, json.dumps(analysis))
+            except AnalysisParseError:
+                self.parse_stats.record_text("unrecoverable", analysis_text)
+                analysis = self._parse_analysis_response(analysis_text)
             
             logger.info("Transcript analysis completed successfully")
             return analysis
             
+        except SchedulerTimeoutError:
+            raise
         except Exception as e:
-            logger.error(f"Error in transcript analysis: {str(e)}")
-            raise Exception(f"Analysis failed: {str(e)}")
+            logger.error(f"Error in Hugging Face transcript analysis: {str(e)}")
+            raise Exception(f"Hugging Face analysis failed: {str(e)}")
+    
+    def prewarm_llm(self):
+        """
+        Load the Ollama model in the background so the next analysis skips the load
+        
+        Called when a job starts, so loading overlaps with transcription.
+        """
+        if self.health_monitor.breakers["ollama"].state == "closed":
+            asyncio.create_task(self.ollama_service.warm_up())
+    
+    async def _test_llm_api_connection(self) -> bool:
+        """
+        Test connection to the Hugging Face LLM API
+        
+        Returns:
+            bool: True if the API answers without a server error
+        """
+        headers = {"Authorization": f"Bearer {self.llm_api_key}"} if self.llm_api_key else {}
+        response = await self.client.get(self.llm_api_url, headers=headers)
+        return response.status_code < 500
     
     def _build_analysis_prompt(self, transcript: str, meeting_title: Optional[str] = None) -> str:
         """
@@ -230,50 +598,37 @@ Return only the JSON object, no additional text:"""
         Parse the LLM response and extract structured data
         """
         try:
-            # Clean the response text
-            cleaned_text = response_text.strip()
-            
-            # Try to find JSON in the response
-            if cleaned_text.startswith("{"):
-                json_str = cleaned_text
-            else:
-                # Look for JSON between backticks or other markers
-                import re
-                json_match = re.search(r'\{.*\}', cleaned_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    raise Exception("No valid JSON found in response")
+            return self._extract_analysis_json(response_text)
             
-            # Parse the JSON
-            analysis = json.loads(json_str)
-            
-            # Validate required fields
-            required_fields = ["summary", "action_items", "key_decisions"]
-            for field in required_fields:
-                if field not in analysis:
-                    analysis[field] = [] if field in ["action_items", "key_decisions"] else ""
-            
-            return analysis
-            
-        except json.JSONDecodeError as e:
+        except AnalysisParseError as e:
             logger.error(f"Failed to parse JSON response: {str(e)}")
             # Fallback: return basic structure
             return {
                 "summary": "Analysis could not be parsed properly.",
                 "action_items": [],
-                "key_decisions": []
+                "key_decisions": [],
+                PARSE_FAILED: True
             }
         except Exception as e:
             logger.error(f"Error parsing analysis response: {str(e)}")
             return {
                 "summary": "Analysis failed to process properly.",
                 "action_items": [],
-                "key_decisions": []
+                "key_decisions": [],
+                PARSE_FAILED: True
             }
     
+    def _extract_analysis_json(self, response_text: str) -> Dict[str, Any]:
+        """
+        Extract the analysis JSON object from the LLM response, raising if there is none
+        """
+        return parse_analysis(response_text)[0]
+    
     async def close(self):
-        """Close the HTTP client, thread pool, and Ollama service"""
+        """Stop health probing and close the HTTP client, thread and process pools, Ollama service and LLM cache"""
+        await self.health_monitor.stop()
         await self.client.aclose()
         self.executor.shutdown(wait=True)
-        await self.ollama_service.close() 
\ No newline at end of file
+        self.longform_transcriber.close()
+        await self.ollama_service.close()
+        self.llm_cache.close() 
\ No newline at end of file
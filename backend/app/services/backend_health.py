@@ -0,0 +1,264 @@
+import os
+import time
+import asyncio
+import logging
+from threading import Lock
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+ProbeFn = Callable[[], Awaitable[bool]]
+
+class CircuitBreaker:
+    """
+    Closed -> open after consecutive failures; open -> half-open after a cool-down,
+    when a single trial call decides whether to close again or re-open
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = Lock()
+        
+        # Metrics
+        self.times_opened = 0
+        self.last_state_change = time.time()
+    
+    def _transition(self, state: str):
+        if state != self.state:
+            self.state = state
+            self.last_state_change = time.time()
+    
+    def is_routable(self) -> bool:
+        """
+        Check whether a call could go to the backend right now, without taking the half-open trial
+        
+        Returns:
+            bool: True when closed, half-open with the trial free, or open past its cool-down
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= self.reset_timeout
+            return not self._trial_in_flight
+    
+    def try_acquire_trial(self) -> bool:
+        """
+        Claim the right to send a call to the backend
+        
+        Returns:
+            bool: True when closed, or when this caller gets the half-open trial
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._transition(self.HALF_OPEN)
+                self._trial_in_flight = False
+            
+            # Half-open: let exactly one trial through at a time
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+    
+    def probe_due(self) -> bool:
+        """Whether a health probe may run now (not open, or open past its cool-down); takes no trial"""
+        with self._lock:
+            return self.state != self.OPEN or time.monotonic() - self.opened_at >= self.reset_timeout
+    
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+            self._transition(self.CLOSED)
+    
+    def release_trial(self):
+        """Give up a half-open trial without an outcome (e.g. the call never reached the backend)"""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+                self._transition(self.OPEN)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "last_state_change": self.last_state_change,
+            }
+
+class BackendHealthMonitor:
+    """Keeps per-backend health current in the background so requests never probe inline"""
+    
+    def __init__(self):
+        # Health check configuration
+        self.interval = float(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+        self.probe_timeout = float(os.getenv("HEALTH_CHECK_TIMEOUT", "3"))
+        self.failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+        self.reset_timeout = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+        
+        self._probes: Dict[str, ProbeFn] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._last_probe: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        
+        # Failover metrics: time spent on a primary backend before falling back
+        self.failovers = 0
+        self.total_failover_time = 0.0
+        self.last_failover_time: Optional[float] = None
+    
+    def register(self, name: str, probe: ProbeFn):
+        """
+        Add a backend to monitor
+        
+        Args:
+            name: Backend name (e.g. "ollama", "hf")
+            probe: Coroutine returning True if the backend is reachable
+        """
+        self._probes[name] = probe
+        self.breakers[name] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+    
+    def is_routable(self, name: str) -> bool:
+        """
+        Check whether a backend could take a request, without side effects
+        
+        For planning (e.g. sizing work for the likely backend); a call that is
+        actually sent must go through try_acquire.
+        
+        Args:
+            name: Backend name
+        
+        Returns:
+            bool: True if the breaker would currently let a request through
+        """
+        breaker = self.breakers.get(name)
+        return breaker is None or breaker.is_routable()
+    
+    def try_acquire(self, name: str) -> bool:
+        """
+        Claim a backend for one request (no network I/O)
+        
+        Takes the half-open trial when the breaker is recovering, so the caller
+        must record an outcome (success, failure or inconclusive).
+        
+        Args:
+            name: Backend name
+        
+        Returns:
+            bool: True if the breaker lets the request through
+        """
+        breaker = self.breakers.get(name)
+        return breaker is None or breaker.try_acquire_trial()
+    
+    def record_success(self, name: str):
+        if name in self.breakers:
+            self.breakers[name].record_success()
+    
+    def record_failure(self, name: str):
+        if name in self.breakers:
+            self.breakers[name].record_failure()
+    
+    def record_inconclusive(self, name: str):
+        if name in self.breakers:
+            self.breakers[name].release_trial()
+    
+    def record_failover(self, seconds: float):
+        """
+        Record how long a request spent before switching to the fallback backend
+        
+        Args:
+            seconds: Time from request start to the fallback attempt
+        """
+        self.failovers += 1
+        self.total_failover_time += seconds
+        self.last_failover_time = seconds
+    
+    async def check(self, name: str):
+        """Probe one backend and feed the result into its breaker"""
+        breaker = self.breakers[name]
+        
+        # An open breaker is only probed once its cool-down has passed. The probe never
+        # competes for the half-open request trial, so a stuck trial cannot stop probing.
+        if not breaker.probe_due():
+            return
+        
+        started = time.perf_counter()
+        try:
+            healthy = await asyncio.wait_for(self._probes[name](), timeout=self.probe_timeout)
+        except Exception as e:
+            logger.warning(f"Health probe for {name} failed: {str(e)}")
+            healthy = False
+        
+        self._last_probe[name] = {
+            "healthy": healthy,
+            "latency_ms": round(1000.0 * (time.perf_counter() - started), 1),
+            "checked_at": time.time(),
+        }
+        
+        previous = breaker.state
+        if healthy:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        if breaker.state != previous:
+            logger.info(f"Circuit breaker for {name}: {previous} -> {breaker.state}")
+    
+    async def _run(self):
+        while True:
+            await asyncio.gather(*(self.check(name) for name in self._probes))
+            await asyncio.sleep(self.interval)
+    
+    def start(self):
+        """Start background probing (requires a running event loop)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop background probing"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get breaker state, last probe result and failover timings
+        
+        Returns:
+            Dict: Per-backend health and failover metrics
+        """
+        return {
+            "backends": {
+                name: {**breaker.stats(), "last_probe": self._last_probe.get(name)}
+                for name, breaker in self.breakers.items()
+            },
+            "failovers": self.failovers,
+            "avg_failover_ms": 1000.0 * self.total_failover_time / self.failovers if self.failovers else 0.0,
+            "last_failover_ms": 1000.0 * self.last_failover_time if self.last_failover_time is not None else None,
+        }
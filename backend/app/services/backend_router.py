@@ -0,0 +1,281 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable, Awaitable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class BackendLatencyStats:
+    """Sliding window of per-unit latencies and outcomes for one backend"""
+    
+    def __init__(self, window: int, prior: float):
+        self.prior = prior
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.in_flight = 0
+        self.calls = 0
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency per unit of work at percentile q (0-100), or None without samples"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+    
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+class BackendRouter:
+    """
+    Routes each request to the backend with the lowest expected completion time
+    
+    Latency is tracked per unit of work (e.g. per 1k prompt tokens, per audio
+    minute) so requests of different sizes are comparable. The expected time
+    of a backend is its median per-unit latency times the request's work,
+    scaled up by its queue (waiting + in-flight calls per slot) and by its
+    recent error rate. Until a backend has ROUTER_MIN_SAMPLES samples, the
+    prior given at registration stands in for the median.
+    
+    If the chosen backend has not answered by its tail-latency threshold
+    (ROUTER_HEDGE_PERCENTILE of its own history, at least ROUTER_HEDGE_MIN_DELAY
+    seconds), the next-best backend is started as a hedge and the first
+    success wins. A failure moves on to the next backend immediately.
+    """
+    
+    def __init__(self, health_monitor=None):
+        # Routing configuration
+        self.window = int(os.getenv("ROUTER_WINDOW", "200"))
+        self.min_samples = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+        self.hedge_enabled = os.getenv("ROUTER_HEDGE_ENABLED", "true").lower() == "true"
+        self.hedge_percentile = float(os.getenv("ROUTER_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_delay = float(os.getenv("ROUTER_HEDGE_MIN_DELAY", "2.0"))
+        
+        # Circuit breakers are consulted right before a backend is tried
+        self.health_monitor = health_monitor
+        
+        self._backends: Dict[str, Dict[str, BackendLatencyStats]] = {}
+        self._queue_depth: Dict[str, Callable[[], int]] = {}
+        self._slots: Dict[str, int] = {}
+        
+        # Metrics
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+    
+    def register(
+        self,
+        kind: str,
+        name: str,
+        prior: float,
+        slots: int = 1,
+        queue_depth: Optional[Callable[[], int]] = None
+    ):
+        """
+        Add a backend for a kind of request
+        
+        Args:
+            kind: Request kind (e.g. "transcription", "analysis")
+            name: Backend name; breaker lookups use the same name
+            prior: Assumed seconds per unit of work before enough samples exist
+            slots: Calls the backend serves concurrently
+            queue_depth: Optional callable returning calls waiting outside the router
+        """
+        self._backends.setdefault(kind, {})[name] = BackendLatencyStats(self.window, prior)
+        self._slots[name] = max(1, slots)
+        if queue_depth:
+            self._queue_depth[name] = queue_depth
+    
+    def backends(self, kind: str) -> List[str]:
+        """Names registered for a kind, in registration order"""
+        return list(self._backends.get(kind, {}))
+    
+    def expected_time(self, kind: str, name: str, work: float) -> float:
+        """
+        Estimate seconds until a request of the given work completes on a backend
+        
+        Args:
+            kind: Request kind
+            name: Backend name
+            work: Request size in the kind's work units
+        
+        Returns:
+            float: Expected completion time in seconds
+        """
+        stats = self._backends[kind][name]
+        median = stats.percentile(50) if len(stats.latencies) >= self.min_samples else None
+        per_unit = median if median is not None else stats.prior
+        
+        queued = stats.in_flight + (self._queue_depth[name]() if name in self._queue_depth else 0)
+        queue_factor = 1.0 + queued / self._slots[name]
+        
+        return per_unit * work * queue_factor / max(0.05, 1.0 - stats.error_rate)
+    
+    def rank(self, kind: str, work: float, candidates: Optional[List[str]] = None) -> List[str]:
+        """Order candidate backends by expected completion time, open breakers last"""
+        names = candidates if candidates is not None else self.backends(kind)
+        
+        def key(name: str):
+            breaker_open = False
+            if self.health_monitor and name in self.health_monitor.breakers:
+                breaker_open = self.health_monitor.breakers[name].state == "open"
+            return (breaker_open, self.expected_time(kind, name, work))
+        
+        return sorted(names, key=key)
+    
+    def _hedge_delay(self, kind: str, name: str, work: float) -> Optional[float]:
+        stats = self._backends[kind][name]
+        if len(stats.latencies) < self.min_samples:
+            return None
+        return max(self.hedge_min_delay, stats.percentile(self.hedge_percentile) * work)
+    
+    async def _timed(self, kind: str, name: str, work: float, call: Callable[[str], Awaitable[T]]) -> T:
+        stats = self._backends[kind][name]
+        stats.in_flight += 1
+        stats.calls += 1
+        started = time.perf_counter()
+        try:
+            result = await call(name)
+        except asyncio.CancelledError:
+            # A hedge that lost says nothing about the backend, but must hand back
+            # a half-open breaker trial it may hold
+            if self.health_monitor:
+                self.health_monitor.record_inconclusive(name)
+            raise
+        except Exception:
+            stats.outcomes.append(False)
+            raise
+        finally:
+            stats.in_flight -= 1
+        
+        stats.outcomes.append(True)
+        stats.latencies.append((time.perf_counter() - started) / max(work, 1e-6))
+        return result
+    
+    async def run(
+        self,
+        kind: str,
+        work: float,
+        call: Callable[[str], Awaitable[T]],
+        candidates: Optional[List[str]] = None,
+        hedge: bool = True,
+        on_winner: Optional[Callable[[str], None]] = None
+    ) -> T:
+        """
+        Run a request on the best backend, with failover and optional hedging
+        
+        Args:
+            kind: Request kind
+            work: Request size in the kind's work units
+            call: Coroutine function taking a backend name
+            candidates: Backends to consider (defaults to all registered for the kind)
+            hedge: Whether a slow request may be hedged on the next-best backend
+            on_winner: Called with the name of the backend whose result is returned
+        
+        Returns:
+            The first successful result
+        
+        Raises:
+            Exception: If every candidate failed or was unavailable
+        """
+        order = self.rank(kind, work, candidates)
+        started = time.perf_counter()
+        pending: Dict[asyncio.Task, str] = {}
+        errors: List[str] = []
+        next_index = 0
+        hedged = False
+        hedge_task: Optional[asyncio.Task] = None
+        
+        def launch() -> Optional[asyncio.Task]:
+            nonlocal next_index
+            while next_index < len(order):
+                name = order[next_index]
+                next_index += 1
+                if self.health_monitor and not self.health_monitor.try_acquire(name):
+                    errors.append(f"{name}: circuit breaker open")
+                    continue
+                task = asyncio.ensure_future(self._timed(kind, name, work, call))
+                pending[task] = name
+                return task
+            return None
+        
+        if launch() is None:
+            raise Exception(f"No {kind} backend available ({'; '.join(errors)})")
+        
+        try:
+            while pending:
+                timeout = None
+                if hedge and self.hedge_enabled and not hedged and len(pending) == 1 and next_index < len(order):
+                    primary = next(iter(pending.values()))
+                    elapsed = time.perf_counter() - started
+                    delay = self._hedge_delay(kind, primary, work)
+                    timeout = max(0.0, delay - elapsed) if delay is not None else None
+                
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    hedged = True
+                    hedge_task = launch()
+                    if hedge_task is not None:
+                        self.hedges += 1
+                        logger.info(f"{kind} on {next(iter(pending.values()))} passed its tail latency; hedging on {pending[hedge_task]}")
+                    continue
+                
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            self.hedge_wins += 1
+                        if on_winner:
+                            on_winner(name)
+                        return task.result()
+                    errors.append(f"{name}: {str(task.exception())}")
+                    logger.warning(f"{kind} failed on {name}: {str(task.exception())}")
+                
+                # Every attempt so far failed: move on to the next backend
+                if not pending:
+                    self.failovers += 1
+                    if self.health_monitor:
+                        self.health_monitor.record_failover(time.perf_counter() - started)
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        raise Exception(f"All {kind} backends failed ({'; '.join(errors)})")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get per-backend latency percentiles, error rates and queue depth
+        
+        Returns:
+            Dict: Per-kind backend metrics plus hedging and failover counters
+        """
+        result: Dict[str, Any] = {}
+        for kind, backends in self._backends.items():
+            result[kind] = {
+                name: {
+                    "calls": stats.calls,
+                    "in_flight": stats.in_flight,
+                    "queue_depth": self._queue_depth[name]() if name in self._queue_depth else 0,
+                    "error_rate": round(stats.error_rate, 3),
+                    "p50_s_per_unit": stats.percentile(50),
+                    "p95_s_per_unit": stats.percentile(95),
+                    "p99_s_per_unit": stats.percentile(99),
+                    "prior_s_per_unit": stats.prior,
+                }
+                for name, stats in backends.items()
+            }
+        result["hedges"] = self.hedges
+        result["hedge_wins"] = self.hedge_wins
+        result["failovers"] = self.failovers
+        return result
@@ -1,26 +1,204 @@
 import os
+import time
+import base64
+import bisect
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from typing import List, Dict, Any, Optional
 from supabase import create_client, Client
 import logging
 from datetime import datetime
 
+from .sqlite_store import SQLiteMeetingStore
+from .search_index import SearchIndex, FIELDS as SEARCH_FIELDS
+
 logger = logging.getLogger(__name__)
 
+# Columns returned by meeting listings; transcripts and full results stay behind get_meeting
+SUMMARY_COLUMNS = ("id", "title", "filename", "status", "summary", "error_message", "created_at", "updated_at")
+
 class DatabaseService:
-    """Service for handling database operations with Supabase"""
+    """Service for handling database operations with Supabase, or a local SQLite/in-memory store"""
     
     def __init__(self):
         # Supabase configuration
         supabase_url = os.getenv("SUPABASE_URL")
         supabase_key = os.getenv("SUPABASE_ANON_KEY")
         
+        # Local storage used without Supabase credentials: "sqlite" or "memory"
+        local_backend = os.getenv("DB_LOCAL_BACKEND", "sqlite").lower()
+        
+        self.sqlite: Optional[SQLiteMeetingStore] = None
         if not supabase_url or not supabase_key:
-            logger.warning("Supabase credentials not found. Using in-memory storage.")
             self.supabase = None
-            self._in_memory_storage = {}
+            if local_backend == "sqlite":
+                logger.warning("Supabase credentials not found. Using local SQLite storage.")
+                self.sqlite = SQLiteMeetingStore()
+                self._in_memory_storage = None
+            else:
+                logger.warning("Supabase credentials not found. Using in-memory storage.")
+                self._in_memory_storage = {}
         else:
             self.supabase: Client = create_client(supabase_url, supabase_key)
             self._in_memory_storage = None
+        
+        # Listing support: (created_at, id) keys kept sorted for the in-memory store,
+        # and a meeting count maintained on create/delete instead of counted per request
+        self._created_index: List[tuple] = []
+        if self.supabase:
+            self._total_meetings: Optional[int] = None
+        elif self.sqlite:
+            self._total_meetings = self.sqlite.count()
+        else:
+            self._total_meetings = 0
+        
+        # The supabase client is synchronous: queries run on a dedicated I/O pool so
+        # they never block the event loop. Its HTTP session (and connections) is
+        # shared by all pool threads.
+        self.pool_size = int(os.getenv("DB_POOL_SIZE", "8"))
+        self.executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="db-io")
+        
+        # Full-text index over titles and results, updated as meetings are written
+        self.search_index = SearchIndex()
+        
+        # Per-operation query latencies (seconds), most recent DB_METRICS_WINDOW each
+        self._metrics_window = int(os.getenv("DB_METRICS_WINDOW", "500"))
+        self._latencies: Dict[str, deque] = {}
+        self._query_counts: Dict[str, int] = {}
+        self._query_errors: Dict[str, int] = {}
+        self._metrics_lock = Lock()
+    
+    async def _execute(self, operation: str, query) -> Any:
+        """
+        Run a supabase query builder's execute() on the I/O pool and time it
+        
+        Args:
+            operation: Metric name for the query (e.g. "get_meeting")
+            query: Query builder to execute
+            
+        Returns:
+            The supabase response
+        """
+        return await self._run(operation, query.execute)
+    
+    async def _run(self, operation: str, func, *args) -> Any:
+        """
+        Run a blocking storage call on the I/O pool and record its latency
+        
+        Args:
+            operation: Metric name for the query
+            func: Blocking callable
+            *args: Arguments for func
+            
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._metrics_lock:
+                self._latencies.setdefault(operation, deque(maxlen=self._metrics_window)).append(elapsed)
+                self._query_counts[operation] = self._query_counts.get(operation, 0) + 1
+                if failed:
+                    self._query_errors[operation] = self._query_errors.get(operation, 0) + 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get per-operation query latency metrics
+        
+        Returns:
+            Dict: Backend, pool size and count/error/avg/p95/max latency per operation
+        """
+        with self._metrics_lock:
+            operations = {}
+            for operation, samples in self._latencies.items():
+                ordered = sorted(samples)
+                operations[operation] = {
+                    "count": self._query_counts[operation],
+                    "errors": self._query_errors.get(operation, 0),
+                    "avg_ms": round(1000.0 * sum(ordered) / len(ordered), 2),
+                    "p95_ms": round(1000.0 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2),
+                    "max_ms": round(1000.0 * ordered[-1], 2),
+                }
+        result = {
+            "backend": "supabase" if self.supabase else "sqlite" if self.sqlite else "memory",
+            "pool_size": self.pool_size,
+            "operations": operations,
+        }
+        if self.sqlite:
+            result["sqlite"] = self.sqlite.stats()
+        result["search_index"] = self.search_index.stats()
+        return result
+    
+    def close(self):
+        """Shut down the I/O pool and close the local store and search index"""
+        self.executor.shutdown(wait=True)
+        if self.sqlite:
+            self.sqlite.close()
+        self.search_index.close()
+    
+    async def _index_meeting(self, meeting_id: str, fields: Dict[str, Any]):
+        # The index is derived data: a failure is logged, never fails the write itself
+        try:
+            await self._run("index_meeting", self.search_index.index_meeting, meeting_id, fields)
+        except Exception as e:
+            logger.warning(f"Failed to update search index for meeting {meeting_id}: {str(e)}")
+    
+    async def search_meetings(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Full-text search over meeting titles, summaries, action items, decisions and transcripts
+        
+        Args:
+            query: Search text; every word must match
+            limit: Maximum hits to return
+            
+        Returns:
+            List: Ranked hits with meeting_id, title, score and highlighted snippet
+        """
+        return await self._run("search_meetings", self.search_index.search, query, limit)
+    
+    @staticmethod
+    def encode_cursor(created_at: str, meeting_id: str) -> str:
+        """Build the opaque keyset cursor pointing after a listed meeting"""
+        return base64.urlsafe_b64encode(f"{created_at}|{meeting_id}".encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        """
+        Split a keyset cursor into its (created_at, id) key
+        
+        Raises:
+            ValueError: If the cursor was not produced by encode_cursor
+        """
+        try:
+            created_at, meeting_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        except Exception:
+            raise ValueError("Invalid meetings cursor")
+        return created_at, meeting_id
+    
+    async def count_meetings(self) -> int:
+        """
+        Get the total number of meetings
+        
+        Supabase is counted once; afterwards the count is kept up to date by
+        create_meeting and delete_meeting.
+        
+        Returns:
+            int: Number of stored meetings
+        """
+        if self._total_meetings is None:
+            response = await self._execute("count_meetings", self.supabase.table("meetings").select("id", count="exact").limit(1))
+            self._total_meetings = response.count or 0
+        return self._total_meetings
     
     async def create_meeting(self, meeting_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -35,13 +213,26 @@ class DatabaseService:
         try:
             if self.supabase:
                 # Insert into Supabase
-                response = self.supabase.table("meetings").insert(meeting_data).execute()
-                return response.data[0] if response.data else meeting_data
+                response = await self._execute("create_meeting", self.supabase.table("meetings").insert(meeting_data))
+                if self._total_meetings is not None:
+                    self._total_meetings += 1
+                record = response.data[0] if response.data else meeting_data
+            elif self.sqlite:
+                # Insert into the local store
+                await self._run("create_meeting", self.sqlite.insert, meeting_data)
+                self._total_meetings += 1
+                record = meeting_data
             else:
                 # Store in memory
                 meeting_id = meeting_data["id"]
+                if meeting_id not in self._in_memory_storage:
+                    bisect.insort(self._created_index, (meeting_data.get("created_at", ""), meeting_id))
+                    self._total_meetings += 1
                 self._in_memory_storage[meeting_id] = meeting_data
-                return meeting_data
+                record = meeting_data
+            
+            await self._index_meeting(meeting_data["id"], {"title": meeting_data.get("title")})
+            return record
                 
         except Exception as e:
             logger.error(f"Error creating meeting: {str(e)}")
@@ -60,8 +251,11 @@ class DatabaseService:
         try:
             if self.supabase:
                 # Query Supabase
-                response = self.supabase.table("meetings").select("*").eq("id", meeting_id).execute()
+                response = await self._execute("get_meeting", self.supabase.table("meetings").select("*").eq("id", meeting_id))
                 return response.data[0] if response.data else None
+            elif self.sqlite:
+                # Query the local store
+                return await self._run("get_meeting", self.sqlite.get, meeting_id)
             else:
                 # Get from memory
                 return self._in_memory_storage.get(meeting_id)
@@ -93,8 +287,11 @@ class DatabaseService:
             
             if self.supabase:
                 # Update in Supabase
-                response = self.supabase.table("meetings").update(update_data).eq("id", meeting_id).execute()
+                response = await self._execute("update_meeting_status", self.supabase.table("meetings").update(update_data).eq("id", meeting_id))
                 return len(response.data) > 0
+            elif self.sqlite:
+                # Update in the local store
+                return await self._run("update_meeting_status", self.sqlite.update, meeting_id, update_data)
             else:
                 # Update in memory
                 if meeting_id in self._in_memory_storage:
@@ -129,44 +326,153 @@ class DatabaseService:
             
             if self.supabase:
                 # Update in Supabase
-                response = self.supabase.table("meetings").update(update_data).eq("id", meeting_id).execute()
-                return len(response.data) > 0
+                response = await self._execute("update_meeting_results", self.supabase.table("meetings").update(update_data).eq("id", meeting_id))
+                updated = len(response.data) > 0
+            elif self.sqlite:
+                # Update in the local store
+                updated = await self._run("update_meeting_results", self.sqlite.update, meeting_id, update_data)
             else:
                 # Update in memory
-                if meeting_id in self._in_memory_storage:
+                updated = meeting_id in self._in_memory_storage
+                if updated:
                     self._in_memory_storage[meeting_id].update(update_data)
-                    return True
-                return False
+            
+            # Index the new results incrementally, leaving the indexed title as is
+            if updated:
+                await self._index_meeting(meeting_id, update_data)
+            return updated
                 
         except Exception as e:
             logger.error(f"Error updating meeting results: {str(e)}")
             return False
     
-    async def get_meetings(self, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+    async def get_meetings(self, limit: int = 10, offset: int = 0, cursor: Optional[str] = None) -> Dict[str, Any]:
         """
-        Get list of meetings with pagination
+        Get a page of meeting summaries, newest first
+        
+        Only SUMMARY_COLUMNS are returned. Pages are addressed by a keyset
+        cursor on (created_at, id); offset is still honoured when no cursor
+        is given.
         
         Args:
             limit: Number of meetings to return
-            offset: Number of meetings to skip
+            offset: Number of meetings to skip (ignored when cursor is set)
+            cursor: next_cursor from the previous page
             
         Returns:
-            List: List of meeting records
+            Dict: meetings, total meeting count and next_cursor (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
+        after = self.decode_cursor(cursor) if cursor else None
+        
         try:
-            if self.supabase:
-                # Query Supabase with pagination
-                response = self.supabase.table("meetings").select("*").order("created_at", desc=True).range(offset, offset + limit - 1).execute()
-                return response.data
-            else:
-                # Get from memory with pagination
-                meetings = list(self._in_memory_storage.values())
-                meetings.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-                return meetings[offset:offset + limit]
+            # Fetch one extra row to learn whether another page follows
+            rows = await self._fetch_page("get_meetings", SUMMARY_COLUMNS, limit + 1, offset, after)
+            
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = self.encode_cursor(rows[-1].get("created_at") or "", rows[-1]["id"])
+            
+            return {
+                "meetings": rows,
+                "total": await self.count_meetings(),
+                "next_cursor": next_cursor
+            }
                 
         except Exception as e:
             logger.error(f"Error retrieving meetings: {str(e)}")
-            return []
+            return {"meetings": [], "total": 0, "next_cursor": None}
+    
+    async def _fetch_page(
+        self,
+        operation: str,
+        columns,
+        limit: int,
+        offset: int = 0,
+        after: Optional[tuple] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch up to `limit` rows newest first, after a (created_at, id) key or from an offset
+        
+        Args:
+            operation: Metric name for the query
+            columns: Columns to return
+            limit: Rows to fetch
+            offset: Rows to skip (ignored when after is set)
+            after: Keyset position to continue from
+            
+        Returns:
+            List: Meeting rows with the requested columns
+        """
+        if self.supabase:
+            query = self.supabase.table("meetings").select(",".join(columns))
+            if after:
+                created_at, meeting_id = after
+                query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{meeting_id})')
+            query = query.order("created_at", desc=True).order("id", desc=True)
+            if after:
+                query = query.limit(limit)
+            else:
+                query = query.range(offset, offset + limit - 1)
+            response = await self._execute(operation, query)
+            return response.data
+        elif self.sqlite:
+            # Keyset/offset scan of idx_meetings_created_at
+            return await self._run(operation, self.sqlite.page, columns, limit, offset, after)
+        else:
+            # Walk the sorted index backwards from the cursor (or offset)
+            if after:
+                end = bisect.bisect_left(self._created_index, after)
+            else:
+                end = max(0, len(self._created_index) - offset)
+            keys = self._created_index[max(0, end - limit):end][::-1]
+            return [
+                {column: self._in_memory_storage[meeting_id].get(column) for column in columns}
+                for _, meeting_id in keys
+            ]
+    
+    async def backfill_search_index(self, rebuild: bool = False) -> int:
+        """
+        Index stored meetings that the search index does not know about
+        
+        Covers meetings created before the index existed (or while it was
+        disabled). With rebuild, the index is cleared and rebuilt from the
+        meetings store.
+        
+        Args:
+            rebuild: Re-index every meeting instead of only missing ones
+            
+        Returns:
+            int: Number of meetings indexed
+        """
+        if not self.search_index.enabled:
+            return 0
+        if rebuild:
+            await self._run("clear_search_index", self.search_index.clear)
+        
+        page_size = int(os.getenv("SEARCH_BACKFILL_PAGE_SIZE", "200"))
+        columns = ("id", "created_at") + SEARCH_FIELDS
+        indexed = 0
+        after = None
+        while True:
+            rows = await self._fetch_page("backfill_search_index", columns, page_size, 0, after)
+            if not rows:
+                break
+            missing = await self._run("search_index_missing", self.search_index.missing, [row["id"] for row in rows])
+            for row in rows:
+                if row["id"] in missing:
+                    await self._index_meeting(row["id"], {field: row.get(field) for field in SEARCH_FIELDS})
+                    indexed += 1
+            if len(rows) < page_size:
+                break
+            after = (rows[-1].get("created_at") or "", rows[-1]["id"])
+        
+        if indexed:
+            logger.info(f"Search index backfill indexed {indexed} meetings")
+        return indexed
     
     async def delete_meeting(self, meeting_id: str) -> bool:
         """
@@ -181,14 +487,29 @@ class DatabaseService:
         try:
             if self.supabase:
                 # Delete from Supabase
-                response = self.supabase.table("meetings").delete().eq("id", meeting_id).execute()
-                return len(response.data) > 0
+                response = await self._execute("delete_meeting", self.supabase.table("meetings").delete().eq("id", meeting_id))
+                if response.data and self._total_meetings is not None:
+                    self._total_meetings -= len(response.data)
+                deleted = len(response.data) > 0
+            elif self.sqlite:
+                # Delete from the local store
+                deleted = await self._run("delete_meeting", self.sqlite.delete, meeting_id)
+                if deleted:
+                    self._total_meetings -= 1
             else:
                 # Delete from memory
-                if meeting_id in self._in_memory_storage:
-                    del self._in_memory_storage[meeting_id]
-                    return True
-                return False
+                deleted = meeting_id in self._in_memory_storage
+                if deleted:
+                    meeting = self._in_memory_storage.pop(meeting_id)
+                    key = (meeting.get("created_at", ""), meeting_id)
+                    index = bisect.bisect_left(self._created_index, key)
+                    if index < len(self._created_index) and self._created_index[index] == key:
+                        del self._created_index[index]
+                    self._total_meetings -= 1
+            
+            if deleted:
+                await self._run("unindex_meeting", self.search_index.remove_meeting, meeting_id)
+            return deleted
                 
         except Exception as e:
             logger.error(f"Error deleting meeting: {str(e)}")
@@ -199,7 +520,7 @@ class DatabaseService:
         Create necessary tables in Supabase (run once during setup)
         """
         if not self.supabase:
-            logger.info("Skipping table creation - using in-memory storage")
+            logger.info("Skipping table creation - using local storage")
             return
         
         try:
@@ -222,7 +543,7 @@ class DatabaseService:
                 updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
             );
             
-            CREATE INDEX idx_meetings_created_at ON meetings(created_at DESC);
+            CREATE INDEX idx_meetings_created_at ON meetings(created_at DESC, id DESC);
             CREATE INDEX idx_meetings_status ON meetings(status);
             """)
             
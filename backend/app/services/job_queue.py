@@ -0,0 +1,357 @@
+import os
+import json
+import sqlite3
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when the job queue has reached its maximum depth"""
+    pass
+
+class JobQueue:
+    """Persistent SQLite-backed job queue with a bounded asyncio worker pool"""
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    
+    def __init__(self):
+        # Queue configuration
+        self.db_path = os.getenv("JOB_QUEUE_PATH", "jobs.db")
+        self.num_workers = int(os.getenv("JOB_WORKERS", "2"))
+        self.max_depth = int(os.getenv("JOB_QUEUE_MAX_DEPTH", "50"))
+        self.max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        self.retry_backoff = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "5"))
+        # Failed jobs stay visible for inspection this long, without their checkpoint
+        self.failed_ttl = timedelta(hours=float(os.getenv("JOB_FAILED_TTL_HOURS", "24")))
+        
+        # A single connection guarded by a lock; writes (which may wait on fsync) run on
+        # one dedicated thread so they never block the event loop
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-queue")
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = Lock()
+        self._create_tables()
+        
+        # Counters
+        self.completed = 0
+        self.retries = 0
+        
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._retry_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._handler: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    
+    def _create_tables(self):
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    checkpoint TEXT NOT NULL DEFAULT '{}',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error_message TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+    
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "payload": json.loads(row["payload"]),
+            "status": row["status"],
+            "stage": row["stage"],
+            "checkpoint": json.loads(row["checkpoint"]),
+            "attempts": row["attempts"],
+            "error_message": row["error_message"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+    
+    def _active_count(self) -> int:
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (self.QUEUED, self.RUNNING)
+        ).fetchone()[0]
+    
+    def depth(self) -> int:
+        """
+        Number of jobs waiting or running
+        
+        Returns:
+            int: Current queue depth
+        """
+        with self._lock:
+            return self._active_count()
+    
+    def ensure_capacity(self):
+        """
+        Raise QueueFullError if no more jobs can be accepted
+        """
+        if self.depth() >= self.max_depth:
+            raise QueueFullError(f"Processing queue is full ({self.max_depth} jobs). Please retry later.")
+    
+    async def _run(self, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+    
+    async def enqueue(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Persist a new job and wake a worker
+        
+        Args:
+            job_id: Unique job identifier
+            payload: JSON-serialisable job arguments
+        
+        Returns:
+            Dict: The queued job
+        
+        Raises:
+            QueueFullError: If the queue is at JOB_QUEUE_MAX_DEPTH
+        """
+        depth = await self._run(self._insert, job_id, payload)
+        
+        if self._wakeup:
+            self._wakeup.set()
+        
+        logger.info(f"Queued job {job_id} (depth {depth + 1})")
+        return self.get_job(job_id)
+    
+    def _insert(self, job_id: str, payload: Dict[str, Any]) -> int:
+        now = datetime.now().isoformat()
+        with self._lock:
+            depth = self._active_count()
+            if depth >= self.max_depth:
+                raise QueueFullError(f"Processing queue is full ({self.max_depth} jobs). Please retry later.")
+            
+            self._conn.execute(
+                "INSERT INTO jobs (id, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), self.QUEUED, now, now)
+            )
+        return depth
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a job by ID
+        
+        Args:
+            job_id: Unique job identifier
+        
+        Returns:
+            Dict: Job record or None if not found
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+    
+    async def save_checkpoint(self, job_id: str, stage: str, data: Dict[str, Any]):
+        """
+        Record that a stage finished so a restarted job can skip it
+        
+        Args:
+            job_id: Unique job identifier
+            stage: Name of the completed stage
+            data: Stage output merged into the job checkpoint
+        """
+        await self._run(self._write_checkpoint, job_id, stage, data)
+    
+    def _write_checkpoint(self, job_id: str, stage: str, data: Dict[str, Any]):
+        with self._lock:
+            row = self._conn.execute("SELECT checkpoint FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if not row:
+                return
+            checkpoint = json.loads(row["checkpoint"])
+            checkpoint.update(data)
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, checkpoint = ?, updated_at = ? WHERE id = ?",
+                (stage, json.dumps(checkpoint), datetime.now().isoformat(), job_id)
+            )
+    
+    def _finish(self, job_id: str, status: str, error_message: Optional[str] = None):
+        with self._lock:
+            if status == self.DONE:
+                # Finished jobs have nothing left to resume; results live in the database
+                self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                self.completed += 1
+                return
+            if status == self.FAILED:
+                # Nothing will resume a failed job, so its transcript checkpoint is dropped and
+                # failed jobs older than JOB_FAILED_TTL_HOURS are pruned
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, checkpoint = '{}', error_message = ?, updated_at = ? WHERE id = ?",
+                    (status, error_message, datetime.now().isoformat(), job_id)
+                )
+                self._conn.execute(
+                    "DELETE FROM jobs WHERE status = ? AND updated_at < ?",
+                    (self.FAILED, (datetime.now() - self.failed_ttl).isoformat())
+                )
+                return
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error_message = ?, updated_at = ? WHERE id = ?",
+                (status, error_message, datetime.now().isoformat(), job_id)
+            )
+    
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (self.QUEUED,)
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (self.RUNNING, datetime.now().isoformat(), row["id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if not row:
+            return None
+        job = self._row_to_job(row)
+        job["attempts"] += 1
+        job["status"] = self.RUNNING
+        return job
+    
+    def is_last_attempt(self, job: Dict[str, Any]) -> bool:
+        """
+        Check whether a failure of this run would fail the job for good
+        
+        Args:
+            job: Job as passed to the handler
+        
+        Returns:
+            bool: True if no retries are left
+        """
+        return job["attempts"] >= self.max_attempts
+    
+    async def _requeue(self, job_id: str):
+        self._retry_timers.pop(job_id, None)
+        await self._run(self._finish, job_id, self.QUEUED)
+        self._wakeup.set()
+    
+    async def recover(self) -> List[str]:
+        """
+        Requeue jobs left running by a previous process
+        
+        Jobs that already used up their attempts are marked failed instead.
+        
+        Returns:
+            List[str]: IDs of jobs that were given up
+        """
+        return await self._run(self._recover)
+    
+    def _recover(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, attempts FROM jobs WHERE status = ?", (self.RUNNING,)
+            ).fetchall()
+        
+        abandoned = []
+        for row in rows:
+            if row["attempts"] >= self.max_attempts:
+                self._finish(row["id"], self.FAILED, "Job interrupted too many times")
+                abandoned.append(row["id"])
+            else:
+                self._finish(row["id"], self.QUEUED)
+        
+        if rows:
+            logger.info(f"Recovered {len(rows) - len(abandoned)} interrupted jobs, abandoned {len(abandoned)}")
+        return abandoned
+    
+    async def start(self, handler: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """
+        Start the worker pool
+        
+        Args:
+            handler: Coroutine function called with each claimed job
+        """
+        self._handler = handler
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._worker_loop(i)) for i in range(self.num_workers)
+        ]
+        self._wakeup.set()
+        logger.info(f"Job queue started with {self.num_workers} workers")
+    
+    async def _worker_loop(self, worker_id: int):
+        while True:
+            job = await self._run(self._claim_next)
+            if not job:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            # Let other idle workers check for more work
+            self._wakeup.set()
+            
+            try:
+                await self._handler(job)
+                await self._run(self._finish, job["id"], self.DONE)
+            except asyncio.CancelledError:
+                # Shutdown: leave the job running so recover() resumes it on restart
+                raise
+            except Exception as e:
+                if self.is_last_attempt(job):
+                    logger.error(f"Worker {worker_id} failed job {job['id']}: {str(e)}")
+                    await self._run(self._finish, job["id"], self.FAILED, str(e))
+                    continue
+                
+                # Exponential backoff; the job stays running meanwhile, so a restart still recovers it
+                delay = self.retry_backoff * 2 ** (job["attempts"] - 1)
+                logger.warning(
+                    f"Worker {worker_id} failed job {job['id']} (attempt {job['attempts']}/{self.max_attempts}), "
+                    f"retrying in {delay:.0f}s: {str(e)}"
+                )
+                self.retries += 1
+                self._retry_timers[job["id"]] = asyncio.get_running_loop().call_later(
+                    delay, lambda job_id=job["id"]: asyncio.ensure_future(self._requeue(job_id))
+                )
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth and worker counters
+        
+        Returns:
+            Dict: Job counts by status and pool configuration
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {row[0]: row[1] for row in rows}
+        return {
+            "workers": self.num_workers,
+            "max_depth": self.max_depth,
+            "queued": counts.get(self.QUEUED, 0),
+            "running": counts.get(self.RUNNING, 0),
+            "completed": self.completed,
+            "failed": counts.get(self.FAILED, 0),
+            "retries": self.retries,
+            "retrying": len(self._retry_timers),
+        }
+    
+    async def close(self):
+        """Stop the workers and close the database connection"""
+        # Jobs waiting to retry stay running and are requeued by recover() on restart
+        for timer in self._retry_timers.values():
+            timer.cancel()
+        self._retry_timers = {}
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
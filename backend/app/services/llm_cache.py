@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """
+    Two-tier (memory LRU + SQLite on disk) cache of LLM generations
+    
+    The memory tier is checked inline; the disk tier runs on its own thread
+    so lookups and writes never block the event loop.
+    """
+    
+    def __init__(self):
+        # Cache configuration
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.db_path = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+        self.memory_limit_bytes = int(float(os.getenv("LLM_CACHE_MEMORY_MB", "64")) * 1024 * 1024)
+        self.disk_limit_bytes = int(float(os.getenv("LLM_CACHE_DISK_MB", "512")) * 1024 * 1024)
+        
+        # Memory tier: key -> response text, least recently used first
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = Lock()
+        
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._conn = None
+        self._disk_bytes = 0
+        # One thread owns the SQLite connection, so disk operations are serialized
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+        if self.enabled:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses(last_access)")
+            self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+    
+    @staticmethod
+    def make_key(backend: str, model: str, prompt: str, options: Dict[str, Any]) -> str:
+        """
+        Build a cache key from everything that determines a generation
+        
+        Args:
+            backend: Backend name (e.g. "ollama", "hf")
+            model: Model name or endpoint
+            prompt: Full prompt text
+            options: Decoding options
+        
+        Returns:
+            str: SHA-256 hex digest
+        """
+        material = json.dumps(
+            {"backend": backend, "model": model, "prompt": prompt, "options": options},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    def _remember(self, key: str, response: str):
+        """Insert into the memory tier, evicting least recently used entries"""
+        size = len(response.encode("utf-8"))
+        if size > self.memory_limit_bytes:
+            return
+        
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous.encode("utf-8"))
+        
+        self._memory[key] = response
+        self._memory_bytes += size
+        
+        while self._memory_bytes > self.memory_limit_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted.encode("utf-8"))
+    
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached generation
+        
+        Args:
+            key: Key from make_key
+        
+        Returns:
+            str: Cached response text or None on a miss
+        """
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            response = self._memory.get(key)
+            if response is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return response
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._get_disk, key)
+    
+    def _get_disk(self, key: str) -> Optional[str]:
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._remember(key, row[0])
+            self.disk_hits += 1
+            return row[0]
+    
+    async def put(self, key: str, response: str):
+        """
+        Store a generation in both tiers
+        
+        Args:
+            key: Key from make_key
+            response: Generated text
+        """
+        if not self.enabled or not response:
+            return
+        
+        with self._lock:
+            self._remember(key, response)
+        
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._put_disk, key, response)
+    
+    def _put_disk(self, key: str, response: str):
+        size = len(response.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return
+            existing = self._conn.execute("SELECT size FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            self._disk_bytes += size - (existing[0] if existing else 0)
+            
+            if self._disk_bytes > self.disk_limit_bytes:
+                self._evict(self._disk_bytes - self.disk_limit_bytes)
+    
+    def _evict(self, overflow_bytes: int):
+        """Drop the least recently used rows that together free at least overflow_bytes"""
+        # Rows whose preceding running total is still short of the overflow are the ones to drop
+        count, freed = self._conn.execute(
+            """
+            SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (
+                SELECT size, SUM(size) OVER (ORDER BY last_access, key) - size AS before
+                FROM llm_responses
+            ) WHERE before < ?
+            """,
+            (overflow_bytes,)
+        ).fetchone()
+        self._conn.execute(
+            "DELETE FROM llm_responses WHERE key IN (SELECT key FROM llm_responses ORDER BY last_access, key LIMIT ?)",
+            (count,)
+        )
+        self._disk_bytes -= freed
+        self.evictions += count
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit-rate and size metrics
+        
+        Returns:
+            Dict: Per-tier hits, misses, hit_rate and sizes
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_bytes / (1024 * 1024), 2),
+                "memory_limit_mb": round(self.memory_limit_bytes / (1024 * 1024), 2),
+                "disk_mb": round(self._disk_bytes / (1024 * 1024), 2),
+                "disk_limit_mb": round(self.disk_limit_bytes / (1024 * 1024), 2),
+            }
+    
+    def close(self):
+        """Close the on-disk tier"""
+        self.executor.shutdown(wait=True)
+        if self._conn is not None:
+            with self._lock:
+                self.enabled = False
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,146 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SchedulerTimeoutError(Exception):
+    """Raised when a request waits longer than the queue limit for a backend slot"""
+    pass
+
+class _BackendSlots:
+    """Slot counter and wait queue for one backend"""
+    
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.active = 0
+        self.waiting: List[Tuple[float, int, asyncio.Future]] = []
+        
+        # Metrics
+        self.granted = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+class LLMScheduler:
+    """
+    Admits LLM calls to each backend only while it has a free slot
+    
+    Waiting calls are ordered shortest-job-first with aging: the sort key is
+    arrival time plus the estimated prompt tokens divided by
+    LLM_PRIORITY_TOKENS_PER_SECOND, so a short transcript overtakes long ones
+    queued shortly before it, but a long one is never starved.
+    """
+    
+    def __init__(self):
+        # Scheduler configuration
+        self.max_queue_wait = float(os.getenv("LLM_MAX_QUEUE_WAIT", "600"))
+        self.tokens_per_second = float(os.getenv("LLM_PRIORITY_TOKENS_PER_SECOND", "50"))
+        
+        self._backends: Dict[str, _BackendSlots] = {}
+        self._sequence = itertools.count()
+    
+    def configure(self, backend: str, slots: int):
+        """
+        Set the number of concurrent calls a backend accepts
+        
+        Args:
+            backend: Backend name (e.g. "ollama", "hf")
+            slots: Concurrent generations the backend serves efficiently
+        """
+        self._backends[backend] = _BackendSlots(max(1, slots))
+    
+    def queue_depth(self, backend: str) -> int:
+        """Number of calls waiting for a slot on a backend"""
+        state = self._backends.get(backend)
+        if state is None:
+            return 0
+        return sum(1 for _, _, future in state.waiting if not future.done())
+    
+    def _grant_next(self, state: _BackendSlots):
+        while state.waiting and state.active < state.slots:
+            _, _, future = heapq.heappop(state.waiting)
+            if not future.done():
+                state.active += 1
+                future.set_result(None)
+    
+    @asynccontextmanager
+    async def slot(self, backend: str, prompt_tokens: int):
+        """
+        Hold one of a backend's slots for the duration of a call
+        
+        The caller's generation timeout therefore starts when the slot is granted,
+        not while the request is still queued.
+        
+        Args:
+            backend: Backend name
+            prompt_tokens: Estimated prompt size, used for priority
+        
+        Raises:
+            SchedulerTimeoutError: If no slot frees up within LLM_MAX_QUEUE_WAIT
+        """
+        state = self._backends.get(backend)
+        if state is None:
+            yield
+            return
+        
+        queued_at = time.monotonic()
+        if state.active < state.slots and not self.queue_depth(backend):
+            state.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            key = queued_at + prompt_tokens / self.tokens_per_second
+            heapq.heappush(state.waiting, (key, next(self._sequence), future))
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=self.max_queue_wait)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if future.done() and not future.cancelled():
+                    # Granted just as we gave up: hand the slot on
+                    state.active -= 1
+                    self._grant_next(state)
+                else:
+                    future.cancel()
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                state.timeouts += 1
+                raise SchedulerTimeoutError(
+                    f"No {backend} slot free after {self.max_queue_wait:.0f}s ({self.queue_depth(backend)} waiting)"
+                )
+        
+        waited = time.monotonic() - queued_at
+        state.granted += 1
+        state.total_wait += waited
+        state.max_wait = max(state.max_wait, waited)
+        if waited > 1.0:
+            logger.info(f"LLM call waited {waited:.1f}s for a {backend} slot")
+        
+        try:
+            yield
+        finally:
+            state.active -= 1
+            self._grant_next(state)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get slot usage, queue depth and queue-wait metrics per backend
+        
+        Returns:
+            Dict: Per-backend scheduler metrics
+        """
+        return {
+            name: {
+                "slots": state.slots,
+                "active": state.active,
+                "waiting": self.queue_depth(name),
+                "granted": state.granted,
+                "queue_timeouts": state.timeouts,
+                "avg_queue_wait_ms": 1000.0 * state.total_wait / state.granted if state.granted else 0.0,
+                "max_queue_wait_ms": 1000.0 * state.max_wait,
+            }
+            for name, state in self._backends.items()
+        }
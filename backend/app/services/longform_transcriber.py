@@ -0,0 +1,283 @@
+import os
+import logging
+import multiprocessing
+from collections import OrderedDict
+from threading import Lock
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+import numpy as np
+
+from .whisper_registry import WhisperModelRegistry, estimate_model_bytes
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Per-process Whisper models, least recently used first, kept within the worker's share of the budget
+_worker_models: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+_worker_budget_bytes = 0
+_worker_device = "cpu"
+
+def _init_worker(threads_per_worker: int, device: Optional[str], budget_bytes: int):
+    """Limit torch threads and set the device and memory share of a pool process"""
+    global _worker_device, _worker_budget_bytes
+    import torch
+    
+    torch.set_num_threads(threads_per_worker)
+    _worker_device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    _worker_budget_bytes = budget_bytes
+
+def _get_worker_model(model_name: str):
+    if model_name in _worker_models:
+        _worker_models.move_to_end(model_name)
+        return _worker_models[model_name][0]
+    
+    import whisper
+    
+    # Evict first so the old and new models are never resident together
+    needed = estimate_model_bytes(model_name)
+    while _worker_models and sum(size for _, size in _worker_models.values()) + needed > _worker_budget_bytes:
+        _worker_models.popitem(last=False)
+    
+    model = whisper.load_model(model_name, device=_worker_device)
+    _worker_models[model_name] = (model, sum(p.numel() * p.element_size() for p in model.parameters()))
+    return model
+
+def _transcribe_window(args: Tuple[np.ndarray, float, str]) -> List[Dict[str, Any]]:
+    """
+    Transcribe one window in a pool process
+    
+    Args:
+        args: (window samples, window start offset in seconds, Whisper model name)
+    
+    Returns:
+        List: Segments with absolute start/end timestamps
+    """
+    audio, offset, model_name = args
+    model = _get_worker_model(model_name)
+    result = model.transcribe(audio, condition_on_previous_text=False, fp16=_worker_device.startswith("cuda"))
+    return [
+        {"start": seg["start"] + offset, "end": seg["end"] + offset, "text": seg["text"]}
+        for seg in result.get("segments", [])
+    ]
+
+def find_cut_points(
+    audio: np.ndarray,
+    window_seconds: float,
+    search_seconds: float,
+    frame_seconds: float = 0.1
+) -> List[float]:
+    """
+    Pick cut points close to every window_seconds, snapped to the quietest
+    nearby frame so words are not split across windows
+    
+    Args:
+        audio: 16 kHz mono float32 samples
+        window_seconds: Target distance between cuts
+        search_seconds: How far either side of the target to look for silence
+        frame_seconds: Energy frame length
+    
+    Returns:
+        List[float]: Cut times in seconds, excluding 0 and the end
+    """
+    hop = int(frame_seconds * SAMPLE_RATE)
+    num_frames = len(audio) // hop
+    if num_frames == 0:
+        return []
+    
+    # Frame RMS energy, smoothed over ~0.5 s so single quiet frames inside words are ignored
+    frames = audio[:num_frames * hop].reshape(num_frames, hop)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    smooth = max(1, int(0.5 / frame_seconds))
+    energy = np.convolve(energy, np.ones(smooth) / smooth, mode="same")
+    
+    duration = len(audio) / SAMPLE_RATE
+    cuts = []
+    target = window_seconds
+    while target < duration - search_seconds:
+        lo = max(0, int((target - search_seconds) / frame_seconds))
+        hi = min(num_frames, int((target + search_seconds) / frame_seconds) + 1)
+        cut = (lo + int(np.argmin(energy[lo:hi]))) * frame_seconds
+        cuts.append(cut)
+        target = cut + window_seconds
+    return cuts
+
+def select_window_segments(segments: List[Dict[str, Any]], lo: float, hi: float) -> List[Dict[str, Any]]:
+    """
+    Keep the segments a window owns, dropping duplicates from the overlaps
+    
+    A segment belongs to the window whose [previous cut, next cut) range
+    contains its midpoint, so every overlap region is kept exactly once.
+    
+    Args:
+        segments: Segments of one window with absolute timestamps
+        lo: Previous cut time (0 for the first window)
+        hi: Next cut time (infinity for the last window)
+    
+    Returns:
+        List: Segments owned by this window
+    """
+    return [seg for seg in segments if lo <= (seg["start"] + seg["end"]) / 2 < hi]
+
+class LongFormTranscriber:
+    """
+    Splits long recordings at silences and transcribes the windows in parallel
+    
+    Worker models count against WHISPER_MEMORY_BUDGET_MB: while the pool runs
+    it reserves LONGFORM_MEMORY_BUDGET_MB of the registry's budget, each worker
+    keeps models within its share of that, and the worker count is capped so
+    every worker fits the default model.
+    """
+    
+    def __init__(self, registry: WhisperModelRegistry):
+        self.registry = registry
+        
+        # Long-form configuration
+        self.min_duration = float(os.getenv("LONGFORM_MIN_DURATION", "900"))  # 15 minutes
+        self.window_seconds = float(os.getenv("LONGFORM_WINDOW_SECONDS", "300"))
+        self.overlap_seconds = float(os.getenv("LONGFORM_OVERLAP_SECONDS", "5"))
+        self.search_seconds = float(os.getenv("LONGFORM_SEARCH_SECONDS", "20"))
+        
+        # In-process windowing used to stream segments from recordings that skip the pool
+        self.stream_window_seconds = float(os.getenv("STREAM_WINDOW_SECONDS", "60"))
+        
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_worker = int(os.getenv("LONGFORM_THREADS_PER_WORKER", "4"))
+        num_workers = int(os.getenv("LONGFORM_WORKERS", str(max(1, cpu_count // self.threads_per_worker))))
+        default_budget_mb = registry.memory_budget_bytes / (2 * 1024 * 1024)
+        self.pool_budget_bytes = int(float(os.getenv("LONGFORM_MEMORY_BUDGET_MB", str(default_budget_mb))) * 1024 * 1024)
+        self.num_workers = max(1, min(num_workers, self.pool_budget_bytes // registry.estimate_bytes(registry.default_model)))
+        if self.num_workers < num_workers:
+            logger.info(f"Long-form workers capped at {self.num_workers} to fit LONGFORM_MEMORY_BUDGET_MB")
+        self.worker_budget_bytes = self.pool_budget_bytes // self.num_workers
+        
+        # Created on first use so short meetings never pay for extra model copies
+        self._pool = None
+        self._pool_lock = Lock()
+    
+    def should_use(self, audio: np.ndarray, model_name: str) -> bool:
+        """
+        Check if a recording is long enough to benefit from segmentation
+        
+        Args:
+            audio: 16 kHz mono float32 samples
+            model_name: Whisper model size the job will use
+        
+        Returns:
+            bool: True if long-form mode should be used and each worker can hold the model
+        """
+        return (
+            self.num_workers > 1
+            and len(audio) / SAMPLE_RATE >= self.min_duration
+            and self.registry.estimate_bytes(model_name) <= self.worker_budget_bytes
+        )
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                logger.info(f"Starting long-form transcription pool: {self.num_workers} workers x {self.threads_per_worker} threads")
+                self.registry.reserve(self.pool_budget_bytes)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.num_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.threads_per_worker, self.registry.device, self.worker_budget_bytes)
+                )
+            return self._pool
+    
+    def _windows(self, audio: np.ndarray, window_seconds: float, search_seconds: float) -> Tuple[List[Tuple[np.ndarray, float]], List[float]]:
+        """
+        Cut audio at silences into overlapping windows
+        
+        Returns:
+            Tuple of (window samples, window start offset) pairs and the owner
+            bounds for select_window_segments
+        """
+        cuts = find_cut_points(audio, window_seconds, search_seconds)
+        bounds = [0.0] + cuts + [len(audio) / SAMPLE_RATE]
+        
+        # Each window extends overlap_seconds past its cuts on both sides
+        windows = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            window_start = max(0.0, start - self.overlap_seconds)
+            window_end = end + self.overlap_seconds
+            windows.append((audio[int(window_start * SAMPLE_RATE):int(window_end * SAMPLE_RATE)], window_start))
+        return windows, [0.0] + cuts + [float("inf")]
+    
+    def transcribe_streaming(
+        self,
+        audio: np.ndarray,
+        model,
+        on_segment: Callable[[Dict[str, Any]], None]
+    ) -> str:
+        """
+        Transcribe in-process window by window, emitting segments as each window is decoded
+        
+        Used when the process pool is not (short recordings, LONGFORM_WORKERS<=1),
+        so live segment events arrive every STREAM_WINDOW_SECONDS rather than in one
+        burst at the end. Windows are cut at silences with overlap, and each
+        window is prompted with the tail of the text before it.
+        
+        Args:
+            audio: 16 kHz mono float32 samples
+            model: Loaded Whisper model
+            on_segment: Called with each segment (absolute timestamps), in order
+        
+        Returns:
+            str: Stitched transcript
+        """
+        windows, owner_bounds = self._windows(
+            audio, self.stream_window_seconds, min(self.search_seconds, self.stream_window_seconds / 4)
+        )
+        texts = []
+        for i, (samples, offset) in enumerate(windows):
+            previous = "".join(texts)[-500:].strip()
+            result = model.transcribe(samples, initial_prompt=previous or None)
+            segments = [
+                {"start": seg["start"] + offset, "end": seg["end"] + offset, "text": seg["text"]}
+                for seg in result.get("segments", [])
+            ]
+            for seg in select_window_segments(segments, owner_bounds[i], owner_bounds[i + 1]):
+                texts.append(seg["text"])
+                on_segment(seg)
+        return "".join(texts).strip()
+    
+    def transcribe(
+        self,
+        audio: np.ndarray,
+        model_name: str,
+        on_segment: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> str:
+        """
+        Transcribe a long recording window by window across the process pool
+        
+        Args:
+            audio: 16 kHz mono float32 samples
+            model_name: Whisper model size loaded by each worker
+            on_segment: Called with each stitched segment, in order, as soon as
+                its window and all earlier windows have finished
+        
+        Returns:
+            str: Stitched transcript
+        """
+        windows, owner_bounds = self._windows(audio, self.window_seconds, self.search_seconds)
+        tasks = [(samples, offset, model_name) for samples, offset in windows]
+        
+        logger.info(f"Long-form transcription: {len(tasks)} windows across {self.num_workers} workers")
+        
+        texts = []
+        for i, segments in enumerate(self._get_pool().map(_transcribe_window, tasks)):
+            for seg in select_window_segments(segments, owner_bounds[i], owner_bounds[i + 1]):
+                texts.append(seg["text"])
+                if on_segment:
+                    on_segment(seg)
+        return "".join(texts).strip()
+    
+    def close(self):
+        """Shut down the process pool"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+                self.registry.release(self.pool_budget_bytes)
@@ -0,0 +1,400 @@
+import os
+import re
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+AnalyzeFn = Callable[[str, Optional[str]], Awaitable[Dict[str, Any]]]
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """
+    Cheap token estimate for English text without loading a tokenizer
+    
+    Args:
+        text: Text to measure
+        chars_per_token: Average characters per token for the model family
+    
+    Returns:
+        int: Estimated token count
+    """
+    return int(len(text) / chars_per_token) + 1
+
+def split_sentences(text: str) -> List[str]:
+    """Split a transcript into sentences, keeping their punctuation"""
+    sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+    return [s for s in sentences if s]
+
+def _normalize(item: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", item.lower())).strip()
+
+def dedupe_items(items: List[str], similarity: float = 0.8) -> List[str]:
+    """
+    Drop repeated list items, including near-duplicates from overlapping chunks
+    
+    Two items are duplicates if their normalized word sets have a Jaccard
+    similarity of at least ``similarity``; the first occurrence is kept.
+    
+    Args:
+        items: Items in transcript order
+        similarity: Jaccard threshold
+    
+    Returns:
+        List[str]: Deduplicated items
+    """
+    kept: List[str] = []
+    kept_words: List[set] = []
+    for item in items:
+        if not isinstance(item, str) or not item.strip():
+            continue
+        words = set(_normalize(item).split())
+        if not words:
+            continue
+        duplicate = any(
+            len(words & other) / len(words | other) >= similarity
+            for other in kept_words
+        )
+        if not duplicate:
+            kept.append(item.strip())
+            kept_words.append(words)
+    return kept
+
+class MapReduceAnalyzer:
+    """Analyzes transcripts longer than the LLM context in concurrent chunks"""
+    
+    def __init__(self):
+        # Token budget configuration
+        self.context_tokens = int(os.getenv("ANALYSIS_CONTEXT_TOKENS", "8192"))
+        # Per-backend context windows; the HF space model (DialoGPT) only has 1024 positions
+        self.backend_context_tokens = {
+            "ollama": int(os.getenv("ANALYSIS_CONTEXT_TOKENS_OLLAMA", str(self.context_tokens))),
+            "hf": int(os.getenv("ANALYSIS_CONTEXT_TOKENS_HF", "1024")),
+        }
+        self.prompt_overhead_tokens = int(os.getenv("ANALYSIS_PROMPT_OVERHEAD_TOKENS", "300"))
+        self.max_output_tokens = int(os.getenv("ANALYSIS_MAX_OUTPUT_TOKENS", "512"))
+        # The analysis JSON needs ~250 tokens; reserving 512 on a 1024-token window would
+        # leave ~200 for the transcript and split even short meetings into many chunks
+        self.backend_max_output_tokens = {
+            "ollama": int(os.getenv("ANALYSIS_MAX_OUTPUT_TOKENS_OLLAMA", str(self.max_output_tokens))),
+            "hf": int(os.getenv("ANALYSIS_MAX_OUTPUT_TOKENS_HF", "256")),
+        }
+        # Floor on the transcript budget; a chunk this small may push the prompt past a tiny context
+        self.min_chunk_tokens = int(os.getenv("ANALYSIS_MIN_CHUNK_TOKENS", "256"))
+        self.chars_per_token = float(os.getenv("ANALYSIS_CHARS_PER_TOKEN", "4.0"))
+        self.overlap_sentences = int(os.getenv("MAP_REDUCE_OVERLAP_SENTENCES", "2"))
+        
+        # Number of chunk analyses in flight at once (match the backend's parallel slots)
+        self.concurrency = int(os.getenv("MAP_REDUCE_CONCURRENCY", "4"))
+    
+    @property
+    def chunk_tokens(self) -> int:
+        """Transcript tokens that fit in one prompt next to instructions and output"""
+        return self.chunk_tokens_for()
+    
+    def chunk_tokens_for(self, backend: Optional[str] = None) -> int:
+        """
+        Transcript tokens that fit in one prompt on a given backend
+        
+        Args:
+            backend: Analysis backend name, or None for ANALYSIS_CONTEXT_TOKENS
+        
+        Returns:
+            int: Token budget for the transcript part of the prompt
+        """
+        context = self.backend_context_tokens.get(backend, self.context_tokens) if backend else self.context_tokens
+        return max(self.min_chunk_tokens, context - self.prompt_overhead_tokens - self.max_output_tokens_for(backend))
+    
+    def max_output_tokens_for(self, backend: Optional[str] = None) -> int:
+        """
+        Output tokens reserved for the analysis on a given backend
+        
+        Args:
+            backend: Analysis backend name, or None for ANALYSIS_MAX_OUTPUT_TOKENS
+        
+        Returns:
+            int: Generation limit the backend is asked to respect
+        """
+        return self.backend_max_output_tokens.get(backend, self.max_output_tokens) if backend else self.max_output_tokens
+    
+    def fits(self, transcript: str, backend: str) -> bool:
+        """Check if a transcript fits in one prompt on a backend"""
+        return estimate_tokens(transcript, self.chars_per_token) <= self.chunk_tokens_for(backend)
+    
+    def needs_chunking(self, transcript: str, chunk_tokens: Optional[int] = None) -> bool:
+        """
+        Check if a transcript exceeds a single prompt's budget
+        
+        Args:
+            transcript: Meeting transcript
+            chunk_tokens: Budget to check against (defaults to chunk_tokens)
+        
+        Returns:
+            bool: True if map-reduce should be used
+        """
+        return estimate_tokens(transcript, self.chars_per_token) > (chunk_tokens or self.chunk_tokens)
+    
+    def split(self, transcript: str, chunk_tokens: Optional[int] = None) -> List[str]:
+        """
+        Pack sentences into chunks that fit the token budget, overlapping a few
+        sentences so items spanning a boundary are not lost
+        
+        Args:
+            transcript: Meeting transcript
+            chunk_tokens: Budget per chunk (defaults to chunk_tokens)
+        
+        Returns:
+            List[str]: Transcript chunks in order
+        """
+        budget = chunk_tokens or self.chunk_tokens
+        sentences = split_sentences(transcript)
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        
+        for sentence in sentences:
+            tokens = estimate_tokens(sentence, self.chars_per_token)
+            
+            # A single run-on sentence larger than the budget is hard-split
+            if tokens > budget:
+                step = int(budget * self.chars_per_token)
+                pieces = [sentence[i:i + step] for i in range(0, len(sentence), step)]
+            else:
+                pieces = [sentence]
+            
+            for piece in pieces:
+                piece_tokens = estimate_tokens(piece, self.chars_per_token)
+                if current and current_tokens + piece_tokens > budget:
+                    chunks.append(" ".join(current))
+                    current = current[-self.overlap_sentences:] if self.overlap_sentences else []
+                    current_tokens = sum(estimate_tokens(s, self.chars_per_token) for s in current)
+                    # Overlap must never push a chunk over budget on its own
+                    if current_tokens + piece_tokens > budget:
+                        current, current_tokens = [], 0
+                current.append(piece)
+                current_tokens += piece_tokens
+        
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+    
+    async def analyze(
+        self,
+        transcript: str,
+        analyze_chunk: AnalyzeFn,
+        meeting_title: Optional[str] = None,
+        chunk_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Map: extract from every chunk concurrently. Reduce: merge the lists and
+        condense the chunk summaries into one summary.
+        
+        Args:
+            transcript: Meeting transcript
+            analyze_chunk: Coroutine analyzing one prompt-sized text
+            meeting_title: Optional meeting title for context
+            chunk_tokens: Budget per chunk, sized for the backend expected to run them
+        
+        Returns:
+            Dict containing summary, action_items, and key_decisions
+        """
+        chunks = self.split(transcript, chunk_tokens)
+        logger.info(f"Map-reduce analysis: {len(chunks)} chunks, up to {self.concurrency} in parallel")
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def run(index: int, chunk: str) -> Dict[str, Any]:
+            async with semaphore:
+                title = f"{meeting_title} (part {index + 1} of {len(chunks)})" if meeting_title else f"Part {index + 1} of {len(chunks)}"
+                return await analyze_chunk(chunk, title)
+        
+        results = await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks)))
+        return await self.merge(results, analyze_chunk, meeting_title, chunk_tokens)
+    
+    async def merge(
+        self,
+        results: List[Dict[str, Any]],
+        analyze_chunk: AnalyzeFn,
+        meeting_title: Optional[str] = None,
+        chunk_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Reduce step: merge per-chunk list items and condense the chunk summaries
+        
+        Args:
+            results: Per-chunk analyses in transcript order
+            analyze_chunk: Coroutine analyzing one prompt-sized text
+            meeting_title: Optional meeting title for context
+            chunk_tokens: Budget the reduce prompt must fit
+        
+        Returns:
+            Dict containing summary, action_items, and key_decisions
+        """
+        action_items = dedupe_items([item for r in results for item in r.get("action_items", [])])
+        key_decisions = dedupe_items([item for r in results for item in r.get("key_decisions", [])])
+        summaries = [r.get("summary", "").strip() for r in results if r.get("summary", "").strip()]
+        
+        merged = {
+            "summary": await self._reduce_summaries(summaries, analyze_chunk, meeting_title, chunk_tokens),
+            "action_items": action_items,
+            "key_decisions": key_decisions,
+        }
+        # One unparsed chunk leaves a gap in the merged analysis
+        # (structured_output.PARSE_FAILED; that module imports this one)
+        if any(r.get("parse_failed") for r in results):
+            merged["parse_failed"] = True
+        return merged
+    
+    def start_incremental(
+        self,
+        analyze_chunk: AnalyzeFn,
+        meeting_title: Optional[str] = None,
+        chunk_tokens: Optional[int] = None
+    ) -> "IncrementalMapReduce":
+        """
+        Begin analyzing a transcript chunk by chunk while it is still being produced
+        
+        Args:
+            analyze_chunk: Coroutine analyzing one prompt-sized text
+            meeting_title: Optional meeting title for context
+            chunk_tokens: Budget per chunk, sized for the backend expected to run them
+        
+        Returns:
+            IncrementalMapReduce: Sink for transcript segments (must be created on the event loop)
+        """
+        return IncrementalMapReduce(self, analyze_chunk, meeting_title, chunk_tokens)
+    
+    async def _reduce_summaries(
+        self,
+        summaries: List[str],
+        analyze_chunk: AnalyzeFn,
+        meeting_title: Optional[str],
+        chunk_tokens: Optional[int] = None
+    ) -> str:
+        if len(summaries) <= 1:
+            return summaries[0] if summaries else ""
+        
+        notes = "\n".join(f"Part {i + 1}: {summary}" for i, summary in enumerate(summaries))
+        
+        # Very long meetings: condense the notes themselves in another round
+        if self.needs_chunking(notes, chunk_tokens):
+            reduced = await self.analyze(notes, analyze_chunk, meeting_title, chunk_tokens)
+            return reduced["summary"]
+        
+        try:
+            reduced = await analyze_chunk(f"Summaries of consecutive parts of one meeting:\n{notes}", meeting_title)
+            if reduced.get("summary"):
+                return reduced["summary"]
+        except Exception as e:
+            logger.warning(f"Summary reduce step failed, joining chunk summaries: {str(e)}")
+        
+        return " ".join(summaries)
+
+class IncrementalMapReduce:
+    """
+    Map step that runs while transcription is still going
+    
+    Segments are buffered until they exceed one prompt's budget; every full
+    chunk is then analyzed right away (bounded by MAP_REDUCE_CONCURRENCY)
+    and the last, partial chunk is carried over, so chunk boundaries and
+    overlap are the same as MapReduceAnalyzer.split. Only the final chunk
+    and the merge run after the last segment.
+    """
+    
+    def __init__(
+        self,
+        analyzer: MapReduceAnalyzer,
+        analyze_chunk: AnalyzeFn,
+        meeting_title: Optional[str] = None,
+        chunk_tokens: Optional[int] = None
+    ):
+        self.analyzer = analyzer
+        self.analyze_chunk = analyze_chunk
+        self.meeting_title = meeting_title
+        self.chunk_tokens = chunk_tokens or analyzer.chunk_tokens
+        
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(analyzer.concurrency)
+        self._buffer = ""
+        self._tasks: List[asyncio.Task] = []
+        
+        # Everything fed so far, to check it against the transcript that is kept
+        self._fed: List[str] = []
+        self._closed = False
+    
+    @property
+    def chunks_started(self) -> int:
+        return len(self._tasks)
+    
+    def add_segment_threadsafe(self, text: str):
+        """Queue a transcript segment from a transcription worker thread"""
+        self._loop.call_soon_threadsafe(self.add_segment, text)
+    
+    def add_segment(self, text: str):
+        """
+        Append a transcript segment, starting analysis of any chunk it completes
+        
+        Args:
+            text: Segment text as produced by Whisper
+        """
+        # Segments from an attempt still running after finish()/cancel() (a losing hedge) are dropped
+        if self._closed:
+            return
+        self._fed.append(text)
+        self._buffer += text
+        if estimate_tokens(self._buffer, self.analyzer.chars_per_token) <= self.chunk_tokens:
+            return
+        
+        chunks = self.analyzer.split(self._buffer, self.chunk_tokens)
+        for chunk in chunks[:-1]:
+            self._start(chunk)
+        self._buffer = chunks[-1] if chunks else ""
+    
+    def _start(self, chunk: str):
+        index = len(self._tasks)
+        logger.info(f"Pipelined analysis: starting chunk {index + 1} while transcription continues")
+        
+        async def run() -> Dict[str, Any]:
+            async with self._semaphore:
+                title = f"{self.meeting_title} (part {index + 1})" if self.meeting_title else f"Part {index + 1}"
+                return await self.analyze_chunk(chunk, title)
+        
+        self._tasks.append(asyncio.ensure_future(run()))
+    
+    async def finish(self, transcript: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Analyze the remaining text and merge all chunk results
+        
+        Args:
+            transcript: The transcript that is kept. If the segments fed here do
+                not add up to it (they came from a transcription attempt that
+                failed or lost a hedge), the pipelined work is discarded.
+        
+        Returns:
+            Dict containing summary, action_items, and key_decisions, or None if
+            the transcript never outgrew one prompt or does not match the fed
+            segments (analyze it whole instead)
+        """
+        self._closed = True
+        if transcript is not None and "".join(self._fed).strip() != transcript.strip():
+            if self._tasks:
+                logger.info("Pipelined analysis came from a different transcription attempt; re-analyzing the final transcript")
+            self.cancel()
+            return None
+        
+        if not self._tasks:
+            return None
+        
+        if self._buffer.strip():
+            self._start(self._buffer)
+            self._buffer = ""
+        
+        results = await asyncio.gather(*self._tasks)
+        logger.info(f"Pipelined analysis: merging {len(results)} chunks")
+        return await self.analyzer.merge(results, self.analyze_chunk, self.meeting_title, self.chunk_tokens)
+    
+    def cancel(self):
+        """Abandon in-flight chunk analyses (e.g. when transcription fails)"""
+        self._closed = True
+        for task in self._tasks:
+            task.cancel()
@@ -1,38 +1,97 @@
 import httpx
 import json
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Callable, Tuple
 import logging
 import asyncio
+import time
 from concurrent.futures import ThreadPoolExecutor
 
+from ..utils.json_stream import IncrementalJSONParser, repair_json_text
+from .llm_cache import LLMResponseCache
+from .llm_scheduler import LLMScheduler, SchedulerTimeoutError
+from .map_reduce_analyzer import estimate_tokens
+from .structured_output import ANALYSIS_SCHEMA, PARSE_FAILED, AnalysisParseError, ParseStats, parse_analysis, build_repair_prompt
+
 logger = logging.getLogger(__name__)
 
+# Focused follow-up questions for multi-pass extraction: (field, question, JSON schema of the answer)
+MULTI_PASS_QUESTIONS = [
+    ("summary", "Write a 3-sentence overview of the meeting: key topics discussed and outcomes.", {"type": "string"}),
+    ("action_items", "List every specific task assigned to someone in the meeting, naming the assignee when possible.", {"type": "array", "items": {"type": "string"}}),
+    ("key_decisions", "List the decisions made during the meeting and their implications.", {"type": "array", "items": {"type": "string"}}),
+]
+
 class OllamaService:
     """Service for handling Ollama LLM interactions"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        llm_cache: Optional[LLMResponseCache] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        parse_stats: Optional[ParseStats] = None
+    ):
         # Ollama configuration
         self.ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
         self.model_name = os.getenv("OLLAMA_MODEL", "gemma3")
+        self.stream = os.getenv("OLLAMA_STREAM", "true").lower() == "true"
+        
+        # Keep the model resident between jobs (seconds); Ollama unloads after 5 minutes by default
+        self.keep_alive = int(os.getenv("OLLAMA_KEEP_ALIVE", "1800"))
+        self._last_used: Optional[float] = None
+        
+        # Constrain decoding to the MeetingAnalysis JSON schema; malformed output gets
+        # a few short repair passes instead of a full regeneration
+        self.structured_output = os.getenv("OLLAMA_STRUCTURED_OUTPUT", "true").lower() == "true"
+        self.repair_attempts = int(os.getenv("ANALYSIS_REPAIR_ATTEMPTS", "1"))
+        self.repair_max_tokens = int(os.getenv("ANALYSIS_REPAIR_MAX_TOKENS", "512"))
+        
+        # Ask separate focused questions over one chat; Ollama reuses the KV cache of
+        # the shared transcript prefix, so only the first pass pays the prefill
+        self.multi_pass = os.getenv("OLLAMA_MULTI_PASS", "false").lower() == "true"
+        self.multi_pass_runs = 0
+        self.prefill_tokens = 0
+        self.followup_prompt_tokens = 0
+        self.followup_prompt_tokens_uncached = 0
+        
+        # Ollama defaults to a 2048-token context and silently truncates beyond it
+        self.num_ctx = int(os.getenv("OLLAMA_NUM_CTX", os.getenv("ANALYSIS_CONTEXT_TOKENS", "8192")))
         
         # HTTP client for Ollama API
         self.client = httpx.AsyncClient(timeout=300.0)  # 5 minutes timeout
         
         # Thread pool for running Ollama in background
         self.executor = ThreadPoolExecutor(max_workers=2)
+        
+        # Shared response cache, slot scheduler and parse metrics (owned by the caller)
+        self.llm_cache = llm_cache
+        self.scheduler = scheduler
+        self.parse_stats = parse_stats or ParseStats()
     
-    async def analyze_transcript(self, transcript: str, meeting_title: Optional[str] = None) -> Dict[str, Any]:
+    async def analyze_transcript(
+        self,
+        transcript: str,
+        meeting_title: Optional[str] = None,
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_cache_hit: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
         """
         Analyze transcript using Ollama LLM
         
         Args:
             transcript: The meeting transcript to analyze
             meeting_title: Optional meeting title for context
+            on_partial: Optional callback receiving each top-level field
+                (summary, action_items, key_decisions) as soon as it is generated
+            on_cache_hit: Optional callback invoked when the result comes from
+                the LLM response cache and Ollama was never called
             
         Returns:
             Dict containing summary, action_items, and key_decisions
         """
+        if self.multi_pass:
+            return await self.analyze_transcript_multi_pass(transcript, meeting_title, on_partial, on_cache_hit)
+        
         try:
             logger.info(f"Starting transcript analysis with Ollama. Length: {len(transcript)} characters")
             
@@ -43,41 +102,384 @@ class OllamaService:
             payload = {
                 "model": self.model_name,
                 "prompt": prompt,
-                "stream": False,
+                "stream": self.stream,
+                "keep_alive": self.keep_alive,
                 "options": {
                     "temperature": 0.7,
                     "top_p": 0.9,
-                    "num_predict": 512
+                    "num_predict": 512,
+                    "num_ctx": self.num_ctx
                 }
             }
+            if self.structured_output:
+                payload["format"] = ANALYSIS_SCHEMA
+            
+            # Streaming does not change the generated text, so it is not part of the key
+            cache_key = None
+            if self.llm_cache:
+                cache_options = {**payload["options"], "format": payload.get("format")}
+                cache_key = self.llm_cache.make_key("ollama", self.model_name, prompt, cache_options)
+                cached_text = await self.llm_cache.get(cache_key)
+                if cached_text is not None:
+                    analysis = self._parse_analysis_response(cached_text)
+                    if on_partial:
+                        on_partial(analysis)
+                    if on_cache_hit:
+                        on_cache_hit()
+                    logger.info("Transcript analysis served from LLM response cache")
+                    return analysis
+            
+            analysis_text = await self._generate_scheduled(payload, on_partial)
+            
+            if not analysis_text:
+                raise Exception("No analysis received from Ollama")
+            
+            # Parse the JSON response from the LLM, repairing it if needed
+            analysis, usable = await self._parse_or_repair(analysis_text)
+            
+            # Only usable analyses are worth replaying
+            if cache_key and usable:
+                await self.llm_cache.put(cache_key, json.dumps(analysis))
+            
+            logger.info("Transcript analysis completed successfully with Ollama")
+            return analysis
+            
+        except SchedulerTimeoutError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in Ollama transcript analysis: {str(e)}")
+            raise Exception(f"Ollama analysis failed: {str(e)}")
+    
+    async def analyze_transcript_multi_pass(
+        self,
+        transcript: str,
+        meeting_title: Optional[str] = None,
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_cache_hit: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze transcript with one focused question per field over a single chat
+        
+        Every request resends the same leading messages (instructions and
+        transcript), so Ollama matches the prefix against the KV cache of the
+        previous turn and only prefills the new question. The passes hold one
+        scheduler slot so no other job evicts that cache in between.
+        
+        Args:
+            transcript: The meeting transcript to analyze
+            meeting_title: Optional meeting title for context
+            on_partial: Optional callback receiving each field as its pass completes
+            on_cache_hit: Optional callback invoked when the result comes from the LLM response cache
+            
+        Returns:
+            Dict containing summary, action_items, and key_decisions
+        """
+        try:
+            logger.info(f"Starting multi-pass transcript analysis with Ollama. Length: {len(transcript)} characters")
+            
+            messages = self._build_multi_pass_messages(transcript, meeting_title)
+            options = {
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "num_predict": 512,
+                "num_ctx": self.num_ctx
+            }
+            
+            cache_key = None
+            if self.llm_cache:
+                cache_options = {**options, "questions": [question for _, question, _ in MULTI_PASS_QUESTIONS]}
+                cache_key = self.llm_cache.make_key("ollama-chat", self.model_name, json.dumps(messages), cache_options)
+                cached_text = await self.llm_cache.get(cache_key)
+                if cached_text is not None:
+                    analysis = self._parse_analysis_response(cached_text)
+                    if on_partial:
+                        on_partial(analysis)
+                    if on_cache_hit:
+                        on_cache_hit()
+                    logger.info("Transcript analysis served from LLM response cache")
+                    return analysis
+            
+            if self.scheduler:
+                async with self.scheduler.slot("ollama", estimate_tokens(transcript)):
+                    fields, outcome = await self._run_passes(messages, options, on_partial)
+            else:
+                fields, outcome = await self._run_passes(messages, options, on_partial)
+            self._last_used = time.monotonic()
+            
+            generated_text = json.dumps(fields)
+            self.parse_stats.record_text(outcome, generated_text)
+            analysis = self._parse_analysis_response(generated_text)
+            if outcome == "unrecoverable":
+                analysis[PARSE_FAILED] = True
+            
+            if cache_key and outcome != "unrecoverable":
+                await self.llm_cache.put(cache_key, json.dumps(analysis))
+            
+            logger.info("Multi-pass transcript analysis completed successfully with Ollama")
+            return analysis
+            
+        except SchedulerTimeoutError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in Ollama multi-pass transcript analysis: {str(e)}")
+            raise Exception(f"Ollama analysis failed: {str(e)}")
+    
+    async def _run_passes(
+        self,
+        messages: List[Dict[str, str]],
+        options: Dict[str, Any],
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Ask each MULTI_PASS_QUESTIONS question in turn, appending answers to the chat
+        
+        Returns:
+            Tuple of the extracted fields and the parse outcome for ParseStats
+        """
+        fields: Dict[str, Any] = {}
+        outcome = "valid"
+        
+        for index, (field, question, answer_schema) in enumerate(MULTI_PASS_QUESTIONS):
+            messages.append({"role": "user", "content": f"{question} Respond with a JSON object with the key \"{field}\"."})
+            payload = {
+                "model": self.model_name,
+                "messages": messages,
+                "stream": False,
+                "keep_alive": self.keep_alive,
+                "format": {"type": "object", "properties": {field: answer_schema}, "required": [field]},
+                "options": options
+            }
             
-            # Make request to Ollama API
             response = await self.client.post(
-                f"{self.ollama_url}/api/generate",
+                f"{self.ollama_url}/api/chat",
                 json=payload,
                 headers={"Content-Type": "application/json"}
             )
-            
             if response.status_code != 200:
                 raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
             
             result = response.json()
+            content = result.get("message", {}).get("content", "")
+            messages.append({"role": "assistant", "content": content})
             
-            # Extract the generated text
-            analysis_text = result.get("response", "")
+            # Prefill accounting: prompt_eval_count only covers tokens not served from the KV cache
+            prompt_tokens = result.get("prompt_eval_count", 0)
+            if index == 0:
+                self.prefill_tokens += prompt_tokens
+            else:
+                self.followup_prompt_tokens += prompt_tokens
+                self.followup_prompt_tokens_uncached += estimate_tokens("".join(m["content"] for m in messages[:-1]))
             
-            if not analysis_text:
-                raise Exception("No analysis received from Ollama")
+            try:
+                value = json.loads(content)[field]
+            except (ValueError, KeyError, TypeError):
+                repaired = repair_json_text(content)
+                try:
+                    value = json.loads(repaired)[field] if repaired else None
+                    outcome = "local_repair" if value is not None and outcome == "valid" else outcome
+                except (ValueError, KeyError, TypeError):
+                    value = None
+                if value is None:
+                    logger.warning(f"Multi-pass answer for {field} could not be parsed")
+                    outcome = "unrecoverable"
+                    continue
+            
+            fields[field] = value
+            if on_partial:
+                on_partial({field: value})
+        
+        self.multi_pass_runs += 1
+        return fields, outcome
+    
+    def _build_multi_pass_messages(self, transcript: str, meeting_title: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Build the shared chat prefix (instructions and transcript) for multi-pass extraction
+        """
+        title_context = f"Meeting Title: {meeting_title}\n\n" if meeting_title else ""
+        
+        return [
+            {
+                "role": "system",
+                "content": "You are an expert meeting assistant. Answer questions about the meeting transcript you are given, using only what was said in the meeting."
+            },
+            {
+                "role": "user",
+                "content": f"{title_context}Meeting Transcript:\n{transcript}"
+            },
+            {
+                "role": "assistant",
+                "content": "I have read the transcript. What would you like to know?"
+            },
+        ]
+    
+    def multi_pass_stats(self) -> Dict[str, Any]:
+        """
+        Get prefill reuse metrics for multi-pass extraction
+        
+        Returns:
+            Dict: Runs, prompt tokens evaluated and tokens saved by prefix reuse
+        """
+        return {
+            "enabled": self.multi_pass,
+            "runs": self.multi_pass_runs,
+            "prefill_tokens": self.prefill_tokens,
+            "followup_prompt_tokens": self.followup_prompt_tokens,
+            "estimated_tokens_saved": max(0, self.followup_prompt_tokens_uncached - self.followup_prompt_tokens),
+        }
+    
+    async def _generate_scheduled(
+        self,
+        payload: Dict[str, Any],
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> str:
+        """Wait for a free generation slot, then generate; the HTTP timeout only starts once granted"""
+        if self.scheduler:
+            async with self.scheduler.slot("ollama", estimate_tokens(payload["prompt"])):
+                text = await self._generate(payload, on_partial)
+        else:
+            text = await self._generate(payload, on_partial)
+        
+        self._last_used = time.monotonic()
+        return text
+    
+    async def _parse_or_repair(self, analysis_text: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Validate generated text, falling back to bounded LLM repair passes
+        
+        A repair prompt contains only the malformed output and the schema, not the
+        transcript, and is capped at ANALYSIS_REPAIR_MAX_TOKENS.
+        
+        Args:
+            analysis_text: Raw generated text
             
-            # Parse the JSON response from the LLM
-            analysis = self._parse_analysis_response(analysis_text)
+        Returns:
+            Tuple of the analysis dict and whether it is usable (False for the fallback)
+        """
+        try:
+            analysis, repaired = parse_analysis(analysis_text)
+            self.parse_stats.record_text("local_repair" if repaired else "valid", analysis_text)
+            return analysis, True
+        except AnalysisParseError as e:
+            error = e
+        
+        logger.warning(f"Ollama output failed to parse ({str(error)}); attempting repair")
+        
+        broken_text = analysis_text
+        repair_tokens = 0
+        for attempt in range(self.repair_attempts):
+            payload = {
+                "model": self.model_name,
+                "prompt": build_repair_prompt(broken_text, error),
+                "stream": self.stream,
+                "keep_alive": self.keep_alive,
+                "format": ANALYSIS_SCHEMA,
+                "options": {
+                    "temperature": 0.0,
+                    "num_predict": self.repair_max_tokens,
+                    "num_ctx": self.num_ctx
+                }
+            }
+            try:
+                repair_text = await self._generate_scheduled(payload)
+            except Exception as e:
+                logger.warning(f"Repair pass {attempt + 1} failed: {str(e)}")
+                break
             
-            logger.info("Transcript analysis completed successfully with Ollama")
-            return analysis
+            repair_tokens += estimate_tokens(repair_text)
+            try:
+                analysis, _ = parse_analysis(repair_text)
+                self.parse_stats.record_text("llm_repair", analysis_text, repair_tokens)
+                return analysis, True
+            except AnalysisParseError as e:
+                error = e
+                broken_text = repair_text
+        
+        self.parse_stats.record_text("unrecoverable", analysis_text, repair_tokens)
+        return self._parse_analysis_response(analysis_text), False
+    
+    async def _generate(
+        self,
+        payload: Dict[str, Any],
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> str:
+        """
+        Run one /api/generate request and return the generated text
+        
+        Args:
+            payload: /api/generate request body
+            on_partial: Optional callback for each completed top-level field (streaming only)
             
-        except Exception as e:
-            logger.error(f"Error in Ollama transcript analysis: {str(e)}")
-            raise Exception(f"Ollama analysis failed: {str(e)}")
+        Returns:
+            str: Generated text
+        """
+        if self.stream:
+            return await self._generate_streaming(payload, on_partial)
+        
+        # Make request to Ollama API
+        response = await self.client.post(
+            f"{self.ollama_url}/api/generate",
+            json=payload,
+            headers={"Content-Type": "application/json"}
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+        
+        result = response.json()
+        
+        # Extract the generated text
+        return result.get("response", "")
+    
+    async def _generate_streaming(
+        self,
+        payload: Dict[str, Any],
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> str:
+        """
+        Consume Ollama's NDJSON token stream and stop at the end of the JSON object
+        
+        Closing the response as soon as the object's final brace arrives makes
+        Ollama abort the generation instead of running on to num_predict.
+        
+        Args:
+            payload: /api/generate request body with "stream": true
+            on_partial: Optional callback for each completed top-level field
+            
+        Returns:
+            str: The JSON object text, or everything generated if it never closed
+        """
+        parser = IncrementalJSONParser()
+        
+        async with self.client.stream(
+            "POST",
+            f"{self.ollama_url}/api/generate",
+            json=payload,
+            headers={"Content-Type": "application/json"}
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise Exception(f"Ollama API error: {response.status_code} - {body.decode(errors='replace')}")
+            
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise Exception(f"Ollama API error: {chunk['error']}")
+                
+                completed = parser.feed(chunk.get("response", ""))
+                if completed and on_partial:
+                    on_partial(completed)
+                
+                if parser.complete:
+                    logger.info(f"Ollama JSON object complete after {len(parser.buffer)} characters; stopping generation")
+                    break
+                
+                if chunk.get("done"):
+                    break
+        
+        return parser.json_text or parser.buffer
     
     def _build_analysis_prompt(self, transcript: str, meeting_title: Optional[str] = None) -> str:
         """
@@ -109,48 +511,62 @@ Return only the JSON object, no additional text:"""
         Parse the LLM response and extract structured data
         """
         try:
-            # Clean the response text
-            cleaned_text = response_text.strip()
-            
-            # Try to find JSON in the response
-            if cleaned_text.startswith("{"):
-                json_str = cleaned_text
-            else:
-                # Look for JSON between backticks or other markers
-                import re
-                json_match = re.search(r'\{.*\}', cleaned_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    raise Exception("No valid JSON found in response")
-            
-            # Parse the JSON
-            analysis = json.loads(json_str)
-            
-            # Validate required fields
-            required_fields = ["summary", "action_items", "key_decisions"]
-            for field in required_fields:
-                if field not in analysis:
-                    analysis[field] = [] if field in ["action_items", "key_decisions"] else ""
+            return self._extract_analysis_json(response_text)
             
-            return analysis
-            
-        except json.JSONDecodeError as e:
+        except AnalysisParseError as e:
             logger.error(f"Failed to parse JSON response: {str(e)}")
             # Fallback: return basic structure
             return {
                 "summary": "Analysis could not be parsed properly.",
                 "action_items": [],
-                "key_decisions": []
+                "key_decisions": [],
+                PARSE_FAILED: True
             }
         except Exception as e:
             logger.error(f"Error parsing analysis response: {str(e)}")
             return {
                 "summary": "Analysis failed to process properly.",
                 "action_items": [],
-                "key_decisions": []
+                "key_decisions": [],
+                PARSE_FAILED: True
             }
     
+    def _extract_analysis_json(self, response_text: str) -> Dict[str, Any]:
+        """
+        Extract the analysis JSON object from the LLM response, raising if there is none
+        """
+        return parse_analysis(response_text)[0]
+    
+    async def warm_up(self) -> bool:
+        """
+        Load the model into memory ahead of the first analysis
+        
+        An empty prompt makes Ollama load the model and return without generating.
+        Skipped if the model was used recently enough to still be resident.
+        
+        Returns:
+            bool: True if the model was loaded (or is already warm)
+        """
+        if self._last_used is not None and time.monotonic() - self._last_used < self.keep_alive / 2:
+            return True
+        
+        try:
+            response = await self.client.post(
+                f"{self.ollama_url}/api/generate",
+                json={"model": self.model_name, "prompt": "", "keep_alive": self.keep_alive},
+                headers={"Content-Type": "application/json"}
+            )
+            if response.status_code != 200:
+                logger.warning(f"Ollama warm-up failed: {response.status_code} - {response.text}")
+                return False
+            
+            self._last_used = time.monotonic()
+            logger.info(f"Ollama model {self.model_name} loaded (keep_alive {self.keep_alive}s)")
+            return True
+        except Exception as e:
+            logger.warning(f"Ollama warm-up failed: {str(e)}")
+            return False
+    
     async def test_connection(self) -> bool:
         """
         Test connection to Ollama service
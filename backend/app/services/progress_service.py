@@ -0,0 +1,160 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Set, Optional
+
+logger = logging.getLogger(__name__)
+
+class ProgressService:
+    """In-process pub/sub of job progress events for live streaming to clients"""
+    
+    TERMINAL_EVENTS = {"completed", "failed"}
+    
+    def __init__(self):
+        # Per-subscriber buffer; a client that falls this far behind loses events
+        self.max_buffered_events = int(os.getenv("PROGRESS_MAX_BUFFERED_EVENTS", "1000"))
+        
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        
+        # Replay state so late subscribers see the current stage and transcript so far
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._segments: Dict[str, List[Dict[str, Any]]] = {}
+        self._partials: Dict[str, Dict[str, Any]] = {}
+        
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _event(self, job_id: str, event: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"job_id": job_id, "event": event, "timestamp": time.time(), **data}
+    
+    def _broadcast(self, job_id: str, message: Dict[str, Any]):
+        for queue in self._subscribers.get(job_id, ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping progress event for slow subscriber of job {job_id}")
+    
+    def publish(self, job_id: str, event: str, **data):
+        """
+        Publish an event to every subscriber of a job (must run on the event loop)
+        
+        Args:
+            job_id: Unique job identifier
+            event: Event name (stage, segment, partial, completed, failed)
+            **data: Event payload
+        """
+        self._loop = self._loop or asyncio.get_running_loop()
+        message = self._event(job_id, event, data)
+        
+        if event == "segment":
+            self._segments.setdefault(job_id, []).append(message)
+        elif event == "partial":
+            self._partials.setdefault(job_id, {}).update(data.get("fields", {}))
+        else:
+            self._latest[job_id] = message
+        
+        self._broadcast(job_id, message)
+        
+        if event in self.TERMINAL_EVENTS:
+            self._latest.pop(job_id, None)
+            self._segments.pop(job_id, None)
+            self._partials.pop(job_id, None)
+    
+    def reset(self, job_id: str):
+        """
+        Drop a job's replayed segments and partial analysis
+        
+        Called when a job starts transcribing again (a retry, or a discarded
+        backend attempt) so late subscribers never see a stale transcript.
+        
+        Args:
+            job_id: Unique job identifier
+        """
+        self._segments.pop(job_id, None)
+        self._partials.pop(job_id, None)
+    
+    def publish_threadsafe(self, job_id: str, event: str, **data):
+        """
+        Publish an event from a worker thread
+        
+        Args:
+            job_id: Unique job identifier
+            event: Event name
+            **data: Event payload
+        """
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(lambda: self.publish(job_id, event, **data))
+    
+    def stage(self, job_id: str, stage: str, percent: float):
+        """
+        Publish a stage transition
+        
+        Args:
+            job_id: Unique job identifier
+            stage: Pipeline stage name
+            percent: Overall completion percentage
+        """
+        self.publish(job_id, "stage", stage=stage, percent=round(percent, 1))
+    
+    def snapshot(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the current stage and partial analysis of a running job
+        
+        Args:
+            job_id: Unique job identifier
+            
+        Returns:
+            Dict: stage, percent and partial fields, or None if nothing is tracked
+        """
+        latest = self._latest.get(job_id)
+        partial = self._partials.get(job_id)
+        if latest is None and partial is None:
+            return None
+        return {
+            "stage": latest.get("stage") if latest else None,
+            "percent": latest.get("percent") if latest else None,
+            "partial": dict(partial or {})
+        }
+    
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """
+        Subscribe to a job's events, replaying its current state first
+        
+        Args:
+            job_id: Unique job identifier
+        
+        Returns:
+            asyncio.Queue: Queue receiving event dicts
+        """
+        self._loop = self._loop or asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_buffered_events)
+        
+        replay = []
+        if job_id in self._latest:
+            replay.append(self._latest[job_id])
+        replay.extend(self._segments.get(job_id, []))
+        if job_id in self._partials:
+            replay.append(self._event(job_id, "partial", {"fields": dict(self._partials[job_id])}))
+        
+        # Keep the most recent events if the replay alone exceeds the buffer
+        for message in replay[-self.max_buffered_events:]:
+            queue.put_nowait(message)
+        
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+    
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        """
+        Stop delivering a job's events to a queue
+        
+        Args:
+            job_id: Unique job identifier
+            queue: Queue returned by subscribe
+        """
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[job_id]
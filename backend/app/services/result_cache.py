@@ -0,0 +1,113 @@
+import os
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """Content-addressed cache mapping recordings to already-processed meetings"""
+    
+    def __init__(self):
+        # Maximum number of recordings remembered before least-recently-used eviction
+        self.max_entries = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+        self.enabled = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+        
+        # key -> meeting_id whose stored transcript and analysis can be reused
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = Lock()
+        
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+    
+    @staticmethod
+    def make_key(content_hash: str, whisper_model: str, analysis_model: str) -> str:
+        """
+        Build the cache key for a recording and the models that processed it
+        
+        Args:
+            content_hash: SHA-256 of the uploaded recording
+            whisper_model: Whisper model used for transcription
+            analysis_model: LLM used for analysis
+        
+        Returns:
+            str: Cache key
+        """
+        return f"{content_hash}:{whisper_model}:{analysis_model}"
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up the meeting that already holds results for this key
+        
+        Args:
+            key: Cache key from make_key
+        
+        Returns:
+            str: meeting_id of the cached results or None on a miss
+        """
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            meeting_id = self._entries.get(key)
+            if meeting_id is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return meeting_id
+    
+    def put(self, key: str, meeting_id: str) -> None:
+        """
+        Remember which meeting holds the results for this key
+        
+        Args:
+            key: Cache key from make_key
+            meeting_id: Meeting whose stored results can be reused
+        """
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            self._entries[key] = meeting_id
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key: str) -> None:
+        """
+        Drop an entry whose meeting is gone or unusable
+        
+        Args:
+            key: Cache key from make_key
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.stale += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters
+        
+        Returns:
+            Dict: entries, hits, misses, evictions, stale and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stale": self.stale,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
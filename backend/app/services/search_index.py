@@ -0,0 +1,246 @@
+import os
+import re
+import html
+import time
+import sqlite3
+import logging
+from threading import Lock
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Indexed fields and their BM25 weights; title and summary matches outrank transcript ones
+FIELD_WEIGHTS = (
+    ("title", 5.0),
+    ("summary", 3.0),
+    ("action_items", 2.0),
+    ("key_decisions", 2.0),
+    ("transcript", 1.0),
+)
+FIELDS = tuple(field for field, _ in FIELD_WEIGHTS)
+
+# Private-use characters delimit matches inside snippets; the text is HTML-escaped
+# before they are turned into <mark> tags, so stored text can never inject markup
+MATCH_START = "\ue000"
+MATCH_END = "\ue001"
+
+class SearchIndex:
+    """
+    Full-text index of meetings on SQLite FTS5 with BM25 ranking
+    
+    Kept in its own file so it works the same whichever backend stores the
+    meetings. search_docs maps each meeting id to the FTS rowid, so a meeting
+    is re-indexed by rowid without scanning the index.
+    """
+    
+    def __init__(self):
+        # Search configuration
+        self.enabled = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+        self.db_path = os.getenv("SEARCH_INDEX_PATH", "search.db")
+        self.snippet_tokens = int(os.getenv("SEARCH_SNIPPET_TOKENS", "16"))
+        
+        self._lock = Lock()
+        
+        # Counters
+        self.queries = 0
+        self.total_query_time = 0.0
+        self.indexed = 0
+        
+        self._conn = None
+        if self.enabled:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS search_docs (meeting_id TEXT PRIMARY KEY)")
+            self._conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5({', '.join(FIELDS)}, tokenize='porter unicode61')"
+            )
+    
+    @staticmethod
+    def _to_text(value: Any) -> str:
+        if isinstance(value, list):
+            value = "\n".join(str(item) for item in value)
+        return (value or "").replace(MATCH_START, "").replace(MATCH_END, "")
+    
+    @staticmethod
+    def _highlight(snippet: str) -> str:
+        """HTML-escape a snippet, then wrap its matches in <mark></mark>"""
+        return html.escape(snippet or "").replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+    
+    @staticmethod
+    def build_match_query(query: str) -> Optional[str]:
+        """
+        Turn free text into an FTS5 query matching every word
+        
+        Each word is quoted so user input can never be FTS5 syntax; the last
+        one also matches as a prefix so partially typed words find results.
+        
+        Args:
+            query: User search text
+        
+        Returns:
+            str: FTS5 MATCH expression, or None if the text has no words
+        """
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += "*"
+        return " ".join(terms)
+    
+    def index_meeting(self, meeting_id: str, fields: Dict[str, Any]):
+        """
+        Add or update a meeting's indexed fields
+        
+        Fields not given keep their indexed value, so the title can be indexed
+        at creation and the results added once analysis finishes.
+        
+        Args:
+            meeting_id: Unique identifier for the meeting
+            fields: Any of FIELDS
+        """
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT rowid FROM search_docs WHERE meeting_id = ?", (meeting_id,)).fetchone()
+                if row is None:
+                    rowid = self._conn.execute("INSERT INTO search_docs (meeting_id) VALUES (?)", (meeting_id,)).lastrowid
+                    current = {field: "" for field in FIELDS}
+                else:
+                    rowid = row[0]
+                    existing = self._conn.execute(
+                        f"SELECT {', '.join(FIELDS)} FROM meetings_fts WHERE rowid = ?", (rowid,)
+                    ).fetchone()
+                    current = dict(zip(FIELDS, existing)) if existing else {field: "" for field in FIELDS}
+                    self._conn.execute("DELETE FROM meetings_fts WHERE rowid = ?", (rowid,))
+                
+                for field in FIELDS:
+                    if field in fields:
+                        current[field] = self._to_text(fields[field])
+                
+                self._conn.execute(
+                    f"INSERT INTO meetings_fts (rowid, {', '.join(FIELDS)}) VALUES (?, {', '.join('?' for _ in FIELDS)})",
+                    (rowid,) + tuple(current[field] for field in FIELDS)
+                )
+                self._conn.execute("COMMIT")
+                self.indexed += 1
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def remove_meeting(self, meeting_id: str):
+        """
+        Drop a meeting from the index
+        
+        Args:
+            meeting_id: Unique identifier for the meeting
+        """
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            row = self._conn.execute("SELECT rowid FROM search_docs WHERE meeting_id = ?", (meeting_id,)).fetchone()
+            if row is None:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM meetings_fts WHERE rowid = ?", (row[0],))
+            self._conn.execute("DELETE FROM search_docs WHERE rowid = ?", (row[0],))
+            self._conn.execute("COMMIT")
+    
+    def missing(self, meeting_ids: List[str]) -> List[str]:
+        """
+        Filter meeting ids down to those not in the index yet
+        
+        Args:
+            meeting_ids: Candidate meeting ids
+        
+        Returns:
+            List: Ids without an index entry
+        """
+        if not self.enabled or not meeting_ids:
+            return []
+        with self._lock:
+            indexed = {row[0] for row in self._conn.execute(
+                f"SELECT meeting_id FROM search_docs WHERE meeting_id IN ({', '.join('?' for _ in meeting_ids)})",
+                meeting_ids
+            )}
+        return [meeting_id for meeting_id in meeting_ids if meeting_id not in indexed]
+    
+    def clear(self):
+        """Drop every indexed meeting (before a full rebuild)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM meetings_fts")
+            self._conn.execute("DELETE FROM search_docs")
+            self._conn.execute("COMMIT")
+    
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Find meetings matching every word of the query, best first
+        
+        Args:
+            query: User search text
+            limit: Maximum hits to return
+        
+        Returns:
+            List: Hits with meeting_id, title, BM25 score and an HTML-escaped
+            snippet with matches wrapped in <mark></mark>
+        """
+        match = self.build_match_query(query)
+        if not self.enabled or match is None:
+            return []
+        
+        weights = ", ".join(str(weight) for _, weight in FIELD_WEIGHTS)
+        started = time.perf_counter()
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT d.meeting_id, f.title, bm25(meetings_fts, {weights}) AS score,
+                       snippet(meetings_fts, -1, ?, ?, '…', ?)
+                FROM meetings_fts f JOIN search_docs d ON d.rowid = f.rowid
+                WHERE meetings_fts MATCH ?
+                ORDER BY score
+                LIMIT ?
+                """,
+                (MATCH_START, MATCH_END, self.snippet_tokens, match, limit)
+            ).fetchall()
+            self.queries += 1
+            self.total_query_time += time.perf_counter() - started
+        
+        # FTS5's bm25() is lower-is-better; report it as a positive relevance score
+        return [
+            {"meeting_id": meeting_id, "title": title, "score": round(-score, 6), "snippet": self._highlight(snippet)}
+            for meeting_id, title, score, snippet in rows
+        ]
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index size and query latency
+        
+        Returns:
+            Dict: Document count, index updates and average query time
+        """
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM search_docs").fetchone()[0]
+            return {
+                "enabled": True,
+                "documents": documents,
+                "index_updates": self.indexed,
+                "queries": self.queries,
+                "avg_query_ms": 1000.0 * self.total_query_time / self.queries if self.queries else 0.0,
+            }
+    
+    def close(self):
+        """Close the index"""
+        if self._conn is not None:
+            with self._lock:
+                self.enabled = False
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,502 @@
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from .map_reduce_analyzer import split_sentences
+
+logger = logging.getLogger(__name__)
+
+def chunk_passages(transcript: str, chunk_words: int = 120) -> List[str]:
+    """
+    Split a transcript into passages of about chunk_words words for embedding
+    
+    Passages end on sentence boundaries and repeat the previous passage's
+    last sentence, so a statement split across two passages is still found.
+    Run-on text without punctuation is cut every chunk_words words.
+    
+    Args:
+        transcript: Full transcript
+        chunk_words: Target passage length in words
+    
+    Returns:
+        List: Passages in transcript order
+    """
+    sentences = []
+    for sentence in split_sentences(transcript):
+        words = sentence.split()
+        for start in range(0, len(words), chunk_words):
+            sentences.append(" ".join(words[start:start + chunk_words]))
+    
+    passages = []
+    current: List[str] = []
+    current_words = 0
+    for sentence in sentences:
+        current.append(sentence)
+        current_words += len(sentence.split())
+        if current_words >= chunk_words:
+            passages.append(" ".join(current))
+            current = [sentence] if len(current) > 1 else []
+            current_words = len(sentence.split()) if current else 0
+    
+    # The tail is kept unless it is only the overlap sentence already indexed
+    if current and not (passages and len(current) == 1 and passages[-1].endswith(current[0])):
+        passages.append(" ".join(current))
+    return passages
+
+class SemanticIndex:
+    """
+    Embedding index of transcript passages for "find related meetings" queries
+    
+    Passages are embedded with a local sentence-transformers model on CPU and
+    their normalized vectors appended to a float16 (or float32) matrix in a
+    memory-mapped file, so the index lives in the page cache rather than the
+    heap. Passage text and row -> meeting mapping are kept in SQLite next to it.
+    
+    Queries score every row with a blocked matrix-vector product. Once the
+    index holds SEMANTIC_ANN_THRESHOLD passages, an IVF index (spherical
+    k-means centroids over the vectors) is built and only rows assigned to
+    the SEMANTIC_ANN_NPROBE closest centroids are scored; it is rebuilt when
+    the index has doubled since.
+    """
+    
+    def __init__(self):
+        # Semantic search configuration
+        self.enabled = os.getenv("SEMANTIC_SEARCH_ENABLED", "true").lower() == "true"
+        self.model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self.index_dir = os.getenv("SEMANTIC_INDEX_PATH", "semantic_index")
+        self.dtype = np.dtype(os.getenv("SEMANTIC_INDEX_DTYPE", "float16"))
+        self.chunk_words = int(os.getenv("SEMANTIC_CHUNK_WORDS", "120"))
+        self.batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+        self.ann_threshold = int(os.getenv("SEMANTIC_ANN_THRESHOLD", "50000"))
+        self.ann_nprobe = int(os.getenv("SEMANTIC_ANN_NPROBE", "8"))
+        self.block_rows = int(os.getenv("SEMANTIC_SCAN_BLOCK_ROWS", "65536"))
+        self.min_score = float(os.getenv("SEMANTIC_MIN_SCORE", "0.2"))
+        
+        # sentence-transformers is imported with the model, so it only loads when semantic search is on
+        self._model = None
+        self._model_lock = Lock()
+        self._lock = Lock()
+        
+        # Writes (embedding + append) are serialized; queries run alongside them
+        self.write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self.query_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("SEMANTIC_QUERY_WORKERS", "2")), thread_name_prefix="semantic-query"
+        )
+        
+        # Row state: vectors[:count] are in use; row_meeting[row] is the meeting key or -1 once removed
+        self.dim = 0
+        self.count = 0
+        self._vectors: Optional[np.memmap] = None
+        self._row_meeting = np.zeros(0, dtype=np.int32)
+        
+        # IVF state: centroids, centroid of every row, and the row count it was built at
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._ann_built_at = 0
+        
+        # Counters
+        self.queries = 0
+        self.ann_queries = 0
+        self.total_query_time = 0.0
+        self.embedded_passages = 0
+        self.total_embed_time = 0.0
+        
+        self._conn = None
+        if self.enabled:
+            os.makedirs(self.index_dir, exist_ok=True)
+            self._vectors_path = os.path.join(self.index_dir, "vectors.bin")
+            self._conn = sqlite3.connect(
+                os.path.join(self.index_dir, "passages.db"), check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meetings (key INTEGER PRIMARY KEY, meeting_id TEXT UNIQUE NOT NULL)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS passages (
+                    row INTEGER PRIMARY KEY,
+                    meeting_key INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    removed INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_passages_meeting ON passages(meeting_key)")
+            self._load()
+            
+            # Queries read passage text on their own connection, never inside a write transaction
+            self._read_conn = sqlite3.connect(
+                os.path.join(self.index_dir, "passages.db"), check_same_thread=False, isolation_level=None
+            )
+            self._read_lock = Lock()
+    
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _load(self):
+        """Open the existing vector file, discarding it if it was built with another model or dtype"""
+        model, dtype, dim = self._meta("model"), self._meta("dtype"), self._meta("dim")
+        if dim is None:
+            return
+        if model != self.model_name or dtype != self.dtype.name:
+            logger.warning(f"Semantic index was built with {model} ({dtype}); rebuilding for {self.model_name} ({self.dtype.name})")
+            self._conn.execute("DELETE FROM passages")
+            self._conn.execute("DELETE FROM meetings")
+            self._conn.execute("DELETE FROM meta")
+            if os.path.exists(self._vectors_path):
+                os.remove(self._vectors_path)
+            return
+        
+        self.dim = int(dim)
+        rows = self._conn.execute("SELECT row, meeting_key, removed FROM passages ORDER BY row").fetchall()
+        self.count = rows[-1][0] + 1 if rows else 0
+        capacity = os.path.getsize(self._vectors_path) // (self.dim * self.dtype.itemsize) if os.path.exists(self._vectors_path) else 0
+        self.count = min(self.count, capacity)
+        if capacity:
+            self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+        self._row_meeting = np.full(max(capacity, 1), -1, dtype=np.int32)
+        for row, meeting_key, removed in rows:
+            if row < self.count and not removed:
+                self._row_meeting[row] = meeting_key
+        logger.info(f"Loaded semantic index: {self.count} passages, {self.dim} dimensions")
+    
+    def _get_model(self):
+        with self._model_lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                
+                logger.info(f"Loading embedding model {self.model_name}")
+                self._model = SentenceTransformer(self.model_name, device="cpu")
+            return self._model
+    
+    def _warm_up(self):
+        try:
+            self._get_model()
+            self._ensure_ann()
+        except Exception as e:
+            logger.warning(f"Semantic index warm-up failed: {str(e)}")
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into unit-length float32 vectors
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            np.ndarray: Array of shape (len(texts), dim)
+        """
+        vectors = self._get_model().encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return np.asarray(vectors, dtype=np.float32)
+    
+    def _reserve(self, rows: int):
+        """Grow the vector file (doubling) so `rows` more vectors fit"""
+        capacity = self._vectors.shape[0] if self._vectors is not None else 0
+        needed = self.count + rows
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, 2 * capacity, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * self.dtype.itemsize)
+        vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(new_capacity, self.dim))
+        row_meeting = np.full(new_capacity, -1, dtype=np.int32)
+        row_meeting[:self.count] = self._row_meeting[:self.count]
+        assignments = np.zeros(new_capacity, dtype=np.int32)
+        assignments[:self.count] = self._assignments[:self.count] if len(self._assignments) else 0
+        
+        # Queries snapshot these references, so swapping them is safe mid-query
+        with self._lock:
+            self._vectors = vectors
+            self._row_meeting = row_meeting
+            self._assignments = assignments
+    
+    def _meeting_key(self, meeting_id: str) -> int:
+        row = self._conn.execute("SELECT key FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchone()
+        if row:
+            return row[0]
+        return self._conn.execute("INSERT INTO meetings (meeting_id) VALUES (?)", (meeting_id,)).lastrowid
+    
+    def _remove_rows(self, meeting_id: str):
+        row = self._conn.execute("SELECT key FROM meetings WHERE meeting_id = ?", (meeting_id,)).fetchone()
+        if row is None:
+            return
+        rows = [r[0] for r in self._conn.execute(
+            "SELECT row FROM passages WHERE meeting_key = ? AND removed = 0", (row[0],)
+        )]
+        self._conn.execute("UPDATE passages SET removed = 1 WHERE meeting_key = ?", (row[0],))
+        if rows:
+            self._row_meeting[np.array(rows, dtype=np.int64)] = -1
+    
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+    
+    def _build_ann(self):
+        """Cluster the live vectors with spherical k-means and assign every row to a centroid"""
+        count = self.count
+        live = np.flatnonzero(self._row_meeting[:count] >= 0)
+        if len(live) < self.ann_threshold:
+            return
+        
+        started = time.perf_counter()
+        nlist = int(np.sqrt(len(live)))
+        rng = np.random.default_rng(0)
+        sample = self._vectors[np.sort(rng.choice(live, size=min(len(live), nlist * 64), replace=False))].astype(np.float32)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(10):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            # Empty clusters keep their previous centroid
+            filled = np.bincount(labels, minlength=nlist) > 0
+            centroids[filled] = sums[filled]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        
+        assignments = np.zeros(len(self._row_meeting), dtype=np.int32)
+        for start in range(0, count, self.block_rows):
+            block = self._vectors[start:min(start + self.block_rows, count)].astype(np.float32)
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        
+        with self._lock:
+            self._centroids = centroids
+            self._assignments = assignments
+            self._ann_built_at = count
+        logger.info(f"Built IVF index over {count} passages ({nlist} lists) in {time.perf_counter() - started:.1f}s")
+    
+    def _ensure_ann(self):
+        if self.count >= self.ann_threshold and (self._centroids is None or self.count >= 2 * self._ann_built_at):
+            self._build_ann()
+    
+    def _index_meeting(self, meeting_id: str, transcript: str) -> int:
+        passages = chunk_passages(transcript, self.chunk_words)
+        # Re-indexing replaces a meeting's passages (e.g. a resumed job)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._remove_rows(meeting_id)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        if not passages:
+            return 0
+        
+        started = time.perf_counter()
+        vectors = self.embed(passages)
+        self.total_embed_time += time.perf_counter() - started
+        self.embedded_passages += len(passages)
+        
+        if not self.dim:
+            self.dim = vectors.shape[1]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("model", self.model_name), ("dtype", self.dtype.name), ("dim", str(self.dim))]
+            )
+        
+        self._reserve(len(passages))
+        first = self.count
+        self._vectors[first:first + len(passages)] = vectors.astype(self.dtype)
+        self._vectors.flush()
+        
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            meeting_key = self._meeting_key(meeting_id)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO passages (row, meeting_key, text) VALUES (?, ?, ?)",
+                [(first + i, meeting_key, passage) for i, passage in enumerate(passages)]
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        
+        if self._centroids is not None:
+            self._assignments[first:first + len(passages)] = self._assign(vectors)
+        self._row_meeting[first:first + len(passages)] = meeting_key
+        with self._lock:
+            self.count = first + len(passages)
+        
+        self._ensure_ann()
+        return len(passages)
+    
+    def _remove_meeting(self, meeting_id: str):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._remove_rows(meeting_id)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+    
+    def _search(self, query: str, limit: int, passages_per_meeting: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            count, vectors, row_meeting = self.count, self._vectors, self._row_meeting
+            centroids, assignments = self._centroids, self._assignments
+        if not count or not query.strip():
+            return []
+        
+        started = time.perf_counter()
+        q = self.embed([query])[0]
+        
+        if centroids is not None:
+            # Approximate: score only the rows in the closest IVF lists
+            probes = np.argsort(-(centroids @ q))[:self.ann_nprobe]
+            rows = np.flatnonzero(np.isin(assignments[:count], probes) & (row_meeting[:count] >= 0))
+            scores = vectors[rows].astype(np.float32) @ q if len(rows) else np.zeros(0, dtype=np.float32)
+            self.ann_queries += 1
+        else:
+            # Exact: blocked scan so float16 rows are widened a block at a time
+            rows = np.arange(count)
+            scores = np.empty(count, dtype=np.float32)
+            for start in range(0, count, self.block_rows):
+                end = min(start + self.block_rows, count)
+                scores[start:end] = vectors[start:end].astype(np.float32) @ q
+            scores[row_meeting[:count] < 0] = -np.inf
+        
+        # Take enough top passages to fill `limit` meetings, then group them
+        k = min(len(scores), limit * passages_per_meeting * 4)
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        hits: Dict[int, List[tuple]] = {}
+        for index in top:
+            if not np.isfinite(scores[index]) or scores[index] < self.min_score:
+                break
+            row = int(rows[index])
+            meeting_key = int(row_meeting[row])
+            if meeting_key < 0:
+                continue
+            if meeting_key not in hits and len(hits) >= limit:
+                continue
+            passages = hits.setdefault(meeting_key, [])
+            if len(passages) < passages_per_meeting:
+                passages.append((row, float(scores[index])))
+        
+        wanted = [row for passages in hits.values() for row, _ in passages]
+        if not wanted:
+            return []
+        with self._read_lock:
+            texts = dict(self._read_conn.execute(
+                f"SELECT row, text FROM passages WHERE row IN ({', '.join('?' for _ in wanted)})", wanted
+            ).fetchall())
+            meeting_ids = dict(self._read_conn.execute(
+                f"SELECT key, meeting_id FROM meetings WHERE key IN ({', '.join('?' for _ in hits)})", list(hits)
+            ).fetchall())
+        
+        self.queries += 1
+        self.total_query_time += time.perf_counter() - started
+        
+        return [
+            {
+                "meeting_id": meeting_ids[meeting_key],
+                "score": round(passages[0][1], 4),
+                "passages": [{"text": texts.get(row, ""), "score": round(score, 4)} for row, score in passages],
+            }
+            for meeting_key, passages in hits.items()
+            if meeting_key in meeting_ids
+        ]
+    
+    async def index_meeting(self, meeting_id: str, transcript: str) -> int:
+        """
+        Chunk, embed and store a meeting's transcript, replacing earlier passages
+        
+        Args:
+            meeting_id: Unique identifier for the meeting
+            transcript: Full transcript
+        
+        Returns:
+            int: Number of passages indexed
+        """
+        if not self.enabled:
+            return 0
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.write_executor, self._index_meeting, meeting_id, transcript)
+    
+    async def remove_meeting(self, meeting_id: str):
+        """
+        Drop a meeting's passages from search results
+        
+        Args:
+            meeting_id: Unique identifier for the meeting
+        """
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.write_executor, self._remove_meeting, meeting_id)
+    
+    async def search(self, query: str, limit: int = 5, passages_per_meeting: int = 3) -> List[Dict[str, Any]]:
+        """
+        Find the meetings whose passages are closest in meaning to the query
+        
+        Args:
+            query: Natural-language question or phrase
+            limit: Maximum meetings to return
+            passages_per_meeting: Matching passages returned per meeting
+        
+        Returns:
+            List: Meetings (best first) with their cosine score and best passages
+        """
+        if not self.enabled:
+            return []
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.query_executor, self._search, query, limit, passages_per_meeting)
+    
+    def start(self):
+        """Load the embedding model and build the IVF index off the request path"""
+        if self.enabled:
+            self.write_executor.submit(self._warm_up)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index size, embedding throughput and query latency
+        
+        Returns:
+            Dict: Semantic index metrics
+        """
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            live = int(np.count_nonzero(self._row_meeting[:self.count] >= 0))
+            return {
+                "enabled": True,
+                "model": self.model_name,
+                "dtype": self.dtype.name,
+                "dim": self.dim,
+                "passages": live,
+                "rows": self.count,
+                "index_mb": round(self.count * self.dim * self.dtype.itemsize / (1024 * 1024), 2),
+                "ann_lists": len(self._centroids) if self._centroids is not None else 0,
+                "ann_built_at": self._ann_built_at,
+                "embedded_passages": self.embedded_passages,
+                "avg_embed_ms_per_passage": 1000.0 * self.total_embed_time / self.embedded_passages if self.embedded_passages else 0.0,
+                "queries": self.queries,
+                "ann_queries": self.ann_queries,
+                "avg_query_ms": 1000.0 * self.total_query_time / self.queries if self.queries else 0.0,
+            }
+    
+    def close(self):
+        """Finish pending writes and close the index"""
+        self.write_executor.shutdown(wait=True)
+        self.query_executor.shutdown(wait=True)
+        if self._conn is not None:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self.enabled = False
+            self._conn.close()
+            self._read_conn.close()
+            self._conn = None
@@ -0,0 +1,299 @@
+import os
+import json
+import queue
+import sqlite3
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Mirrors the Supabase schema logged by DatabaseService.create_tables
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    transcript TEXT,
+    summary TEXT,
+    action_items TEXT DEFAULT '[]',
+    key_decisions TEXT DEFAULT '[]',
+    error_message TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_meetings_created_at ON meetings(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_meetings_status ON meetings(status);
+"""
+
+COLUMNS = (
+    "id", "title", "filename", "status", "transcript", "summary",
+    "action_items", "key_decisions", "error_message", "created_at", "updated_at"
+)
+JSON_COLUMNS = ("action_items", "key_decisions")
+
+# Fixed statements, compiled once per connection and reused from its statement cache
+INSERT_SQL = f"INSERT INTO meetings ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+SELECT_SQL = "SELECT * FROM meetings WHERE id = ?"
+DELETE_SQL = "DELETE FROM meetings WHERE id = ?"
+COUNT_SQL = "SELECT COUNT(*) FROM meetings"
+
+class _WriteRequest:
+    """One statement waiting for the writer thread"""
+    
+    def __init__(self, sql: str, params: tuple):
+        self.sql = sql
+        self.params = params
+        self.future: Future = Future()
+
+class SQLiteMeetingStore:
+    """
+    Local meetings table in SQLite (WAL mode), for single-node deployments
+    
+    All writes go through one writer thread that groups whatever statements
+    are queued (up to DB_WRITE_BATCH_MAX, waiting at most DB_WRITE_BATCH_MS
+    for more) into a single transaction, so concurrent status updates share
+    one commit. Reads use a small pool of read-only connections, which WAL
+    lets run alongside the writer.
+    """
+    
+    def __init__(self):
+        # Storage configuration
+        self.db_path = os.getenv("DB_SQLITE_PATH", "meetings.db")
+        self.read_pool_size = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+        self.batch_max = int(os.getenv("DB_WRITE_BATCH_MAX", "64"))
+        self.batch_wait = float(os.getenv("DB_WRITE_BATCH_MS", "2")) / 1000.0
+        self.statement_cache = int(os.getenv("DB_STATEMENT_CACHE", "128"))
+        
+        self._writer_conn = self._connect()
+        self._writer_conn.execute("PRAGMA journal_mode=WAL")
+        self._writer_conn.execute("PRAGMA synchronous=NORMAL")
+        self._writer_conn.executescript(SCHEMA)
+        
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(1, self.read_pool_size)):
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            self._readers.put(conn)
+        
+        # Counters
+        self.write_batches = 0
+        self.writes = 0
+        self.write_errors = 0
+        
+        self._writes: "queue.Queue[Optional[_WriteRequest]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+        self._writer.start()
+        
+        logger.info(f"Using SQLite storage at {self.db_path}")
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self.statement_cache
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def _write_loop(self):
+        while True:
+            first = self._writes.get()
+            if first is None:
+                return
+            
+            batch = [first]
+            stopping = False
+            try:
+                while len(batch) < self.batch_max:
+                    request = self._writes.get(timeout=self.batch_wait) if self.batch_wait > 0 else self._writes.get_nowait()
+                    if request is None:
+                        stopping = True
+                        break
+                    batch.append(request)
+            except queue.Empty:
+                pass
+            
+            self._commit(batch)
+            if stopping:
+                return
+    
+    def _commit(self, batch: List[_WriteRequest]):
+        outcomes: List[Tuple[_WriteRequest, Optional[int], Optional[Exception]]] = []
+        try:
+            self._writer_conn.execute("BEGIN IMMEDIATE")
+            for request in batch:
+                # A failing statement is rolled back on its own; the rest of the batch still commits
+                try:
+                    cursor = self._writer_conn.execute(request.sql, request.params)
+                    outcomes.append((request, cursor.rowcount, None))
+                except sqlite3.Error as e:
+                    outcomes.append((request, None, e))
+            self._writer_conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.error(f"SQLite write batch failed: {str(e)}")
+            if self._writer_conn.in_transaction:
+                self._writer_conn.execute("ROLLBACK")
+            outcomes = [(request, None, e) for request in batch]
+        
+        self.write_batches += 1
+        self.writes += len(batch)
+        for request, rowcount, error in outcomes:
+            if error is not None:
+                self.write_errors += 1
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(rowcount)
+    
+    def _write(self, sql: str, params: tuple) -> int:
+        """Queue a statement for the next write batch and wait for its commit"""
+        request = _WriteRequest(sql, params)
+        self._writes.put(request)
+        return request.future.result()
+    
+    @contextmanager
+    def _reader(self):
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    @staticmethod
+    def _to_row(meeting: Dict[str, Any], columns) -> tuple:
+        return tuple(
+            json.dumps(meeting.get(column) or []) if column in JSON_COLUMNS else meeting.get(column)
+            for column in columns
+        )
+    
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        meeting = dict(row)
+        for column in JSON_COLUMNS:
+            if column in meeting:
+                meeting[column] = json.loads(meeting[column]) if meeting[column] else []
+        return meeting
+    
+    def insert(self, meeting: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a meeting
+        
+        Args:
+            meeting: Meeting record
+        
+        Returns:
+            Dict: The inserted record
+        """
+        self._write(INSERT_SQL, self._to_row(meeting, COLUMNS))
+        return meeting
+    
+    def get(self, meeting_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a full meeting record
+        
+        Args:
+            meeting_id: Unique identifier for the meeting
+        
+        Returns:
+            Dict: Meeting record or None if not found
+        """
+        with self._reader() as conn:
+            row = conn.execute(SELECT_SQL, (meeting_id,)).fetchone()
+        return self._from_row(row) if row else None
+    
+    def update(self, meeting_id: str, fields: Dict[str, Any]) -> bool:
+        """
+        Update some columns of a meeting
+        
+        Args:
+            meeting_id: Unique identifier for the meeting
+            fields: Column values to set
+        
+        Returns:
+            bool: Whether the meeting existed
+        """
+        columns = [column for column in fields if column in COLUMNS and column != "id"]
+        if not columns:
+            return False
+        sql = f"UPDATE meetings SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?"
+        return self._write(sql, self._to_row(fields, columns) + (meeting_id,)) > 0
+    
+    def page(
+        self,
+        columns,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List meetings newest first, served by idx_meetings_created_at
+        
+        Args:
+            columns: Columns to return
+            limit: Maximum rows to return
+            offset: Rows to skip (ignored when after is set)
+            after: (created_at, id) key to continue after
+        
+        Returns:
+            List: Meeting rows
+        """
+        projection = ", ".join(column for column in columns if column in COLUMNS)
+        with self._reader() as conn:
+            if after:
+                rows = conn.execute(
+                    f"SELECT {projection} FROM meetings WHERE (created_at, id) < (?, ?) "
+                    "ORDER BY created_at DESC, id DESC LIMIT ?",
+                    (after[0], after[1], limit)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT {projection} FROM meetings ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                    (limit, offset)
+                ).fetchall()
+        return [self._from_row(row) for row in rows]
+    
+    def count(self) -> int:
+        """Number of stored meetings"""
+        with self._reader() as conn:
+            return conn.execute(COUNT_SQL).fetchone()[0]
+    
+    def delete(self, meeting_id: str) -> bool:
+        """
+        Delete a meeting
+        
+        Args:
+            meeting_id: Unique identifier for the meeting
+        
+        Returns:
+            bool: Whether the meeting existed
+        """
+        return self._write(DELETE_SQL, (meeting_id,)) > 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get write batching metrics
+        
+        Returns:
+            Dict: Path, pool size and write batch counters
+        """
+        return {
+            "path": self.db_path,
+            "read_pool_size": self.read_pool_size,
+            "write_batches": self.write_batches,
+            "writes": self.writes,
+            "write_errors": self.write_errors,
+            "avg_write_batch": self.writes / self.write_batches if self.write_batches else 0.0,
+            "pending_writes": self._writes.qsize(),
+        }
+    
+    def close(self):
+        """Flush queued writes and close every connection"""
+        self._writes.put(None)
+        self._writer.join()
+        self._writer_conn.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
@@ -0,0 +1,159 @@
+import re
+import json
+import logging
+from threading import Lock
+from typing import Dict, Any, Tuple
+
+from pydantic import ValidationError
+
+from ..models import MeetingAnalysis
+from ..utils.json_stream import repair_json_text
+from .map_reduce_analyzer import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# JSON schema passed to Ollama's "format" parameter to constrain decoding
+ANALYSIS_SCHEMA = MeetingAnalysis.schema()
+
+# Set on the placeholder analysis returned when generated text could not be parsed,
+# so callers can show it without caching or reusing it
+PARSE_FAILED = "parse_failed"
+
+class AnalysisParseError(Exception):
+    """Raised when generated text cannot be turned into a MeetingAnalysis"""
+    pass
+
+def _normalize_items(items: Any) -> Any:
+    # Models sometimes emit {"task": ..., "owner": ...} objects instead of strings
+    if not isinstance(items, list):
+        return items
+    normalized = []
+    for item in items:
+        if isinstance(item, dict):
+            item = " - ".join(str(value) for value in item.values() if value)
+        normalized.append(item)
+    return normalized
+
+def _validate(candidate: str) -> Dict[str, Any]:
+    parsed = json.loads(candidate)
+    if not isinstance(parsed, dict):
+        raise AnalysisParseError("Response is not a JSON object")
+    
+    # Missing fields default to empty, as before
+    parsed.setdefault("summary", "")
+    for field in ("action_items", "key_decisions"):
+        parsed[field] = _normalize_items(parsed.get(field, []))
+    
+    return MeetingAnalysis.parse_obj(parsed).dict()
+
+def parse_analysis(response_text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Turn generated text into a validated analysis dict
+    
+    The text is first parsed as-is; if that fails, a local repair
+    (repair_json_text) is tried before giving up.
+    
+    Args:
+        response_text: Raw generated text
+    
+    Returns:
+        Tuple of the analysis dict and whether a local repair was needed
+    
+    Raises:
+        AnalysisParseError: If neither the text nor its repair is a valid analysis
+    """
+    cleaned_text = response_text.strip()
+    match = re.search(r"\{.*\}", cleaned_text, re.DOTALL)
+    if match:
+        try:
+            return _validate(match.group(0)), False
+        except (ValueError, ValidationError, AnalysisParseError):
+            pass
+    
+    repaired = repair_json_text(cleaned_text)
+    if repaired is None:
+        raise AnalysisParseError("No JSON object found in response")
+    try:
+        return _validate(repaired), True
+    except (ValueError, ValidationError, AnalysisParseError) as e:
+        raise AnalysisParseError(f"Invalid analysis JSON: {str(e)}")
+
+def build_repair_prompt(response_text: str, error: Exception, max_chars: int = 4000) -> str:
+    """
+    Build a short prompt asking the model to fix its own output
+    
+    The transcript is deliberately not included, so a repair costs a fraction
+    of the original generation.
+    
+    Args:
+        response_text: The malformed output
+        error: Why it failed to parse
+        max_chars: Cap on the amount of malformed output echoed back
+    
+    Returns:
+        str: Repair prompt
+    """
+    return f"""The following text was supposed to be a JSON object matching this schema but is invalid ({str(error)}).
+
+Schema:
+{json.dumps(ANALYSIS_SCHEMA)}
+
+Text:
+{response_text[:max_chars]}
+
+Return only the corrected JSON object, keeping the original content:"""
+
+class ParseStats:
+    """Counts how often generations fail to parse and what that costs in tokens"""
+    
+    OUTCOMES = ("valid", "local_repair", "llm_repair", "unrecoverable")
+    
+    def __init__(self):
+        self._lock = Lock()
+        self.outcomes = {outcome: 0 for outcome in self.OUTCOMES}
+        self.generated_tokens = 0
+        self.repair_tokens = 0
+        self.wasted_tokens = 0
+    
+    def record(self, outcome: str, generated_tokens: int, repair_tokens: int = 0):
+        """
+        Record the outcome of one analysis generation
+        
+        Args:
+            outcome: One of OUTCOMES
+            generated_tokens: Tokens in the original generation
+            repair_tokens: Tokens spent on LLM repair passes
+        """
+        with self._lock:
+            self.outcomes[outcome] += 1
+            self.generated_tokens += generated_tokens
+            self.repair_tokens += repair_tokens
+            if outcome == "unrecoverable":
+                self.wasted_tokens += generated_tokens + repair_tokens
+        
+        if outcome != "valid":
+            logger.info(f"Analysis output needed handling: {outcome} ({generated_tokens} generated, {repair_tokens} repair tokens)")
+    
+    def record_text(self, outcome: str, response_text: str, repair_tokens: int = 0):
+        """Record an outcome, estimating generated tokens from the text"""
+        self.record(outcome, estimate_tokens(response_text), repair_tokens)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get parse-failure rate and token waste
+        
+        Returns:
+            Dict: Outcome counts, failure rates and token totals
+        """
+        with self._lock:
+            total = sum(self.outcomes.values())
+            first_try_failures = total - self.outcomes["valid"]
+            return {
+                "generations": total,
+                **self.outcomes,
+                "parse_failure_rate": first_try_failures / total if total else 0.0,
+                "unusable_rate": self.outcomes["unrecoverable"] / total if total else 0.0,
+                "generated_tokens": self.generated_tokens,
+                "repair_tokens": self.repair_tokens,
+                "wasted_tokens": self.wasted_tokens,
+            }
@@ -0,0 +1,348 @@
+import os
+import json
+import shutil
+import time
+import hashlib
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+import aiofiles
+from fastapi import UploadFile
+
+from ..utils.audio_utils import (
+    UPLOAD_DIR,
+    UPLOAD_CHUNK_SIZE,
+    MAX_UPLOAD_SIZE_MB,
+    FileTooLargeError,
+    stream_to_file,
+    is_supported_format,
+    cleanup_temp_file,
+)
+
+logger = logging.getLogger(__name__)
+
+class UploadNotFoundError(Exception):
+    """Raised when a resumable upload session does not exist"""
+    pass
+
+class UploadService:
+    """Service for resumable, chunked uploads of large meeting recordings"""
+
+    def __init__(self):
+        # Part size configuration (bytes)
+        self.default_part_size = int(os.getenv("UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))  # 8 MB
+        self.min_part_size = int(os.getenv("UPLOAD_MIN_PART_SIZE", str(1024 * 1024)))  # 1 MB
+        self.max_part_size = int(os.getenv("UPLOAD_MAX_PART_SIZE", str(64 * 1024 * 1024)))  # 64 MB
+
+        # Parts are written next to the final upload so assembly never crosses filesystems
+        self.upload_dir = UPLOAD_DIR
+
+        # Sessions untouched for this long are removed by the background sweep
+        self.session_ttl = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")) * 3600
+        self.sweep_interval = float(os.getenv("UPLOAD_SWEEP_INTERVAL_SECONDS", "3600"))
+
+        # Serialises completion of a single upload session
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    def _session_dir(self, upload_id: str) -> str:
+        return os.path.join(self.upload_dir, f"{upload_id}.parts")
+
+    def _manifest_path(self, upload_id: str) -> str:
+        return os.path.join(self._session_dir(upload_id), "manifest.json")
+
+    def _part_path(self, upload_id: str, part_number: int) -> str:
+        return os.path.join(self._session_dir(upload_id), f"{part_number:06d}.part")
+
+    def _expected_part_size(self, manifest: Dict[str, Any], part_number: int) -> int:
+        if part_number < manifest["total_parts"]:
+            return manifest["part_size"]
+        return manifest["total_size"] - manifest["part_size"] * (manifest["total_parts"] - 1)
+
+    async def create_upload(
+        self,
+        upload_id: str,
+        filename: str,
+        total_size: int,
+        part_size: Optional[int] = None,
+        meeting_title: Optional[str] = None,
+        whisper_model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Start a new resumable upload session
+
+        Args:
+            upload_id: Unique identifier, also used as the processing job_id
+            filename: Original filename (used for format validation and extension)
+            total_size: Size of the complete file in bytes
+            part_size: Requested part size in bytes (clamped to configured bounds)
+            meeting_title: Optional meeting title carried through to processing
+            whisper_model: Optional Whisper model size carried through to processing
+
+        Returns:
+            Dict: Upload session manifest
+        """
+        if not is_supported_format(filename):
+            raise ValueError("Invalid file format. Please upload an audio or video file")
+
+        if total_size <= 0:
+            raise ValueError("total_size must be positive")
+
+        if total_size > MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+            raise FileTooLargeError(f"File exceeds maximum allowed size of {MAX_UPLOAD_SIZE_MB:.0f} MB")
+
+        part_size = min(max(part_size or self.default_part_size, self.min_part_size), self.max_part_size)
+        total_parts = (total_size + part_size - 1) // part_size
+
+        manifest = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "meeting_title": meeting_title,
+            "whisper_model": whisper_model,
+            "total_size": total_size,
+            "part_size": part_size,
+            "total_parts": total_parts,
+        }
+
+        os.makedirs(self._session_dir(upload_id), exist_ok=True)
+        async with aiofiles.open(self._manifest_path(upload_id), "w") as f:
+            await f.write(json.dumps(manifest))
+
+        logger.info(f"Created resumable upload {upload_id}: {total_size} bytes in {total_parts} parts")
+        return manifest
+
+    async def get_manifest(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Load the manifest of an upload session
+
+        Args:
+            upload_id: Upload session identifier
+
+        Returns:
+            Dict: Upload session manifest
+        """
+        manifest_path = self._manifest_path(upload_id)
+        if not os.path.exists(manifest_path):
+            raise UploadNotFoundError(f"Upload {upload_id} not found")
+
+        async with aiofiles.open(manifest_path, "r") as f:
+            return json.loads(await f.read())
+
+    def _received_parts(self, manifest: Dict[str, Any]) -> List[int]:
+        upload_id = manifest["upload_id"]
+        received = []
+        for part_number in range(1, manifest["total_parts"] + 1):
+            part_path = self._part_path(upload_id, part_number)
+            if os.path.exists(part_path) and os.path.getsize(part_path) == self._expected_part_size(manifest, part_number):
+                received.append(part_number)
+        return received
+
+    async def get_status(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Report which parts have been received and the contiguous byte offset
+
+        Args:
+            upload_id: Upload session identifier
+
+        Returns:
+            Dict: Session status including received/missing parts and offset
+        """
+        manifest = await self.get_manifest(upload_id)
+        received = self._received_parts(manifest)
+        received_set = set(received)
+        missing = [n for n in range(1, manifest["total_parts"] + 1) if n not in received_set]
+
+        # Offset is the number of bytes received without gaps from the start of the file
+        offset = 0
+        for part_number in range(1, manifest["total_parts"] + 1):
+            if part_number not in received_set:
+                break
+            offset += self._expected_part_size(manifest, part_number)
+
+        return {
+            "upload_id": upload_id,
+            "filename": manifest["filename"],
+            "total_size": manifest["total_size"],
+            "part_size": manifest["part_size"],
+            "total_parts": manifest["total_parts"],
+            "received_parts": received,
+            "missing_parts": missing,
+            "bytes_received": sum(self._expected_part_size(manifest, n) for n in received),
+            "offset": offset,
+        }
+
+    async def save_part(self, upload_id: str, part_number: int, file: UploadFile) -> Dict[str, Any]:
+        """
+        Store one numbered part; parts may arrive in any order and in parallel
+
+        Args:
+            upload_id: Upload session identifier
+            part_number: 1-based part index
+            file: Uploaded part body
+
+        Returns:
+            Dict: part_number, size_bytes and whether the part was already present
+        """
+        manifest = await self.get_manifest(upload_id)
+
+        if part_number < 1 or part_number > manifest["total_parts"]:
+            raise ValueError(f"part_number must be between 1 and {manifest['total_parts']}")
+
+        expected_size = self._expected_part_size(manifest, part_number)
+        part_path = self._part_path(upload_id, part_number)
+
+        # Finished parts are never rewritten
+        if os.path.exists(part_path) and os.path.getsize(part_path) == expected_size:
+            return {"part_number": part_number, "size_bytes": expected_size, "already_received": True}
+
+        # Write to a temporary name so an interrupted part never looks finished
+        temp_path = f"{part_path}.{os.getpid()}.{id(file)}.tmp"
+        result = await stream_to_file(file, temp_path, expected_size)
+
+        if result["size_bytes"] != expected_size:
+            cleanup_temp_file(temp_path)
+            raise ValueError(f"Part {part_number} must be {expected_size} bytes, got {result['size_bytes']}")
+
+        os.replace(temp_path, part_path)
+        return {"part_number": part_number, "size_bytes": expected_size, "already_received": False}
+
+    async def complete_upload(
+        self,
+        upload_id: str,
+        on_assembled: Callable[[Dict[str, Any]], Awaitable[Any]]
+    ) -> Any:
+        """
+        Assemble all parts into the final upload file and hand it to on_assembled
+
+        The parts are removed only once on_assembled succeeds. If it raises
+        (e.g. the job queue is full) the assembled file is dropped and the
+        session stays intact, so the client can call complete again later.
+
+        Args:
+            upload_id: Upload session identifier
+            on_assembled: Called with file_path, size_bytes, sha256, filename,
+                meeting_title and whisper_model while the session is locked
+
+        Returns:
+            Any: Whatever on_assembled returns
+        """
+        lock = self._locks.setdefault(upload_id, asyncio.Lock())
+        async with lock:
+            try:
+                manifest = await self.get_manifest(upload_id)
+                status = await self.get_status(upload_id)
+                if status["missing_parts"]:
+                    raise ValueError(f"Upload is missing parts: {status['missing_parts']}")
+
+                file_extension = os.path.splitext(manifest["filename"])[1]
+                file_path = os.path.join(self.upload_dir, f"{upload_id}{file_extension}")
+
+                hasher = hashlib.sha256()
+                size_bytes = 0
+                async with aiofiles.open(file_path, "wb") as out:
+                    for part_number in range(1, manifest["total_parts"] + 1):
+                        async with aiofiles.open(self._part_path(upload_id, part_number), "rb") as part:
+                            while True:
+                                chunk = await part.read(UPLOAD_CHUNK_SIZE)
+                                if not chunk:
+                                    break
+                                hasher.update(chunk)
+                                size_bytes += len(chunk)
+                                await out.write(chunk)
+
+                logger.info(f"Assembled resumable upload {upload_id}: {file_path} ({size_bytes} bytes)")
+
+                try:
+                    result = await on_assembled({
+                        "file_path": file_path,
+                        "size_bytes": size_bytes,
+                        "sha256": hasher.hexdigest(),
+                        "filename": manifest["filename"],
+                        "meeting_title": manifest.get("meeting_title"),
+                        "whisper_model": manifest.get("whisper_model"),
+                    })
+                except Exception:
+                    cleanup_temp_file(file_path)
+                    raise
+
+                shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
+                return result
+            finally:
+                self._locks.pop(upload_id, None)
+
+    async def abort_upload(self, upload_id: str) -> bool:
+        """
+        Discard an upload session and all of its parts
+
+        Args:
+            upload_id: Upload session identifier
+
+        Returns:
+            bool: True if a session was removed
+        """
+        session_dir = self._session_dir(upload_id)
+        if not os.path.isdir(session_dir):
+            return False
+        shutil.rmtree(session_dir, ignore_errors=True)
+        return True
+
+    def sweep_expired(self) -> int:
+        """
+        Remove upload sessions with no activity for UPLOAD_SESSION_TTL_HOURS
+
+        Returns:
+            int: Number of sessions removed
+        """
+        if not os.path.isdir(self.upload_dir):
+            return 0
+
+        cutoff = time.time() - self.session_ttl
+        removed = 0
+        for entry in os.listdir(self.upload_dir):
+            if not entry.endswith(".parts"):
+                continue
+            upload_id = entry[:-len(".parts")]
+            if upload_id in self._locks:
+                continue
+
+            session_dir = self._session_dir(upload_id)
+            try:
+                # Last activity is the newest part (or the manifest for a session without parts)
+                last_activity = max(
+                    [os.path.getmtime(session_dir)]
+                    + [os.path.getmtime(os.path.join(session_dir, name)) for name in os.listdir(session_dir)]
+                )
+            except OSError:
+                continue
+
+            if last_activity < cutoff:
+                shutil.rmtree(session_dir, ignore_errors=True)
+                removed += 1
+
+        if removed:
+            logger.info(f"Removed {removed} expired upload sessions")
+        return removed
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.sweep_expired)
+            except Exception as e:
+                logger.warning(f"Upload session sweep failed: {str(e)}")
+            await asyncio.sleep(self.sweep_interval)
+
+    def start(self):
+        """Start the background sweep of expired sessions (requires a running event loop)"""
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        """Stop the background sweep"""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
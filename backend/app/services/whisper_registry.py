@@ -0,0 +1,219 @@
+import os
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock, Condition
+from typing import Dict, Any, List, Iterator, Optional
+
+import whisper
+
+logger = logging.getLogger(__name__)
+
+# Approximate parameter counts (millions), used to make room before a model is first loaded
+MODEL_PARAMS_M = {
+    "tiny": 39,
+    "base": 74,
+    "small": 244,
+    "medium": 769,
+    "large": 1550,
+    "turbo": 809,
+}
+
+def estimate_model_bytes(model_name: str) -> int:
+    """
+    Estimate the float32 weight size of a Whisper model before loading it
+    
+    Args:
+        model_name: Whisper model size, e.g. "base", "small.en" or "large-v3"
+    
+    Returns:
+        int: Estimated bytes, using the largest model when the name is unknown
+    """
+    family = model_name.split(".")[0].split("-")[0]
+    return MODEL_PARAMS_M.get(family, max(MODEL_PARAMS_M.values())) * 1_000_000 * 4
+
+class ModelNotAllowedError(Exception):
+    """Raised when a job requests a Whisper model that is not enabled"""
+    pass
+
+class WhisperModelRegistry:
+    """Lazily loads Whisper models and keeps a warm LRU set within a RAM budget"""
+    
+    def __init__(self):
+        # Registry configuration
+        self.default_model = os.getenv("WHISPER_MODEL", "base")
+        allowed = os.getenv("WHISPER_ALLOWED_MODELS", "tiny,base,small,medium")
+        self.allowed_models = [name.strip() for name in allowed.split(",") if name.strip()]
+        if self.default_model not in self.allowed_models:
+            self.allowed_models.append(self.default_model)
+        self.memory_budget_bytes = int(float(os.getenv("WHISPER_MEMORY_BUDGET_MB", "4096")) * 1024 * 1024)
+        self.device = os.getenv("WHISPER_DEVICE") or None
+        
+        # name -> {"model", "size_bytes", "in_use"}, least recently used first
+        self._models: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loading: set = set()
+        # Measured sizes of models loaded before, so reloads make exactly enough room
+        self._sizes: Dict[str, int] = {}
+        # Memory held outside the registry (the long-form worker pool's models)
+        self._reserved_bytes = 0
+        self._lock = Lock()
+        self._changed = Condition(self._lock)
+        
+        # Counters
+        self.loads = 0
+        self.evictions = 0
+    
+    def resolve(self, model_name: Optional[str] = None) -> str:
+        """
+        Validate a requested model name, falling back to the default
+        
+        Args:
+            model_name: Requested Whisper model size or None
+        
+        Returns:
+            str: Model name to use
+        """
+        model_name = model_name or self.default_model
+        if model_name not in self.allowed_models:
+            raise ModelNotAllowedError(
+                f"Whisper model '{model_name}' is not available. Choose one of: {', '.join(self.allowed_models)}"
+            )
+        return model_name
+    
+    def _used_bytes(self) -> int:
+        return self._reserved_bytes + sum(entry["size_bytes"] for entry in self._models.values())
+    
+    def estimate_bytes(self, model_name: str) -> int:
+        """
+        Get the memory a model takes, measured if it was loaded before
+        
+        Args:
+            model_name: Whisper model size
+        
+        Returns:
+            int: Size in bytes
+        """
+        return self._sizes.get(model_name) or estimate_model_bytes(model_name)
+    
+    def reserve(self, nbytes: int):
+        """
+        Count memory held elsewhere against the budget, evicting idle models to make room
+        
+        Args:
+            nbytes: Bytes to reserve
+        """
+        with self._changed:
+            self._reserved_bytes += nbytes
+            self._evict_idle(0)
+    
+    def release(self, nbytes: int):
+        """
+        Return memory taken with reserve()
+        
+        Args:
+            nbytes: Bytes to release
+        """
+        with self._changed:
+            self._reserved_bytes = max(0, self._reserved_bytes - nbytes)
+    
+    def _evict_idle(self, needed_bytes: int):
+        """Drop least recently used idle models until needed_bytes fits in the budget"""
+        for name in list(self._models.keys()):
+            if self._used_bytes() + needed_bytes <= self.memory_budget_bytes:
+                return
+            if self._models[name]["in_use"] == 0:
+                del self._models[name]
+                self.evictions += 1
+                logger.info(f"Evicted Whisper model '{name}' to stay within memory budget")
+    
+    @contextmanager
+    def acquire(self, model_name: Optional[str] = None) -> Iterator[Any]:
+        """
+        Borrow a loaded model, loading it on first use
+        
+        Concurrent jobs asking for the same model share one instance, and a
+        model is never evicted while borrowed.
+        
+        Args:
+            model_name: Requested Whisper model size or None for the default
+        
+        Yields:
+            whisper.Whisper: Loaded model
+        """
+        model_name = self.resolve(model_name)
+        
+        with self._changed:
+            # Another thread is loading this model; wait for it instead of loading a copy
+            while model_name in self._loading:
+                self._changed.wait()
+            
+            entry = self._models.get(model_name)
+            if entry is None:
+                self._loading.add(model_name)
+                # Make room before loading so the old and new models are never resident together
+                self._evict_idle(self.estimate_bytes(model_name))
+            else:
+                entry["in_use"] += 1
+                self._models.move_to_end(model_name)
+        
+        if entry is None:
+            try:
+                logger.info(f"Loading Whisper model '{model_name}'...")
+                model = whisper.load_model(model_name, device=self.device)
+                size_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+                logger.info(f"Whisper model '{model_name}' loaded ({size_bytes / (1024 * 1024):.0f} MB)")
+            except Exception:
+                with self._changed:
+                    self._loading.discard(model_name)
+                    self._changed.notify_all()
+                raise
+            
+            with self._changed:
+                self._evict_idle(size_bytes)
+                entry = {"model": model, "size_bytes": size_bytes, "in_use": 1}
+                self._models[model_name] = entry
+                self._sizes[model_name] = size_bytes
+                self._loading.discard(model_name)
+                self.loads += 1
+                self._changed.notify_all()
+        
+        try:
+            yield entry["model"]
+        finally:
+            with self._changed:
+                entry["in_use"] -= 1
+                # Models loaded over budget while others were busy are trimmed once released
+                self._evict_idle(0)
+    
+    def preload(self, model_names: List[str]):
+        """
+        Load models ahead of the first job
+        
+        Args:
+            model_names: Model sizes to warm up
+        """
+        for model_name in model_names:
+            with self.acquire(model_name):
+                pass
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get loaded models and memory use
+        
+        Returns:
+            Dict: Loaded models, budget and load/eviction counters
+        """
+        with self._lock:
+            return {
+                "default_model": self.default_model,
+                "allowed_models": self.allowed_models,
+                "loaded_models": {
+                    name: {"size_mb": round(entry["size_bytes"] / (1024 * 1024), 1), "in_use": entry["in_use"]}
+                    for name, entry in self._models.items()
+                },
+                "used_mb": round(self._used_bytes() / (1024 * 1024), 1),
+                "reserved_mb": round(self._reserved_bytes / (1024 * 1024), 1),
+                "budget_mb": round(self.memory_budget_bytes / (1024 * 1024), 1),
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
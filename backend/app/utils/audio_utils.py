@@ -1,11 +1,24 @@
 import os
+import io
+import wave
+import hashlib
 import aiofiles
+import numpy as np
 from fastapi import UploadFile
-from typing import List
+from typing import List, Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Upload streaming configuration
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 1 MB
+MAX_UPLOAD_SIZE_MB = float(os.getenv("MAX_UPLOAD_SIZE_MB", "2048"))
+
+class FileTooLargeError(Exception):
+    """Raised when an upload exceeds the configured maximum size"""
+    pass
+
 # Supported audio and video formats
 SUPPORTED_AUDIO_FORMATS = {
     '.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac', '.wma', '.aiff'
@@ -33,12 +46,8 @@ def validate_audio_file(file: UploadFile) -> bool:
             logger.warning("File has no filename")
             return False
         
-        # Get file extension
-        file_extension = os.path.splitext(file.filename.lower())[1]
-        
         # Check if extension is supported
-        if file_extension not in SUPPORTED_FORMATS:
-            logger.warning(f"Unsupported file format: {file_extension}")
+        if not is_supported_format(file.filename):
             return False
         
         # Check content type (basic validation)
@@ -53,39 +62,113 @@ def validate_audio_file(file: UploadFile) -> bool:
         logger.error(f"Error validating file: {str(e)}")
         return False
 
-async def save_upload_file(file: UploadFile, job_id: str) -> str:
+def is_supported_format(filename: str) -> bool:
     """
-    Save uploaded file to temporary storage
+    Check if a filename has a supported audio or video extension
+    
+    Args:
+        filename: Original filename
+        
+    Returns:
+        bool: True if the extension is supported
+    """
+    file_extension = os.path.splitext(filename.lower())[1]
+    if file_extension not in SUPPORTED_FORMATS:
+        logger.warning(f"Unsupported file format: {file_extension}")
+        return False
+    return True
+
+async def save_upload_file(
+    file: UploadFile,
+    job_id: str,
+    max_size_mb: Optional[float] = None,
+    chunk_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Stream uploaded file to temporary storage in fixed-size chunks
+    
+    The upload is never held in memory as a whole: each chunk is hashed,
+    counted and written before the next one is read, and the copy is aborted
+    as soon as the running size exceeds the limit.
     
     Args:
         file: Uploaded file object
         job_id: Unique identifier for the processing job
+        max_size_mb: Maximum allowed size in MB (defaults to MAX_UPLOAD_SIZE_MB)
+        chunk_size: Read/write chunk size in bytes (defaults to UPLOAD_CHUNK_SIZE)
         
     Returns:
-        str: Path to the saved file
+        Dict: file_path, size_bytes and sha256 of the saved file
     """
+    # Create uploads directory if it doesn't exist
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    
+    # Generate filename with job_id
+    file_extension = os.path.splitext(file.filename)[1]
+    filename = f"{job_id}{file_extension}"
+    file_path = os.path.join(UPLOAD_DIR, filename)
+    
     try:
-        # Create uploads directory if it doesn't exist
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Generate filename with job_id
-        file_extension = os.path.splitext(file.filename)[1]
-        filename = f"{job_id}{file_extension}"
-        file_path = os.path.join(upload_dir, filename)
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        logger.info(f"File saved successfully: {file_path}")
-        return file_path
+        max_size_mb = MAX_UPLOAD_SIZE_MB if max_size_mb is None else max_size_mb
+        result = await stream_to_file(file, file_path, int(max_size_mb * 1024 * 1024), chunk_size)
+        logger.info(f"File saved successfully: {file_path} ({result['size_bytes']} bytes)")
+        return result
         
+    except FileTooLargeError:
+        raise
     except Exception as e:
         logger.error(f"Error saving uploaded file: {str(e)}")
         raise Exception(f"Failed to save uploaded file: {str(e)}")
 
+async def stream_to_file(
+    source: Any,
+    file_path: str,
+    max_size_bytes: int,
+    chunk_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Copy an async readable source to disk chunk by chunk
+    
+    Args:
+        source: Object with an async ``read(size)`` method (e.g. UploadFile)
+        file_path: Destination path
+        max_size_bytes: Maximum number of bytes to accept
+        chunk_size: Read/write chunk size in bytes (defaults to UPLOAD_CHUNK_SIZE)
+        
+    Returns:
+        Dict: file_path, size_bytes and sha256 of the bytes written
+    """
+    chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+    
+    hasher = hashlib.sha256()
+    size_bytes = 0
+    
+    try:
+        async with aiofiles.open(file_path, 'wb') as f:
+            while True:
+                chunk = await source.read(chunk_size)
+                if not chunk:
+                    break
+                
+                size_bytes += len(chunk)
+                if size_bytes > max_size_bytes:
+                    raise FileTooLargeError(
+                        f"File exceeds maximum allowed size of {max_size_bytes / (1024 * 1024):.0f} MB"
+                    )
+                
+                hasher.update(chunk)
+                await f.write(chunk)
+    except Exception:
+        # Never leave a partial upload behind
+        cleanup_temp_file(file_path)
+        raise
+    
+    return {
+        "file_path": file_path,
+        "size_bytes": size_bytes,
+        "sha256": hasher.hexdigest()
+    }
+
 def get_file_size_mb(file_path: str) -> float:
     """
     Get file size in megabytes
@@ -103,7 +186,7 @@ def get_file_size_mb(file_path: str) -> float:
         logger.error(f"Error getting file size: {str(e)}")
         return 0.0
 
-def is_file_too_large(file_path: str, max_size_mb: float = 100.0) -> bool:
+def is_file_too_large(file_path: str, max_size_mb: float = MAX_UPLOAD_SIZE_MB) -> bool:
     """
     Check if file is too large for processing
     
@@ -137,6 +220,26 @@ def cleanup_temp_file(file_path: str) -> bool:
         logger.error(f"Error cleaning up temporary file: {str(e)}")
         return False
 
+def encode_wav(audio: np.ndarray, sample_rate: int = 16000) -> bytes:
+    """
+    Encode float32 PCM samples as an in-memory 16-bit mono WAV file
+    
+    Args:
+        audio: float32 samples in [-1, 1]
+        sample_rate: Sample rate of the audio
+        
+    Returns:
+        bytes: WAV file contents
+    """
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
 def get_supported_formats() -> List[str]:
     """
     Get list of supported audio and video formats
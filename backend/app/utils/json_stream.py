@@ -0,0 +1,153 @@
+import re
+import json
+from typing import Dict, Any, Optional
+
+class IncrementalJSONParser:
+    """
+    Incrementally scans streamed LLM output for the first top-level JSON object
+    
+    Text before the opening brace (e.g. a ```json fence) is ignored. Each
+    top-level field is reported as soon as the comma or closing brace after
+    its value arrives, and ``complete`` turns true on the closing brace so the
+    caller can stop generation there.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.complete = False
+        self.fields: Dict[str, Any] = {}
+        
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, text: str) -> Dict[str, Any]:
+        """
+        Consume the next piece of generated text
+        
+        Args:
+            text: Newly generated text
+        
+        Returns:
+            Dict: Top-level fields completed by this piece
+        """
+        if self.complete:
+            return {}
+        
+        self.buffer += text
+        completed: Dict[str, Any] = {}
+        
+        while self._pos < len(self.buffer):
+            ch = self.buffer[self._pos]
+            
+            if self._start is None:
+                if ch == "{":
+                    self._start = self._pos
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = self._pos + 1
+                    self.complete = True
+                    completed.update(self._new_fields(self.buffer[self._start:self._end]))
+                    break
+            elif ch == "," and self._depth == 1:
+                # Everything before this comma is a closed object once a brace is added
+                completed.update(self._new_fields(self.buffer[self._start:self._pos] + "}"))
+            
+            self._pos += 1
+        
+        return completed
+    
+    def _new_fields(self, candidate: str) -> Dict[str, Any]:
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            return {}
+        if not isinstance(parsed, dict):
+            return {}
+        
+        new = {key: value for key, value in parsed.items() if key not in self.fields}
+        self.fields.update(new)
+        return new
+    
+    @property
+    def json_text(self) -> Optional[str]:
+        """Text of the complete JSON object, or None if it has not closed yet"""
+        if not self.complete:
+            return None
+        return self.buffer[self._start:self._end]
+
+def repair_json_text(text: str) -> Optional[str]:
+    """
+    Cheaply repair the usual defects in LLM-generated JSON without another generation
+    
+    Handles prose or code fences around the object, trailing commas, and output
+    cut off by the token limit (an unterminated string is closed, a dangling
+    comma or key separator is dropped, and open brackets are closed).
+    
+    Args:
+        text: Raw generated text
+    
+    Returns:
+        str: Candidate JSON object text, or None if there is no object at all
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    
+    body = text[start:]
+    stack = []
+    in_string = False
+    escape = False
+    end = None
+    
+    for i, ch in enumerate(body):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                end = i + 1
+                break
+    
+    if end is not None:
+        candidate = body[:end]
+    else:
+        # Truncated generation: close whatever is still open
+        candidate = body
+        if in_string:
+            candidate += "\\" if escape else ""
+            candidate += '"'
+        candidate = candidate.rstrip()
+        if candidate.endswith(":"):
+            candidate += " null"
+        candidate = candidate.rstrip(",").rstrip()
+        candidate += "".join(reversed(stack))
+    
+    # Trailing commas before a closing bracket
+    return re.sub(r",\s*([}\]])", r"\1", candidate)
@@ -1,68 +1,81 @@
 import os
-import tempfile
-from moviepy.editor import VideoFileClip
+import asyncio
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
-def extract_audio_from_video(video_path: str) -> str:
+# ffmpeg configuration
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+# Whisper's native input format
+WHISPER_SAMPLE_RATE = 16000
+
+def _ffmpeg_audio_command(video_path: str, output_format: str, output: str) -> list:
+    """
+    Build an ffmpeg command that demuxes only the first audio stream and
+    resamples it to 16 kHz mono 16-bit PCM in a single pass
+    """
+    return [
+        FFMPEG_BINARY,
+        "-nostdin",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", video_path,
+        "-map", "0:a:0",   # first audio stream only, video is never decoded
+        "-vn", "-sn", "-dn",
+        "-ac", "1",
+        "-ar", str(WHISPER_SAMPLE_RATE),
+        "-acodec", "pcm_s16le",
+        "-f", output_format,
+        "-y", output,
+    ]
+
+def _ffmpeg_error(stderr: bytes) -> str:
+    message = stderr.decode("utf-8", errors="replace").strip()
+    if "matches no streams" in message:
+        return "No audio track found in video file"
+    return message or "ffmpeg exited with an error"
+
+async def extract_audio_pcm(video_path: str) -> np.ndarray:
     """
-    Extract audio from video file and save as temporary WAV file
+    Extract audio from video file straight into memory as 16 kHz mono PCM
+    
+    ffmpeg runs as a subprocess, so the event loop is never blocked and no
+    intermediate WAV file is written. The result can be passed directly to
+    Whisper's ``transcribe``.
     
     Args:
         video_path: Path to the video file
-        
+    
     Returns:
-        str: Path to the extracted audio file
+        np.ndarray: float32 samples in [-1, 1] at 16 kHz
     """
     try:
         logger.info(f"Extracting audio from video: {video_path}")
         
-        # Create temporary file for audio
-        temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-        temp_audio_path = temp_audio.name
-        temp_audio.close()
+        process = await asyncio.create_subprocess_exec(
+            *_ffmpeg_audio_command(video_path, "s16le", "-"),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
         
-        # Load video and extract audio
-        video = VideoFileClip(video_path)
-        audio = video.audio
+        if process.returncode != 0:
+            raise Exception(_ffmpeg_error(stderr))
         
-        if audio is None:
+        if not stdout:
             raise Exception("No audio track found in video file")
         
-        # Write audio to temporary file
-        audio.write_audiofile(temp_audio_path, verbose=False, logger=None)
-        
-        # Close video to free up resources
-        video.close()
-        
-        logger.info(f"Audio extracted successfully to: {temp_audio_path}")
-        return temp_audio_path
+        audio = np.frombuffer(stdout, np.int16).astype(np.float32) / 32768.0
         
+        logger.info(f"Audio extracted successfully: {len(audio) / WHISPER_SAMPLE_RATE:.1f}s of 16 kHz mono PCM")
+        return audio
+    
     except Exception as e:
         logger.error(f"Error extracting audio from video: {str(e)}")
         raise Exception(f"Failed to extract audio from video: {str(e)}")
 
-def cleanup_temp_audio(audio_path: str) -> bool:
-    """
-    Clean up temporary audio file
-    
-    Args:
-        audio_path: Path to the temporary audio file
-        
-    Returns:
-        bool: True if file was deleted successfully
-    """
-    try:
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
-            logger.info(f"Temporary audio file cleaned up: {audio_path}")
-            return True
-        return False
-    except Exception as e:
-        logger.error(f"Error cleaning up temporary audio file: {str(e)}")
-        return False
-
 def is_video_file(file_path: str) -> bool:
     """
     Check if file is a video file based on extension
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from app.services import backend_health
+from app.services.backend_health import BackendHealthMonitor, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(backend_health.time, "monotonic", fake)
+    return fake
+
+
+def open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["times_opened"] == 1
+    assert not breaker.try_acquire_trial()
+
+
+def test_half_open_lets_exactly_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+
+    clock.now += 31
+    assert breaker.try_acquire_trial()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.try_acquire_trial()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.try_acquire_trial()
+    assert breaker.try_acquire_trial()
+
+
+def test_failed_trial_reopens_with_a_fresh_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    open_breaker(breaker)
+
+    clock.now += 31
+    assert breaker.try_acquire_trial()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["times_opened"] == 2
+
+    clock.now += 10
+    assert not breaker.try_acquire_trial()
+    clock.now += 21
+    assert breaker.try_acquire_trial()
+
+
+def test_released_trial_can_be_taken_again(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+
+    clock.now += 31
+    assert breaker.try_acquire_trial()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.try_acquire_trial()
+
+
+def test_is_routable_takes_no_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    assert breaker.is_routable()
+
+    open_breaker(breaker)
+    assert not breaker.is_routable()
+
+    clock.now += 31
+    for _ in range(3):
+        assert breaker.is_routable()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.try_acquire_trial()
+    assert not breaker.is_routable()
+
+
+def test_probe_runs_while_a_request_holds_the_trial(clock, monkeypatch):
+    monkeypatch.setenv("CIRCUIT_FAILURE_THRESHOLD", "1")
+    monkeypatch.setenv("CIRCUIT_RESET_TIMEOUT", "30")
+    monitor = BackendHealthMonitor()
+    healthy = [False]
+
+    async def probe():
+        return healthy[0]
+
+    monitor.register("ollama", probe)
+    asyncio.run(monitor.check("ollama"))
+    assert monitor.breakers["ollama"].state == CircuitBreaker.OPEN
+
+    clock.now += 31
+    assert monitor.try_acquire("ollama")
+    assert not monitor.try_acquire("ollama")
+
+    # The background probe does not compete for the trial and can close the breaker
+    healthy[0] = True
+    asyncio.run(monitor.check("ollama"))
+    assert monitor.breakers["ollama"].state == CircuitBreaker.CLOSED
+    assert monitor.stats()["backends"]["ollama"]["last_probe"]["healthy"] is True
+
+
+def test_unknown_backend_is_always_available():
+    monitor = BackendHealthMonitor()
+    assert monitor.is_routable("local")
+    assert monitor.try_acquire("local")
+    monitor.record_failure("local")
+    monitor.record_inconclusive("local")
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.job_queue import JobQueue, QueueFullError
+
+
+@pytest.fixture
+def make_queue(tmp_path, monkeypatch):
+    monkeypatch.setenv("JOB_QUEUE_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setenv("JOB_RETRY_BACKOFF_SECONDS", "0.01")
+    monkeypatch.setenv("JOB_MAX_ATTEMPTS", "3")
+
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        return JobQueue()
+
+    return make
+
+
+async def wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for the job queue"
+        await asyncio.sleep(0.01)
+
+
+def test_failed_job_is_retried_from_its_checkpoint(make_queue):
+    queue = make_queue()
+    seen = []
+
+    async def handler(job):
+        seen.append((job["attempts"], dict(job["checkpoint"])))
+        if job["attempts"] == 1:
+            await queue.save_checkpoint(job["id"], "transcribed", {"transcript": "hello"})
+            raise RuntimeError("analysis backend down")
+
+    async def main():
+        await queue.start(handler)
+        await queue.enqueue("job1", {"file_path": "a.wav"})
+        await wait_for(lambda: queue.completed == 1)
+        await queue.close()
+
+    asyncio.run(main())
+
+    assert seen == [(1, {}), (2, {"transcript": "hello"})]
+    assert queue.retries == 1
+
+
+def test_job_fails_after_max_attempts_and_drops_checkpoint(make_queue):
+    queue = make_queue(JOB_MAX_ATTEMPTS=2)
+    attempts = []
+
+    async def handler(job):
+        attempts.append(job["attempts"])
+        await queue.save_checkpoint(job["id"], "transcribed", {"transcript": "long text"})
+        raise RuntimeError("boom")
+
+    async def main():
+        await queue.start(handler)
+        await queue.enqueue("job1", {})
+        await wait_for(lambda: (queue.get_job("job1") or {}).get("status") == JobQueue.FAILED)
+        job = queue.get_job("job1")
+        await queue.close()
+        return job
+
+    job = asyncio.run(main())
+
+    assert attempts == [1, 2]
+    assert job["error_message"] == "boom"
+    assert job["checkpoint"] == {}
+
+
+def test_old_failed_jobs_are_pruned(make_queue):
+    queue = make_queue(JOB_MAX_ATTEMPTS=1, JOB_FAILED_TTL_HOURS=1)
+
+    async def handler(job):
+        raise RuntimeError("boom")
+
+    async def main():
+        await queue.start(handler)
+        await queue.enqueue("old", {})
+        await wait_for(lambda: (queue.get_job("old") or {}).get("status") == JobQueue.FAILED)
+
+        stale = (datetime.now() - timedelta(hours=2)).isoformat()
+        queue._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (stale, "old"))
+
+        await queue.enqueue("new", {})
+        await wait_for(lambda: (queue.get_job("new") or {}).get("status") == JobQueue.FAILED)
+        await queue.close()
+
+    asyncio.run(main())
+
+    queue = make_queue()
+    assert queue.get_job("old") is None
+    assert queue.get_job("new")["status"] == JobQueue.FAILED
+
+
+def test_recover_requeues_interrupted_jobs(make_queue):
+    queue = make_queue()
+
+    async def interrupt():
+        await queue.enqueue("job1", {"file_path": "a.wav"})
+        # Claimed by a worker when the process died
+        claimed = await queue._run(queue._claim_next)
+        await queue.close()
+        return claimed
+
+    assert asyncio.run(interrupt())["id"] == "job1"
+
+    restarted = make_queue()
+    assert restarted.get_job("job1")["status"] == JobQueue.RUNNING
+    assert asyncio.run(restarted.recover()) == []
+
+    job = restarted.get_job("job1")
+    assert job["status"] == JobQueue.QUEUED
+    assert job["attempts"] == 1
+    assert job["payload"] == {"file_path": "a.wav"}
+
+
+def test_recover_gives_up_jobs_out_of_attempts(make_queue):
+    queue = make_queue(JOB_MAX_ATTEMPTS=1)
+
+    async def interrupt():
+        await queue.enqueue("job1", {})
+        await queue._run(queue._claim_next)
+        await queue.close()
+
+    asyncio.run(interrupt())
+
+    restarted = make_queue(JOB_MAX_ATTEMPTS=1)
+    assert asyncio.run(restarted.recover()) == ["job1"]
+    assert restarted.get_job("job1")["status"] == JobQueue.FAILED
+
+
+def test_enqueue_refuses_jobs_past_max_depth(make_queue):
+    queue = make_queue(JOB_QUEUE_MAX_DEPTH=1)
+
+    async def main():
+        await queue.enqueue("job1", {})
+        with pytest.raises(QueueFullError):
+            await queue.enqueue("job2", {})
+
+    asyncio.run(main())
+
+    assert queue.get_job("job2") is None
+    with pytest.raises(QueueFullError):
+        queue.ensure_capacity()
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from app.services.map_reduce_analyzer import MapReduceAnalyzer
+
+REDUCE_PREFIX = "Summaries of consecutive parts"
+
+SEGMENTS = [f" Sentence number {i} talks about topic {i}." for i in range(12)]
+TRANSCRIPT = "".join(SEGMENTS).strip()
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.setenv("MAP_REDUCE_OVERLAP_SENTENCES", "1")
+    return MapReduceAnalyzer()
+
+
+class FakeBackend:
+    """Records analyzed chunks and answers with one action item per chunk"""
+
+    def __init__(self):
+        self.chunks = []
+        self.reduces = 0
+
+    async def analyze_chunk(self, text, meeting_title=None):
+        await asyncio.sleep(0)
+        if text.startswith(REDUCE_PREFIX):
+            self.reduces += 1
+            return {"summary": "whole meeting", "action_items": [], "key_decisions": []}
+        self.chunks.append(text)
+        index = len(self.chunks)
+        return {"summary": f"part {index}", "action_items": [f"follow up on part {index}"], "key_decisions": []}
+
+
+def test_finish_merges_chunks_analyzed_during_transcription(analyzer):
+    backend = FakeBackend()
+
+    async def main():
+        incremental = analyzer.start_incremental(backend.analyze_chunk, chunk_tokens=30)
+        for segment in SEGMENTS:
+            incremental.add_segment(segment)
+        started_before_finish = incremental.chunks_started
+        return started_before_finish, await incremental.finish(TRANSCRIPT)
+
+    started_before_finish, analysis = asyncio.run(main())
+
+    assert started_before_finish >= 2
+    assert backend.chunks == analyzer.split(TRANSCRIPT, 30)
+    assert backend.reduces == 1
+    assert analysis["summary"] == "whole meeting"
+    assert analysis["action_items"] == [f"follow up on part {i + 1}" for i in range(len(backend.chunks))]
+
+
+def test_finish_discards_chunks_from_a_different_transcript(analyzer):
+    backend = FakeBackend()
+
+    async def main():
+        incremental = analyzer.start_incremental(backend.analyze_chunk, chunk_tokens=30)
+        for segment in SEGMENTS:
+            incremental.add_segment(segment)
+        tasks = list(incremental._tasks)
+        assert tasks
+
+        # The kept transcript came from another transcription attempt
+        result = await incremental.finish("An entirely different transcript from the winning backend.")
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Segments still arriving from the abandoned attempt are ignored
+        incremental.add_segment(" A late segment from the losing attempt.")
+        return result, tasks, incremental
+
+    result, tasks, incremental = asyncio.run(main())
+
+    assert result is None
+    assert all(task.cancelled() for task in tasks)
+    assert incremental.chunks_started == len(tasks)
+    assert backend.reduces == 0
+
+
+def test_finish_leaves_a_short_transcript_to_a_single_call(analyzer):
+    backend = FakeBackend()
+
+    async def main():
+        incremental = analyzer.start_incremental(backend.analyze_chunk, chunk_tokens=1000)
+        for segment in SEGMENTS:
+            incremental.add_segment(segment)
+        return await incremental.finish(TRANSCRIPT)
+
+    assert asyncio.run(main()) is None
+    assert backend.chunks == []
+
+
+def test_cancel_stops_further_chunks(analyzer):
+    backend = FakeBackend()
+
+    async def main():
+        incremental = analyzer.start_incremental(backend.analyze_chunk, chunk_tokens=30)
+        for segment in SEGMENTS[:6]:
+            incremental.add_segment(segment)
+        incremental.cancel()
+        started = incremental.chunks_started
+        for segment in SEGMENTS[6:]:
+            incremental.add_segment(segment)
+        await asyncio.sleep(0)
+        return started, incremental.chunks_started
+
+    started, after = asyncio.run(main())
+    assert started == after
+
+
+def test_merge_flags_an_unparsed_chunk(analyzer):
+    backend = FakeBackend()
+    results = [
+        {"summary": "a", "action_items": ["Send the notes"], "key_decisions": []},
+        {"summary": "", "action_items": ["send the notes!"], "key_decisions": [], "parse_failed": True},
+    ]
+
+    merged = asyncio.run(analyzer.merge(results, backend.analyze_chunk))
+
+    assert merged["parse_failed"] is True
+    assert merged["action_items"] == ["Send the notes"]
+    assert merged["summary"] == "a"
+
+
+def test_chunk_budget_per_backend(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_CONTEXT_TOKENS_HF", "1024")
+    monkeypatch.setenv("ANALYSIS_PROMPT_OVERHEAD_TOKENS", "300")
+    monkeypatch.setenv("ANALYSIS_MAX_OUTPUT_TOKENS_HF", "256")
+    monkeypatch.setenv("ANALYSIS_MIN_CHUNK_TOKENS", "256")
+    analyzer = MapReduceAnalyzer()
+    assert analyzer.chunk_tokens_for("hf") == 1024 - 300 - 256
+
+    monkeypatch.setenv("ANALYSIS_CONTEXT_TOKENS_HF", "512")
+    assert MapReduceAnalyzer().chunk_tokens_for("hf") == 256
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("supabase")
+
+from app.services.database_service import DatabaseService, SUMMARY_COLUMNS
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def db(request, tmp_path, monkeypatch):
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_ANON_KEY", raising=False)
+    monkeypatch.setenv("DB_LOCAL_BACKEND", request.param)
+    monkeypatch.setenv("DB_SQLITE_PATH", str(tmp_path / "meetings.db"))
+    monkeypatch.setenv("SEARCH_INDEX_PATH", str(tmp_path / "search.db"))
+    service = DatabaseService()
+    yield service
+    service.close()
+
+
+def meeting(meeting_id: str, created_at: str) -> dict:
+    return {
+        "id": meeting_id,
+        "title": f"Meeting {meeting_id}",
+        "filename": f"{meeting_id}.wav",
+        "status": "completed",
+        "transcript": "a long transcript " * 50,
+        "summary": f"Summary of {meeting_id}",
+        "action_items": ["send notes"],
+        "key_decisions": [],
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+# Two pairs share a created_at so the id has to break the tie
+CREATED = {
+    "m1": "2026-01-01T10:00:00",
+    "m2": "2026-01-02T10:00:00",
+    "m3": "2026-01-02T10:00:00",
+    "m4": "2026-01-03T10:00:00",
+    "m5": "2026-01-04T10:00:00",
+    "m6": "2026-01-04T10:00:00",
+    "m7": "2026-01-05T10:00:00",
+}
+NEWEST_FIRST = [meeting_id for _, meeting_id in sorted(((c, m) for m, c in CREATED.items()), reverse=True)]
+
+
+def populate(db):
+    async def create_all():
+        for meeting_id, created_at in CREATED.items():
+            await db.create_meeting(meeting(meeting_id, created_at))
+
+    asyncio.run(create_all())
+
+
+def walk(db, limit: int):
+    pages, cursor = [], None
+    while True:
+        page = asyncio.run(db.get_meetings(limit=limit, cursor=cursor))
+        pages.append([row["id"] for row in page["meetings"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_every_meeting_once_newest_first(db):
+    populate(db)
+
+    pages = walk(db, 3)
+
+    assert pages == [NEWEST_FIRST[0:3], NEWEST_FIRST[3:6], NEWEST_FIRST[6:]]
+
+
+def test_pages_project_summary_columns_only(db):
+    populate(db)
+
+    page = asyncio.run(db.get_meetings(limit=2))
+
+    assert page["total"] == len(CREATED)
+    for row in page["meetings"]:
+        assert set(row) == set(SUMMARY_COLUMNS)
+
+
+def test_offset_without_cursor(db):
+    populate(db)
+
+    page = asyncio.run(db.get_meetings(limit=3, offset=3))
+
+    assert [row["id"] for row in page["meetings"]] == NEWEST_FIRST[3:6]
+
+
+def test_cursor_is_stable_while_meetings_are_added_and_removed(db):
+    populate(db)
+    first = asyncio.run(db.get_meetings(limit=3))
+
+    asyncio.run(db.create_meeting(meeting("m8", "2026-01-06T10:00:00")))
+    asyncio.run(db.delete_meeting(NEWEST_FIRST[1]))
+
+    second = asyncio.run(db.get_meetings(limit=3, cursor=first["next_cursor"]))
+    assert [row["id"] for row in second["meetings"]] == NEWEST_FIRST[3:6]
+    assert second["total"] == len(CREATED)
+
+
+def test_fetch_page_continues_after_a_key(db):
+    populate(db)
+
+    rows = asyncio.run(db._fetch_page("test", ("id", "created_at"), 10, 0, ("2026-01-04T10:00:00", "m6")))
+
+    assert [row["id"] for row in rows] == NEWEST_FIRST[NEWEST_FIRST.index("m6") + 1:]
+
+
+def test_malformed_cursor_is_rejected(db):
+    with pytest.raises(ValueError):
+        asyncio.run(db.get_meetings(cursor="not a cursor"))
@@ -0,0 +1,72 @@
+import pytest
+
+from app.services.search_index import SearchIndex, MATCH_START, MATCH_END
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setenv("SEARCH_INDEX_PATH", str(tmp_path / "search.db"))
+    search_index = SearchIndex()
+    yield search_index
+    search_index.close()
+
+
+def test_snippet_escapes_stored_html_and_marks_matches(index):
+    index.index_meeting("m1", {
+        "title": "Weekly review",
+        "transcript": 'We agreed the <script>alert("x")</script> budget & timeline.',
+    })
+
+    hits = index.search("budget")
+
+    assert [hit["meeting_id"] for hit in hits] == ["m1"]
+    snippet = hits[0]["snippet"]
+    assert "<script>" not in snippet
+    assert "&lt;script&gt;" in snippet
+    assert "<mark>" in snippet and "</mark>" in snippet
+    assert snippet.replace("<mark>", "").replace("</mark>", "").count("<") == 0
+
+
+def test_transcript_snippet_is_escaped(index):
+    index.index_meeting("m1", {"title": "Weekly sync", "transcript": "Ship <b>release</b> & celebrate"})
+
+    snippet = index.search("release")[0]["snippet"]
+
+    assert "&lt;b&gt;<mark>release</mark>&lt;/b&gt; &amp; celebrate" in snippet
+
+
+def test_stored_text_cannot_forge_match_markers(index):
+    index.index_meeting("m1", {"title": "Weekly sync", "transcript": f"plain {MATCH_START}fake{MATCH_END} words about roadmap"})
+
+    snippet = index.search("roadmap")[0]["snippet"]
+
+    assert snippet.count("<mark>") == 1
+    assert "<mark>roadmap</mark>" in snippet
+
+
+def test_query_syntax_is_treated_as_words(index):
+    index.index_meeting("m1", {"title": "Roadmap planning", "summary": "Plan the NEAR term"})
+
+    assert SearchIndex.build_match_query('roadmap" OR NEAR(') == '"roadmap" "or" "near"*'
+    assert SearchIndex.build_match_query("  ?!  ") is None
+    assert index.search('roadmap" OR') == []
+    assert [hit["meeting_id"] for hit in index.search("roadm")] == ["m1"]
+
+
+def test_reindexing_keeps_fields_that_were_not_given(index):
+    index.index_meeting("m1", {"title": "Quarterly planning"})
+    index.index_meeting("m1", {"summary": "Hiring freeze decided"})
+
+    assert [hit["meeting_id"] for hit in index.search("quarterly")] == ["m1"]
+    assert [hit["meeting_id"] for hit in index.search("hiring")] == ["m1"]
+
+    index.remove_meeting("m1")
+    assert index.search("quarterly") == []
+    assert index.missing(["m1"]) == ["m1"]
+
+
+def test_title_matches_outrank_transcript_matches(index):
+    index.index_meeting("title", {"title": "Migration", "transcript": "other words"})
+    index.index_meeting("transcript", {"title": "Sync", "transcript": "we discussed the migration"})
+
+    assert [hit["meeting_id"] for hit in index.search("migration")] == ["title", "transcript"]
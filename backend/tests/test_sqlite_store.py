@@ -0,0 +1,138 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.services.sqlite_store import SQLiteMeetingStore
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "meetings.db")
+    monkeypatch.setenv("DB_SQLITE_PATH", path)
+    monkeypatch.setenv("DB_WRITE_BATCH_MS", "20")
+    return path
+
+
+@pytest.fixture
+def store(db_path):
+    meeting_store = SQLiteMeetingStore()
+    yield meeting_store
+    meeting_store.close()
+
+
+def meeting(meeting_id: str, created_at: str = "2026-01-01T10:00:00") -> dict:
+    return {
+        "id": meeting_id,
+        "title": f"Meeting {meeting_id}",
+        "filename": f"{meeting_id}.wav",
+        "status": "pending",
+        "action_items": ["send notes", "book room"],
+        "key_decisions": [],
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def test_insert_and_get_round_trip_json_columns(store):
+    store.insert(meeting("m1"))
+
+    stored = store.get("m1")
+    assert stored["title"] == "Meeting m1"
+    assert stored["action_items"] == ["send notes", "book room"]
+    assert stored["key_decisions"] == []
+    assert stored["transcript"] is None
+    assert store.get("missing") is None
+
+
+def test_update_and_delete_report_whether_the_meeting_existed(store):
+    store.insert(meeting("m1"))
+
+    assert store.update("m1", {"status": "completed", "key_decisions": ["ship it"], "unknown": 1})
+    assert not store.update("missing", {"status": "completed"})
+    assert not store.update("m1", {"id": "other"})
+
+    stored = store.get("m1")
+    assert stored["status"] == "completed"
+    assert stored["key_decisions"] == ["ship it"]
+
+    assert store.count() == 1
+    assert store.delete("m1")
+    assert not store.delete("m1")
+    assert store.count() == 0
+
+
+def test_page_orders_by_created_at_then_id(store):
+    store.insert(meeting("a", "2026-01-01T10:00:00"))
+    store.insert(meeting("b", "2026-01-02T10:00:00"))
+    store.insert(meeting("c", "2026-01-02T10:00:00"))
+    store.insert(meeting("d", "2026-01-03T10:00:00"))
+
+    first = store.page(("id", "title"), 2)
+    assert [row["id"] for row in first] == ["d", "c"]
+    assert set(first[0]) == {"id", "title"}
+
+    rest = store.page(("id",), 10, after=("2026-01-02T10:00:00", "c"))
+    assert [row["id"] for row in rest] == ["b", "a"]
+    assert [row["id"] for row in store.page(("id",), 2, offset=1)] == ["c", "b"]
+
+
+def test_listing_uses_the_created_at_index(store):
+    plan = store._writer_conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM meetings WHERE (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT ?",
+        ("2026-01-02T10:00:00", "c", 10)
+    ).fetchall()
+    assert any("idx_meetings_created_at" in row[-1] for row in plan)
+
+
+def test_concurrent_writes_share_batches(store):
+    threads = [
+        threading.Thread(target=store.insert, args=(meeting(f"m{i}"),))
+        for i in range(32)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = store.stats()
+    assert store.count() == 32
+    assert stats["writes"] == 32
+    assert stats["write_batches"] < 32
+    assert stats["write_errors"] == 0
+
+
+def test_failing_statement_does_not_fail_its_batch(store):
+    store.insert(meeting("dup"))
+    errors = []
+
+    def insert(meeting_id):
+        try:
+            store.insert(meeting(meeting_id))
+        except sqlite3.IntegrityError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=insert, args=(meeting_id,)) for meeting_id in ("dup", "x", "y")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 1
+    assert store.get("x") is not None
+    assert store.get("y") is not None
+    assert store.stats()["write_errors"] == 1
+
+
+def test_data_survives_reopening(db_path):
+    first = SQLiteMeetingStore()
+    first.insert(meeting("m1"))
+    first.close()
+
+    reopened = SQLiteMeetingStore()
+    try:
+        assert reopened.get("m1")["action_items"] == ["send notes", "book room"]
+        assert reopened._writer_conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        reopened.close()
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+
+import pytest
+
+pytest.importorskip("aiofiles")
+pytest.importorskip("fastapi")
+
+from app.services.upload_service import UploadService, UploadNotFoundError
+
+
+class FakePart:
+    """Async readable body, like the UploadFile of an uploaded part"""
+
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("UPLOAD_MIN_PART_SIZE", "1")
+    upload_service = UploadService()
+    upload_service.upload_dir = str(tmp_path)
+    return upload_service
+
+
+DATA = bytes(range(256)) * 10  # 2560 bytes: parts of 1024, 1024 and 512
+
+
+def create(service, upload_id="up1"):
+    return asyncio.run(service.create_upload(upload_id, "meeting.wav", len(DATA), part_size=1024))
+
+
+def save(service, part_number, data=None, upload_id="up1"):
+    start = (part_number - 1) * 1024
+    body = DATA[start:start + 1024] if data is None else data
+    return asyncio.run(service.save_part(upload_id, part_number, FakePart(body)))
+
+
+def test_parts_in_any_order_assemble_in_order(service):
+    manifest = create(service)
+    assert manifest["total_parts"] == 3
+
+    for part_number in (3, 1, 2):
+        assert save(service, part_number)["already_received"] is False
+
+    status = asyncio.run(service.get_status("up1"))
+    assert status["missing_parts"] == []
+    assert status["offset"] == len(DATA)
+
+    received = {}
+
+    async def on_assembled(info):
+        received.update(info)
+        with open(info["file_path"], "rb") as f:
+            assert f.read() == DATA
+        return "queued"
+
+    assert asyncio.run(service.complete_upload("up1", on_assembled)) == "queued"
+    assert received["size_bytes"] == len(DATA)
+    assert received["sha256"] == hashlib.sha256(DATA).hexdigest()
+    assert received["file_path"].endswith("up1.wav")
+
+    # The session is gone once the assembled file was handed off
+    assert not os.path.exists(service._session_dir("up1"))
+    with pytest.raises(UploadNotFoundError):
+        asyncio.run(service.get_status("up1"))
+
+
+def test_status_offset_stops_at_first_gap(service):
+    create(service)
+    save(service, 1)
+    save(service, 3)
+
+    status = asyncio.run(service.get_status("up1"))
+    assert status["received_parts"] == [1, 3]
+    assert status["missing_parts"] == [2]
+    assert status["offset"] == 1024
+    assert status["bytes_received"] == 1024 + 512
+
+
+def test_finished_part_is_not_rewritten(service):
+    create(service)
+    save(service, 1)
+    assert save(service, 1, data=b"x" * 1024)["already_received"] is True
+
+    with open(service._part_path("up1", 1), "rb") as f:
+        assert f.read() == DATA[:1024]
+
+
+def test_part_of_wrong_size_is_rejected(service):
+    create(service)
+    with pytest.raises(ValueError):
+        save(service, 2, data=b"short")
+
+    status = asyncio.run(service.get_status("up1"))
+    assert status["received_parts"] == []
+    assert [name for name in os.listdir(service._session_dir("up1")) if name.endswith(".tmp")] == []
+
+
+def test_complete_with_missing_parts_fails(service):
+    create(service)
+    save(service, 1)
+
+    async def on_assembled(info):
+        raise AssertionError("must not be called")
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.complete_upload("up1", on_assembled))
+    assert asyncio.run(service.get_status("up1"))["received_parts"] == [1]
+
+
+def test_failed_handoff_keeps_parts_for_a_retry(service):
+    create(service)
+    for part_number in (1, 2, 3):
+        save(service, part_number)
+
+    assembled_paths = []
+
+    async def queue_full(info):
+        assembled_paths.append(info["file_path"])
+        raise RuntimeError("queue full")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.complete_upload("up1", queue_full))
+
+    # The assembled file is dropped but every part is still there
+    assert not os.path.exists(assembled_paths[0])
+    assert asyncio.run(service.get_status("up1"))["missing_parts"] == []
+
+    async def accepted(info):
+        return info["size_bytes"]
+
+    assert asyncio.run(service.complete_upload("up1", accepted)) == len(DATA)
+
+
+def test_sweep_removes_only_expired_sessions(service):
+    create(service, "old")
+    create(service, "fresh")
+
+    stale = time.time() - service.session_ttl - 60
+    old_dir = service._session_dir("old")
+    for name in os.listdir(old_dir):
+        os.utime(os.path.join(old_dir, name), (stale, stale))
+    os.utime(old_dir, (stale, stale))
+
+    assert service.sweep_expired() == 1
+    assert not os.path.exists(old_dir)
+    assert os.path.exists(service._session_dir("fresh"))
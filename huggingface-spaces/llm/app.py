@@ -2,17 +2,48 @@ import gradio as gr
 from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
 import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # Load model (choose one)
-model_name = "microsoft/DialoGPT-medium"  # or "microsoft/DialoGPT-large"
+model_name = os.getenv("MODEL_NAME", "microsoft/DialoGPT-medium")  # or "microsoft/DialoGPT-large"
+
+# Batching configuration
+MAX_BATCH_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+MAX_BATCH_TOKENS = int(os.getenv("BATCH_MAX_TOKENS", "8192"))  # padded prompt tokens per batch
+MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "50"))
+METRICS_LOG_EVERY = int(os.getenv("BATCH_METRICS_LOG_EVERY", "50"))
+# Context kept for the transcript; max_tokens is lowered rather than trimming the transcript below this
+MIN_TRANSCRIPT_TOKENS = int(os.getenv("MIN_TRANSCRIPT_TOKENS", "256"))
+
+# "dynamic-int8" quantizes Linear layers for faster CPU inference; "none" keeps full precision
+QUANTIZATION = os.getenv("QUANTIZATION", "dynamic-int8" if not torch.cuda.is_available() else "none")
+
 tokenizer = AutoTokenizer.from_pretrained(model_name)
 model = AutoModelForCausalLM.from_pretrained(model_name)
+model.eval()
 
-def analyze_transcript(transcript, output_format="json", temperature=0.7, max_tokens=512):
-    prompt = f"""You are an expert meeting assistant. Analyze the following meeting transcript and provide a structured analysis.
+# Decoder-only batching pads on the left so every row's last token is aligned
+tokenizer.padding_side = "left"
+if tokenizer.pad_token is None:
+    tokenizer.pad_token = tokenizer.eos_token
 
-Meeting Transcript:
-{transcript}
+if QUANTIZATION == "dynamic-int8":
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+device = "cuda" if torch.cuda.is_available() else "cpu"
+model.to(device)
+
+MAX_CONTEXT = getattr(model.config, "max_position_embeddings", None) or getattr(model.config, "n_positions", 1024)
+
+INSTRUCTIONS = """
 
 Your response must be a single, valid JSON object with these exact keys:
 - "summary": A 3-sentence overview of the meeting
@@ -26,22 +57,189 @@ Focus on:
 
 Return only the JSON object, no additional text:"""
 
-    # Generate response
-    inputs = tokenizer.encode(prompt, return_tensors="pt", max_length=1024, truncation=True)
+def build_prompt(transcript, max_new_tokens):
+    # Trim the transcript, not the instructions, when the prompt would overflow the context.
+    # max_new_tokens is clamped first so the transcript always keeps some room.
+    # Returns the prompt and the clamped max_new_tokens.
+    header = """You are an expert meeting assistant. Analyze the following meeting transcript and provide a structured analysis.
+
+Meeting Transcript:
+"""
+    fixed_tokens = len(tokenizer.encode(header + INSTRUCTIONS))
+    max_new_tokens = max(1, min(max_new_tokens, MAX_CONTEXT - fixed_tokens - MIN_TRANSCRIPT_TOKENS))
+    budget = max(0, MAX_CONTEXT - max_new_tokens - fixed_tokens)
+    transcript_ids = tokenizer.encode(transcript)
+    if len(transcript_ids) > budget:
+        transcript = tokenizer.decode(transcript_ids[:budget], skip_special_tokens=True)
+    return header + transcript + INSTRUCTIONS, max_new_tokens
+
+class GenerationRequest:
+    """One prompt waiting to join a batch"""
+    
+    def __init__(self, prompt, temperature, max_new_tokens):
+        self.input_ids = tokenizer.encode(prompt)
+        self.temperature = temperature
+        self.max_new_tokens = max_new_tokens
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+class BatchedGenerator:
+    """
+    Runs concurrent requests through one model as padded batches on a single thread
+    
+    Waiting requests are sorted by prompt length and packed so that
+    rows x longest prompt stays under MAX_BATCH_TOKENS, which keeps padding
+    waste low. Decoding reuses the KV cache (past_key_values) at every step,
+    applies each row's own temperature and token limit, and stops as soon
+    as every row has finished.
+    """
+    
+    def __init__(self, max_batch_size, max_batch_tokens, max_wait_ms):
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.pending = []
+        
+        # Metrics
+        self.batches = 0
+        self.requests = 0
+        self.generated_tokens = 0
+        self.padded_tokens = 0
+        self.prompt_tokens = 0
+        self.total_queue_wait = 0.0
+        self.total_batch_time = 0.0
+        
+        self.thread = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+        self.thread.start()
+    
+    def submit(self, prompt, temperature, max_new_tokens):
+        request = GenerationRequest(prompt, temperature, max_new_tokens)
+        self.queue.put(request)
+        return request.future
     
-    with torch.no_grad():
-        outputs = model.generate(
-            inputs,
-            max_length=max_tokens,
-            temperature=temperature,
-            do_sample=True,
-            pad_token_id=tokenizer.eos_token_id
-        )
+    def _collect(self):
+        # Block for the first request only if nothing is left over from the last round
+        if not self.pending:
+            self.pending.append(self.queue.get())
+        deadline = time.perf_counter() + self.max_wait
+        while len(self.pending) < self.max_batch_size * 4:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                self.pending.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        # Oldest request always goes first; fill the rest with similar lengths
+        self.pending.sort(key=lambda r: r.enqueued_at)
+        first = self.pending.pop(0)
+        candidates = sorted(self.pending, key=lambda r: abs(len(r.input_ids) - len(first.input_ids)))
+        batch = [first]
+        longest = len(first.input_ids)
+        for request in candidates:
+            if len(batch) >= self.max_batch_size:
+                break
+            new_longest = max(longest, len(request.input_ids))
+            if new_longest * (len(batch) + 1) > self.max_batch_tokens:
+                continue
+            batch.append(request)
+            longest = new_longest
+        self.pending = [r for r in self.pending if r not in batch]
+        return batch
     
-    response = tokenizer.decode(outputs[0], skip_special_tokens=True)
+    @torch.no_grad()
+    def _generate(self, batch):
+        encoded = tokenizer.pad({"input_ids": [r.input_ids for r in batch]}, return_tensors="pt")
+        input_ids = encoded["input_ids"].to(device)
+        attention_mask = encoded["attention_mask"].to(device)
+        position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+        
+        temperatures = torch.tensor([max(r.temperature, 1e-5) for r in batch], device=device).unsqueeze(1)
+        limits = torch.tensor([r.max_new_tokens for r in batch], device=device)
+        finished = torch.zeros(len(batch), dtype=torch.bool, device=device)
+        generated = []
+        
+        # Prefill the whole padded batch once, then decode one token per step from the cache
+        outputs = model(input_ids=input_ids, attention_mask=attention_mask, position_ids=position_ids, use_cache=True)
+        for step in range(int(limits.max())):
+            probs = torch.softmax(outputs.logits[:, -1, :].float() / temperatures, dim=-1)
+            next_tokens = torch.multinomial(probs, num_samples=1).squeeze(1)
+            next_tokens = torch.where(finished, torch.full_like(next_tokens, tokenizer.pad_token_id), next_tokens)
+            generated.append(next_tokens)
+            
+            finished |= (next_tokens == tokenizer.eos_token_id) | (step + 1 >= limits)
+            if finished.all():
+                break
+            
+            attention_mask = torch.cat([attention_mask, torch.ones_like(attention_mask[:, :1])], dim=1)
+            position_ids = attention_mask.sum(dim=1, keepdim=True) - 1
+            outputs = model(
+                input_ids=next_tokens.unsqueeze(1),
+                attention_mask=attention_mask,
+                position_ids=position_ids,
+                past_key_values=outputs.past_key_values,
+                use_cache=True
+            )
+        
+        # Only the new tokens are decoded; nothing is sliced off a re-decoded prompt
+        new_tokens = torch.stack(generated, dim=1).tolist() if generated else [[] for _ in batch]
+        texts = []
+        for request, tokens in zip(batch, new_tokens):
+            tokens = tokens[:request.max_new_tokens]
+            if tokenizer.eos_token_id in tokens:
+                tokens = tokens[:tokens.index(tokenizer.eos_token_id)]
+            texts.append(tokenizer.decode(tokens, skip_special_tokens=True).strip())
+            self.generated_tokens += len(tokens)
+        
+        self.padded_tokens += input_ids.numel()
+        self.prompt_tokens += sum(len(r.input_ids) for r in batch)
+        return texts
+    
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                outcomes = [(request, text, None) for request, text in zip(batch, self._generate(batch))]
+            except Exception as e:
+                outcomes = [(request, None, e) for request in batch]
+            finished = time.perf_counter()
+            
+            self.batches += 1
+            self.requests += len(batch)
+            self.total_batch_time += finished - started
+            self.total_queue_wait += sum(started - request.enqueued_at for request in batch)
+            if self.batches % METRICS_LOG_EVERY == 0:
+                logger.info(f"Batching metrics: {json.dumps(self.metrics())}")
+            
+            for request, text, error in outcomes:
+                if error is not None:
+                    request.future.set_exception(error)
+                else:
+                    request.future.set_result(text)
+    
+    def metrics(self):
+        return {
+            "queue_depth": self.queue.qsize() + len(self.pending),
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "padding_ratio": 1.0 - self.prompt_tokens / self.padded_tokens if self.padded_tokens else 0.0,
+            "generated_tokens": self.generated_tokens,
+            "avg_queue_wait_ms": 1000.0 * self.total_queue_wait / self.requests if self.requests else 0.0,
+            "avg_batch_latency_ms": 1000.0 * self.total_batch_time / self.batches if self.batches else 0.0,
+            "quantization": QUANTIZATION,
+        }
+
+generator = BatchedGenerator(MAX_BATCH_SIZE, MAX_BATCH_TOKENS, MAX_WAIT_MS)
+
+def analyze_transcript(transcript, output_format="json", temperature=0.7, max_tokens=512):
+    prompt, max_new_tokens = build_prompt(transcript, int(max_tokens))
     
-    # Extract the generated part (after the prompt)
-    generated_text = response[len(prompt):].strip()
+    # Generate response in whatever batch is forming
+    generated_text = generator.submit(prompt, float(temperature), max_new_tokens).result()
     
     try:
         # Try to parse as JSON
@@ -69,4 +267,6 @@ iface = gr.Interface(
     description="Analyze meeting transcripts for summary, action items, and key decisions"
 )
 
+# Let enough calls through concurrently for the batcher to group them
+iface.queue(default_concurrency_limit=MAX_BATCH_SIZE * 2)
 iface.launch()